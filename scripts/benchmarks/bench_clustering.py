@@ -0,0 +1,70 @@
+# scripts/benchmarks/bench_clustering.py
+
+import argparse
+import time
+
+import numpy as np
+
+from src.memory.clustering import (
+    complete_linkage_clustering,
+    naive_complete_linkage_clustering,
+)
+
+
+# ---------------------------------------------------------
+# Synthetic hybrid similarity (trajectory-like positions + embeddings)
+# ---------------------------------------------------------
+def make_similarity(n, dim=64, theta=10.0, alpha=0.3, seed=0, block=2048):
+    rng = np.random.default_rng(seed)
+
+    # random walk → 실제 trajectory 처럼 공간적으로 연속적인 노드
+    steps = rng.normal(scale=1.0, size=(n, 2))
+    positions = np.cumsum(steps, axis=0).astype(np.float32)
+
+    # 공간적으로 가까운 노드끼리 비슷한 embedding 을 갖도록 드리프트
+    drift = np.cumsum(rng.normal(scale=0.05, size=(n, dim)), axis=0)
+    emb = (drift + rng.normal(scale=0.5, size=(n, dim))).astype(np.float32)
+    emb /= np.linalg.norm(emb, axis=1, keepdims=True)
+
+    S = np.empty((n, n), dtype=np.float32)
+    for start in range(0, n, block):
+        stop = min(start + block, n)
+        d = np.linalg.norm(positions[start:stop, None, :] - positions[None, :, :], axis=-1)
+        S[start:stop] = (1 - alpha) * np.exp(-d / theta) + alpha * (emb[start:stop] @ emb.T)
+    return S
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[100, 500, 1000, 2000, 5000, 10000, 20000])
+    parser.add_argument("--threshold", type=float, default=0.4)
+    parser.add_argument("--verify_max", type=int, default=200,
+                        help="이 크기 이하에서는 naive 구현과 결과를 비교")
+    parser.add_argument("--naive_max", type=int, default=300,
+                        help="이 크기 이하에서만 naive 구현 시간 측정")
+    args = parser.parse_args()
+
+    print(f"{'N':>7} {'clusters':>9} {'engine(s)':>10} {'naive(s)':>10} {'match':>6}")
+
+    for n in args.sizes:
+        S = make_similarity(n)
+
+        t0 = time.perf_counter()
+        clusters = complete_linkage_clustering(S, threshold=args.threshold)
+        t_engine = time.perf_counter() - t0
+
+        t_naive = float("nan")
+        match = "-"
+        if n <= args.naive_max:
+            t0 = time.perf_counter()
+            ref = naive_complete_linkage_clustering(S, threshold=args.threshold)
+            t_naive = time.perf_counter() - t0
+            if n <= args.verify_max:
+                match = "yes" if ref == clusters else "NO"
+
+        print(f"{n:>7} {len(clusters):>9} {t_engine:>10.3f} {t_naive:>10.3f} {match:>6}")
+
+
+if __name__ == "__main__":
+    main()
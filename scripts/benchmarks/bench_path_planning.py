@@ -0,0 +1,116 @@
+# scripts/benchmarks/bench_path_planning.py
+
+import argparse
+import time
+
+import numpy as np
+
+from src.graph.planning import METHODS, PathPlanner, select_landmarks
+from src.graph.topology import TopologicalGraph
+from src.utils.spatial_index import cap_neighbors, radius_pairs
+
+
+def make_trajectory(n, loops=4, seed=0):
+    """Random-walk trajectory that revisits earlier segments (loop closures)."""
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(scale=0.5, size=(n, 3)) * np.array([1.0, 1.0, 0.02])
+    pos = np.cumsum(steps, axis=0)
+
+    # 뒤쪽 구간 일부를 앞쪽 구간 근처로 되돌림 → 재방문
+    seg = n // (2 * loops)
+    for k in range(loops):
+        dst = (2 * k + 1) * seg
+        src = rng.integers(0, max(dst - seg, 1))
+        pos[dst:dst + seg] = pos[src:src + seg] + rng.normal(scale=0.3, size=(seg, 3))
+    return pos
+
+
+def make_graph(pos, alpha, k_nearest):
+    n = len(pos)
+    i, j, dist = radius_pairs(pos, alpha)
+    keep = dist < alpha
+    i, j, dist = i[keep], j[keep], dist[keep]
+    keep = cap_neighbors(i, j, dist, k_nearest)
+
+    ids = np.arange(n)
+    src = np.concatenate([ids[:-1], i[keep]])
+    dst = np.concatenate([ids[1:], j[keep]])
+    types = ["sequence"] * (n - 1) + ["proximity"] * int(keep.sum())
+    return TopologicalGraph.from_edges(ids, pos, src, dst, types)
+
+
+def report(name, lat_ms, expanded=None):
+    lat_ms = np.asarray(lat_ms)
+    line = (f"[{name:>8}] mean {lat_ms.mean():8.2f} ms  p50 {np.percentile(lat_ms, 50):8.2f} ms  "
+            f"p95 {np.percentile(lat_ms, 95):8.2f} ms")
+    if expanded is not None:
+        line += f"  settled {np.mean(expanded):10.0f} nodes"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num_nodes", type=int, default=200_000)
+    parser.add_argument("--alpha", type=float, default=1.0)
+    parser.add_argument("--k_nearest", type=int, default=8)
+    parser.add_argument("--landmarks", type=int, default=16)
+    parser.add_argument("--num_queries", type=int, default=50)
+    parser.add_argument("--batch_queries", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # -------------------------------------------------------------
+    # build (graph + landmark table)
+    # -------------------------------------------------------------
+    t0 = time.perf_counter()
+    pos = make_trajectory(args.num_nodes, seed=args.seed)
+    graph = make_graph(pos, args.alpha, args.k_nearest)
+    t_graph = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    graph.landmarks, graph.landmark_dist = select_landmarks(graph, args.landmarks, seed=args.seed)
+    t_lm = time.perf_counter() - t0
+
+    n_comp, _ = graph.components()
+    print(f"[GRAPH] {len(graph)} nodes, {graph.num_edges()} edges, {n_comp} components "
+          f"— build {t_graph:.2f} s, {len(graph.landmarks)} landmarks {t_lm:.2f} s")
+
+    planner = PathPlanner(graph)
+    rng = np.random.default_rng(args.seed + 1)
+
+    # -------------------------------------------------------------
+    # single queries (같은 pair 로 method 비교, 결과 거리도 확인)
+    # -------------------------------------------------------------
+    sources = rng.integers(len(graph), size=args.num_queries)
+    targets = rng.integers(len(graph), size=args.num_queries)
+    ref = planner.plan_many(sources, targets)
+
+    for method in METHODS:
+        lat, expanded, worst = [], [], 0.0
+        for s, t, r in zip(sources, targets, ref):
+            t0 = time.perf_counter()
+            d, _ = planner.shortest_path(s, t, method)
+            lat.append((time.perf_counter() - t0) * 1e3)
+            expanded.append(planner.last_expanded)
+            if np.isfinite(r):
+                worst = max(worst, abs(d - r) / max(r, 1e-9))
+        report(method, lat, expanded)
+        if worst > 1e-5:
+            print(f"[WARN] {method}: max relative error {worst:.2e} vs reference")
+
+    # -------------------------------------------------------------
+    # batch API
+    # -------------------------------------------------------------
+    n_src = max(args.batch_queries // 20, 1)
+    b_sources = rng.choice(rng.integers(len(graph), size=n_src), size=args.batch_queries)
+    b_targets = rng.integers(len(graph), size=args.batch_queries)
+
+    t0 = time.perf_counter()
+    planner.plan_many(b_sources, b_targets)
+    t_batch = time.perf_counter() - t0
+    print(f"[   BATCH] {args.batch_queries} pairs ({n_src} distinct sources) "
+          f"{t_batch:.2f} s → {t_batch / args.batch_queries * 1e3:.2f} ms / pair")
+
+
+if __name__ == "__main__":
+    main()
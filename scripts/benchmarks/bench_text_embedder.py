@@ -0,0 +1,87 @@
+# scripts/benchmarks/bench_text_embedder.py
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from src.memory.text_embedder import DEFAULT_MODEL, TextEmbedder
+
+
+WORDS = (
+    "find the nearest exit door escalator restroom cafe store sign corridor "
+    "where is a bench near the elevator glass wall information desk stairs "
+    "shop entrance restaurant kiosk map lobby hallway"
+).split()
+
+
+def make_queries(n, seed=0):
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(WORDS, k=rng.randint(3, 30))) for _ in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", type=str, default=DEFAULT_MODEL)
+    parser.add_argument("--device", type=str, default=None)
+    parser.add_argument("--num_queries", type=int, default=512)
+    parser.add_argument("--batch_size", type=int, default=64)
+    parser.add_argument("--single_runs", type=int, default=50)
+    args = parser.parse_args()
+
+    queries = make_queries(args.num_queries)
+
+    # -------------------------------------------------------------
+    # model load (lazy → 첫 호출에서 발생)
+    # -------------------------------------------------------------
+    t0 = time.perf_counter()
+    embedder = TextEmbedder(args.model, batch_size=args.batch_size, device=args.device)
+    t_init = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    embedder.embed_text("warm up")
+    t_first = time.perf_counter() - t0
+    print(f"[INIT] constructor {t_init * 1e3:.1f} ms, first call (model load) {t_first:.2f} s")
+
+    # -------------------------------------------------------------
+    # single-query latency (cache 없이)
+    # -------------------------------------------------------------
+    lat = []
+    for q in queries[:args.single_runs]:
+        embedder.clear_cache()
+        t0 = time.perf_counter()
+        embedder.embed_text(q)
+        lat.append(time.perf_counter() - t0)
+    lat = np.array(lat) * 1e3
+    print(f"[SINGLE] p50 {np.percentile(lat, 50):.1f} ms, "
+          f"p95 {np.percentile(lat, 95):.1f} ms ({len(lat)} queries)")
+
+    # -------------------------------------------------------------
+    # throughput: one-by-one vs embed_many vs cached
+    # -------------------------------------------------------------
+    embedder.clear_cache()
+    t0 = time.perf_counter()
+    for q in queries:
+        embedder.embed_text(q)
+        embedder.clear_cache()
+    t_loop = time.perf_counter() - t0
+
+    embedder.clear_cache()
+    t0 = time.perf_counter()
+    embedder.embed_many(queries)
+    t_batch = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    embedder.embed_many(queries)
+    t_cached = time.perf_counter() - t0
+
+    n = len(queries)
+    print(f"[QPS] one-by-one {n / t_loop:10.1f} q/s")
+    print(f"[QPS] embed_many {n / t_batch:10.1f} q/s (batch_size={args.batch_size})")
+    print(f"[QPS] cached     {n / t_cached:10.1f} q/s")
+    print("[CACHE]", embedder.stats())
+
+
+if __name__ == "__main__":
+    main()
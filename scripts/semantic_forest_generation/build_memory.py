@@ -2,6 +2,7 @@
 
 import json
 import yaml
+import argparse
 import numpy as np
 import os
 import sys
@@ -10,6 +11,10 @@ ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 sys.path.append(ROOT)
 
 from src.memory.builder import build_semantic_forest
+from src.memory.forest_io import write_forest
+from src.memory.summary_cache import SummaryCache
+from src.utils.batch_jobs import make_batch_runner
+from src.utils.log_openai_usage import log_openai_usage
 
 
 CONFIG_PATH = "/disks/ssd1/kmw2622/workspace/embodied-rag/config/dataset_config.yaml"
@@ -56,6 +61,20 @@ def load_graph_metadata(processed_root):
 # ---------------------------------------------------------
 if __name__ == "__main__":
 
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--format", choices=["json", "binary", "both"], default="both",
+                        help="json: semantic_forest.json / binary: semantic_forest/ (npy + index)")
+    parser.add_argument("--summary_cache", type=str, default=None,
+                        help="summary cache (SQLite) 경로, 기본: <processed_root>/cache/summaries.sqlite")
+    parser.add_argument("--no_summary_cache", action="store_true")
+    parser.add_argument("--summary_cache_readonly", action="store_true",
+                        help="cache 는 조회만 하고 새 summary 를 기록하지 않음")
+    parser.add_argument("--summary_workers", type=int, default=8)
+    parser.add_argument("--batch", choices=["openai", "local"], default=None,
+                        help="summary 를 batch job 으로 제출 (local: 파일 기반 fake transport)")
+    parser.add_argument("--batch_poll", type=float, default=30.0, help="batch 상태 확인 주기 (초)")
+    args = parser.parse_args()
+
     # Load config
     cfg = load_config()
     processed_root = cfg["processed_root"]
@@ -72,10 +91,26 @@ if __name__ == "__main__":
     embeddings = np.load(emb_path)
     print(f"[DATA] Loaded embeddings: shape = {embeddings.shape}")
 
+    # Summary cache
+    summary_cache = None
+    if not args.no_summary_cache:
+        cache_path = args.summary_cache or os.path.join(processed_root, "cache", "summaries.sqlite")
+        summary_cache = SummaryCache(cache_path, read_only=args.summary_cache_readonly)
+        print("[CACHE] summary cache →", cache_path)
+
+    summary_batch = None
+    if args.batch:
+        summary_batch = make_batch_runner(
+            args.batch,
+            os.path.join(processed_root, "batch"),
+            poll_interval=args.batch_poll,
+            log_usage=log_openai_usage,
+        )
+
     # Build Semantic Forest
     print("[BUILD] Building Semantic Forest...")
 
-    forest = build_semantic_forest(
+    store, root = build_semantic_forest(
         positions=positions,
         embeddings=embeddings,
         captions=captions,
@@ -84,12 +119,26 @@ if __name__ == "__main__":
         theta_spatial=10.0,
         alpha=0.3,
         cluster_threshold=0.4,
+        spatial_cutoff="auto",
+        return_store=True,
+        summary_workers=args.summary_workers,
+        summary_cache=summary_cache,
+        summary_batch=summary_batch,
     )
 
+    if summary_cache is not None:
+        summary_cache.close()
+
     # Save result
-    out_path = os.path.join(processed_root, "semantic_forest.json")
+    if args.format in ("binary", "both"):
+        bin_dir = os.path.join(processed_root, "semantic_forest")
+        write_forest(store, bin_dir, root=root)
+        print(f"[DONE] Saved semantic_forest/ → {bin_dir}")
+
+    if args.format in ("json", "both"):
+        out_path = os.path.join(processed_root, "semantic_forest.json")
 
-    with open(out_path, "w") as f:
-        json.dump(forest, f, indent=2)
+        with open(out_path, "w") as f:
+            json.dump(store.to_forest_dict(root), f, indent=2)
 
-    print(f"[DONE] Saved semantic_forest.json → {out_path}")
+        print(f"[DONE] Saved semantic_forest.json → {out_path}")
@@ -0,0 +1,29 @@
+# scripts/semantic_forest_generation/convert_forest.py
+
+import os
+import sys
+import argparse
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.append(ROOT)
+
+from src.memory.forest_io import convert_forest
+
+
+# ---------------------------------------------------------
+# semantic_forest.json ↔ semantic_forest/ (binary) 변환
+# ---------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("src", type=str,
+                        help="semantic_forest.json 또는 binary forest 디렉토리")
+    parser.add_argument("dst", type=str,
+                        help="출력 경로 (src 가 json 이면 디렉토리, 디렉토리면 json)")
+    args = parser.parse_args()
+
+    convert_forest(args.src, args.dst)
+    print(f"[DONE] {args.src} → {args.dst}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# scripts/topology_map_construction/append_viewpoints.py
+#
+# 기존 topological graph 에 새 viewpoint 들을 추가 (extract → build_edges → build_graph 재실행 없이).
+#
+#   store : <processed_root>/topological_graph.db (SQLite, grid-cell spatial index)
+#   --nodes new_nodes.json   nodes_raw.json 과 같은 형식의 새 node 목록
+#   --init                   store 가 비어 있으면 기존 topological_graph.json 으로 초기화
+#                            (alpha / k_nearest 는 graph meta 에서, 지정값과 다르면 에러)
+#   --export                 store → topological_graph.json / .npz 다시 쓰기 (전체, 필요할 때만)
+#                            npz 에는 build_graph 처럼 ALT landmark table 도 다시 계산해 저장 (--landmarks)
+
+import os
+import json
+import time
+import yaml
+import argparse
+
+from src.graph.planning import select_landmarks
+from src.graph.store import GraphStore, check_graph_meta
+from src.graph.topology import TopologicalGraph
+
+DEFAULT_ALPHA = 3.0
+
+
+def load_config():
+    cfg_path = os.path.join(os.path.dirname(__file__), "..", "..", "config", "dataset_config.yaml")
+    with open(cfg_path, "r") as f:
+        return yaml.safe_load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=str, default=None,
+                        help="추가할 node JSON (nodes_raw.json 형식)")
+    parser.add_argument("--store", type=str, default=None,
+                        help="기본: <processed_root>/topological_graph.db")
+    parser.add_argument("--alpha", type=float, default=None,
+                        help="proximity edge 거리 임계값 (미터), store 를 처음 만들 때만 사용 "
+                             f"(기본: --init 이면 graph meta, 아니면 {DEFAULT_ALPHA})")
+    parser.add_argument("--k_nearest", type=int, default=None,
+                        help="(선택) node 별 proximity edge 를 가장 가까운 k 개로 제한 (build_edges 와 동일), "
+                             "store 를 처음 만들 때만 사용 "
+                             "(기본: --init 이면 graph meta)")
+    parser.add_argument("--init", action="store_true",
+                        help="store 가 비어 있으면 topological_graph.json 으로 초기화")
+    parser.add_argument("--export", action="store_true",
+                        help="append 후 topological_graph.json / .npz 를 store 에서 다시 생성")
+    parser.add_argument("--landmarks", type=int, default=16,
+                        help="--export 시 npz 에 저장할 ALT landmark 수 (0 → 저장 안 함)")
+    args = parser.parse_args()
+
+    cfg = load_config()
+    processed_root = cfg["dataset"]["processed_root"]
+    store_path = args.store or os.path.join(processed_root, "topological_graph.db")
+
+    graph_path = os.path.join(processed_root, "topological_graph.json")
+    alpha, k_nearest = args.alpha, args.k_nearest
+    seed = None
+    if args.init and not os.path.exists(store_path):
+        # 새 store 는 기존 graph 를 만든 설정 그대로 (지정값과 다르면 거부)
+        with open(graph_path, "r") as f:
+            seed = json.load(f)
+        meta = seed.get("meta") or {}
+        if alpha is None:
+            alpha = meta.get("alpha")
+        if k_nearest is None:
+            k_nearest = meta.get("k_nearest")
+        check_graph_meta(meta, alpha, k_nearest)  # store 파일을 만들기 전에 거부
+    if alpha is None and not os.path.exists(store_path):
+        alpha = DEFAULT_ALPHA
+
+    store = GraphStore(store_path, alpha=alpha, k_nearest=k_nearest)
+    print(f"[STORE] {store_path}: {len(store)} nodes, {store.num_edges()} edges "
+          f"(alpha={store.alpha}, k_nearest={store.k_nearest})")
+
+    if args.init and len(store) == 0:
+        if seed is None:
+            with open(graph_path, "r") as f:
+                seed = json.load(f)
+        res = store.import_graph(seed)
+        print(f"[STORE] initialized from {graph_path}: {res['nodes']} nodes, {res['edges']} edges")
+
+    if args.nodes:
+        with open(args.nodes, "r") as f:
+            new_nodes = json.load(f)
+
+        t0 = time.time()
+        res = store.append(new_nodes)
+        print(f"[APPEND] +{res['nodes']} nodes ({res['skipped']} already stored), "
+              f"+{res['sequence']} sequence / +{res['proximity']} -{res['proximity_removed']} proximity edges "
+              f"— {time.time() - t0:.2f}s")
+
+    if args.export:
+        graph = store.to_graph_dict(dataset_name=cfg["dataset"]["name"])
+        out_path = os.path.join(processed_root, "topological_graph.json")
+        tmp = out_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(graph, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, out_path)
+
+        # npz 가 json 보다 우선 로드되므로 landmark table 이 빠지면 이후 ALT 가 꺼짐
+        topo = TopologicalGraph.from_json(graph)
+        if args.landmarks > 0:
+            topo.landmarks, topo.landmark_dist = select_landmarks(topo, args.landmarks)
+            print(f"[INFO] ALT landmark table: {len(topo.landmarks)} landmarks")
+        npz_path = os.path.join(processed_root, "topological_graph.npz")
+        topo.save(npz_path)
+        print(f"[INFO] exported → {out_path}, {npz_path}")
+
+    print(f"[DONE] {len(store)} nodes, {store.num_edges()} edges")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,10 @@ import os
 import json
 import yaml
 import argparse
-import math
+
+import numpy as np
+
+from src.utils.spatial_index import radius_pairs, cap_neighbors
 
 
 def load_config():
@@ -13,12 +16,23 @@ def load_config():
         return yaml.safe_load(f)
 
 
-def euclidean_dist3(a, b):
-    return math.sqrt(
-        (a[0] - b[0]) ** 2 +
-        (a[1] - b[1]) ** 2 +
-        (a[2] - b[2]) ** 2
-    )
+def proximity_pairs(positions, alpha, k_nearest=None, time_window=None):
+    """
+    All index pairs (i < j) with ||p_i - p_j|| < alpha, sorted by (i, j).
+    KD-tree radius search 이므로 시간적으로 멀리 떨어진 loop closure 도 모두 찾는다.
+
+    k_nearest   : node 별로 가장 가까운 k 개 partner 만 유지 (None → 제한 없음)
+    time_window : |i - j| <= time_window 인 pair 만 유지 (None → 제한 없음)
+    """
+    i, j, dist = radius_pairs(positions, alpha)
+
+    keep = dist < alpha  # 기존 brute force 와 동일하게 strict
+    if time_window is not None:
+        keep &= (j - i) <= time_window
+    i, j, dist = i[keep], j[keep], dist[keep]
+
+    keep = cap_neighbors(i, j, dist, k_nearest)
+    return i[keep], j[keep]
 
 
 def main():
@@ -26,7 +40,10 @@ def main():
     parser.add_argument("--alpha", type=float, default=3.0,
                         help="proximity edge 거리 임계값 (미터)")
     parser.add_argument("--time_window", type=int, default=None,
-                        help="proximity edge를 만들 때 시간적으로 이 정도 인덱스 차이까지만 고려 (O(N^2) 방지용)")
+                        help="(선택) 인덱스 차이가 이 값 이하인 pair 만 proximity edge 로 사용. "
+                             "기본은 제한 없음 (loop closure 포함)")
+    parser.add_argument("--k_nearest", type=int, default=None,
+                        help="(선택) node 별 proximity edge 를 가장 가까운 k 개로 제한")
     args = parser.parse_args()
 
     cfg = load_config()
@@ -62,26 +79,26 @@ def main():
         dst = nodes[i + 1]["node_id"]
         edges.append({"src": src, "dst": dst, "type": "sequence"})
 
-    # proximity edges
-    N = len(nodes)
-    window = args.time_window if args.time_window is not None else N
+    # proximity edges (KD-tree radius search)
+    positions = np.array([n["position"][:3] for n in nodes], dtype=np.float64)
+    pi, pj = proximity_pairs(
+        positions, args.alpha,
+        k_nearest=args.k_nearest,
+        time_window=args.time_window,
+    )
 
-    for i in range(N):
-        pos_i = nodes[i]["position"]
-        for j in range(i + 1, min(N, i + 1 + window)):
-            pos_j = nodes[j]["position"]
-            d = euclidean_dist3(pos_i, pos_j)
-            if d < args.alpha:
-                src = nodes[i]["node_id"]
-                dst = nodes[j]["node_id"]
-                edges.append({"src": src, "dst": dst, "type": "proximity"})
+    node_ids = [n["node_id"] for n in nodes]
+    for i, j in zip(pi.tolist(), pj.tolist()):
+        edges.append({"src": node_ids[i], "dst": node_ids[j], "type": "proximity"})
+    print(f"[INFO] proximity edge 수: {len(pi)} (alpha={args.alpha})")
 
     edges_out_path = os.path.join(processed_root, "edges.json")
     out = {
         "edges": edges,
         "meta": {
             "alpha": args.alpha,
-            "time_window": args.time_window
+            "time_window": args.time_window,
+            "k_nearest": args.k_nearest,
         }
     }
 
@@ -3,6 +3,10 @@
 import os
 import json
 import yaml
+import argparse
+
+from src.graph.planning import select_landmarks
+from src.graph.topology import TopologicalGraph
 
 
 def load_config():
@@ -12,6 +16,11 @@ def load_config():
 
 
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--landmarks", type=int, default=16,
+                        help="path planning (ALT) 용 landmark 수, 0 → 계산 안 함")
+    args = parser.parse_args()
+
     cfg = load_config()
     processed_root = cfg["dataset"]["processed_root"]
 
@@ -54,6 +63,17 @@ def main():
         json.dump(graph, f, indent=2, ensure_ascii=False)
 
     print(f"[INFO] topological_graph.json 저장 완료 → {out_path}")
+
+    # CSR adjacency (edge type 별) → JSON 옆에 .npz 로 저장
+    topo = TopologicalGraph.from_json(graph)
+    if args.landmarks > 0:
+        topo.landmarks, topo.landmark_dist = select_landmarks(topo, args.landmarks)
+        print(f"[INFO] ALT landmark table: {len(topo.landmarks)} landmarks")
+    npz_path = os.path.join(processed_root, "topological_graph.npz")
+    topo.save(npz_path)
+    n_comp, _ = topo.components()
+    print(f"[INFO] topological_graph.npz 저장 완료 → {npz_path} "
+          f"(edge types: {topo.edge_types}, components: {n_comp})")
     print(f"[INFO] 노드 수: {len(nodes)}, 엣지 수: {len(edges)}")
 
 
@@ -0,0 +1,35 @@
+# scripts/topology_map_construction/build_pose_index.py
+#
+# kapture trajectories / records_camera → per-camera .npy pose index.
+# extract_viewpoints 가 없으면 자동으로 만들지만, 미리 (또는 강제로) 만들 때 사용.
+
+import os
+import yaml
+import argparse
+
+from src.utils.pose_index import build_pose_index
+
+
+def load_config():
+    cfg_path = os.path.join(os.path.dirname(__file__), "..", "..", "config", "dataset_config.yaml")
+    with open(cfg_path, "r") as f:
+        return yaml.safe_load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cache_dir", type=str, default=None,
+                        help="기본: <processed_root>/pose_index")
+    args = parser.parse_args()
+
+    cfg = load_config()["dataset"]
+    cache_dir = args.cache_dir or os.path.join(cfg["processed_root"], "pose_index")
+
+    manifest = build_pose_index(cfg["raw_root"], cache_dir)
+    for cam, info in manifest["cameras"].items():
+        print(f"[POSE INDEX] {cam}: {info['count']} poses ({info['with_image']} with image)")
+    print(f"[DONE] pose index → {cache_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,10 +3,18 @@
 import os
 import json
 import yaml
+import time
 import base64
 import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 from src.utils.log_openai_usage import log_openai_usage
+from src.utils.llm_pool import call_with_retries, is_rate_limit_error
+from src.utils.rate_limit import RateLimiter
+from src.utils.caption_journal import CaptionJournal, file_sha1
+from src.utils.image_payload import DETAIL_LEVELS, format_report, prepare_payloads
+from src.utils.batch_jobs import chat_request, make_batch_runner
 
 # ===========================
 # API KEY
@@ -57,27 +65,44 @@ def encode_image_b64(path):
         return base64.b64encode(f.read()).decode("utf-8")
 
 
+# TPM 추정용 (실제 usage 가 오면 차이만큼 보정)
+IMAGE_TOKEN_ESTIMATE = 765
+COMPLETION_TOKEN_ESTIMATE = 300
+
+
+def estimate_caption_tokens(caption_prompt, image_tokens=IMAGE_TOKEN_ESTIMATE):
+    return len(caption_prompt) // 4 + image_tokens + COMPLETION_TOKEN_ESTIMATE
+
+
 # ===========================
 # OpenAI Caption 함수
 # ===========================
-def generate_caption_with_openai(client, model, image_path, caption_prompt):
+def generate_caption_with_openai(client, model, image_path, caption_prompt, detail=None):
     img_b64 = encode_image_b64(image_path)
-    image_url = f"data:image/jpeg;base64,{img_b64}"
+    return request_caption(client, model, img_b64, caption_prompt, detail=detail)[0]
+
+
+def caption_request_body(model, img_b64, caption_prompt, detail=None):
+    image_url = {"url": f"data:image/jpeg;base64,{img_b64}"}
+    if detail is not None:
+        image_url["detail"] = detail
 
     messages = [
         {
             "role": "user",
             "content": [
                 {"type": "text", "text": caption_prompt},
-                {"type": "image_url", "image_url": {"url": image_url}},
+                {"type": "image_url", "image_url": image_url},
             ],
         }
     ]
+    return {"model": model, "messages": messages, "temperature": 0.2}
 
+
+def request_caption(client, model, img_b64, caption_prompt, detail=None):
+    """returns (caption, total_tokens or None)"""
     resp = client.chat.completions.create(
-        model=model,
-        messages=messages,
-        temperature=0.2,
+        **caption_request_body(model, img_b64, caption_prompt, detail)
     )
 
     # 로그 기록
@@ -87,7 +112,88 @@ def generate_caption_with_openai(client, model, image_path, caption_prompt):
         except Exception as e:
             print("[WARN] usage logging 실패:", e)
 
-    return resp.choices[0].message.content.strip()
+    usage = getattr(resp, "usage", None)
+    return resp.choices[0].message.content.strip(), getattr(usage, "total_tokens", None)
+
+
+def caption_images_concurrent(
+    client,
+    model,
+    image_paths,
+    caption_prompt,
+    workers=8,
+    limiter=None,
+    retries=5,
+    prefetch=None,
+    io_workers=4,
+    on_result=None,
+    detail=None,
+    image_tokens=IMAGE_TOKEN_ESTIMATE,
+):
+    """
+    Caption `image_paths` with `workers` requests in flight.
+
+    - 이미지 읽기 + base64 인코딩은 별도 IO pool 에서 미리 (prefetch 개까지) 수행
+    - limiter (RateLimiter) 로 requests/min, tokens/min 제한
+    - 429 → Retry-After / 지수 backoff 후 재시도, 그동안 limiter 전체 정지
+    - 결과는 입력 순서대로 반환 (실패한 이미지는 None)
+    - on_result(i, caption) : caption 이 끝나는 즉시 (worker thread 에서) 호출
+    """
+    n = len(image_paths)
+    if prefetch is None:
+        prefetch = workers
+    limiter = limiter or RateLimiter()
+    estimate = estimate_caption_tokens(caption_prompt, image_tokens)
+
+    # 메모리 상한: 인코딩된 이미지는 최대 workers + prefetch 개
+    slots = threading.BoundedSemaphore(workers + prefetch)
+    done = [0]
+    done_lock = threading.Lock()
+    t0 = time.perf_counter()
+
+    def on_retry(exc, delay):
+        if is_rate_limit_error(exc):
+            limiter.pause(delay)
+
+    def attempt(img_b64):
+        limiter.acquire(estimate)
+        return request_caption(client, model, img_b64, caption_prompt, detail=detail)
+
+    def run(i, encoded):
+        try:
+            img_b64 = encoded.result()
+            caption, used = call_with_retries(
+                attempt, img_b64, retries=retries, on_retry=on_retry
+            )
+            limiter.record_usage(estimate, used)
+            if on_result is not None:
+                on_result(i, caption)
+        except Exception as e:
+            print(f"[ERROR] {image_paths[i]}: caption 실패 → {e}")
+            caption = None
+        finally:
+            slots.release()
+
+        with done_lock:
+            done[0] += 1
+            if done[0] % 50 == 0 or done[0] == n:
+                rate = done[0] / (time.perf_counter() - t0)
+                print(f"[INFO] {done[0]}/{n} captions ({rate:.2f} frames/s)")
+        return caption
+
+    with ThreadPoolExecutor(io_workers) as io_pool, ThreadPoolExecutor(workers) as req_pool:
+        futures = []
+        try:
+            for i, path in enumerate(image_paths):
+                slots.acquire()
+                encoded = io_pool.submit(encode_image_b64, path)
+                futures.append(req_pool.submit(run, i, encoded))
+            return [f.result() for f in futures]
+        except KeyboardInterrupt:
+            # 대기 중인 요청은 취소, 진행 중인 요청만 마무리
+            for f in futures:
+                f.cancel()
+            raise
 
 
 # ===========================
@@ -98,13 +204,38 @@ def main():
     parser.add_argument("--model", type=str, default="gpt-4o-mini")
     parser.add_argument("--max_nodes", type=int, default=None)
     parser.add_argument("--dry_run", action="store_true")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="동시 요청 수 (1 → 기존 순차 방식)")
+    parser.add_argument("--rpm", type=int, default=None, help="requests / min 제한")
+    parser.add_argument("--tpm", type=int, default=None, help="tokens / min 제한")
+    parser.add_argument("--retries", type=int, default=5)
+    parser.add_argument("--base_url", type=str, default=None,
+                        help="OpenAI 호환 endpoint (예: src.utils.fake_openai)")
+    parser.add_argument("--resume", action="store_true",
+                        help="journal 에 이미 있는 caption 은 건너뛰고 이어서 실행 "
+                             "(기본 동작, 호환용 flag)")
+    parser.add_argument("--fresh", action="store_true",
+                        help="기존 journal 을 버리고 처음부터 실행 "
+                             "(기본: journal 에 이미 있는 caption 은 건너뛰고 이어서 실행)")
+    parser.add_argument("--max_side", type=int, default=None,
+                        help="payload 이미지 긴 변 (px), 지정 시 축소 + 재인코딩")
+    parser.add_argument("--jpeg_quality", type=int, default=85)
+    parser.add_argument("--detail", type=str, default=None, choices=DETAIL_LEVELS,
+                        help="image_url detail (미지정 → API 기본값)")
+    parser.add_argument("--payload_workers", type=int, default=4)
+    parser.add_argument("--batch", choices=["openai", "local"], default=None,
+                        help="batch job 으로 제출 (local: 파일 기반 fake transport)")
+    parser.add_argument("--batch_poll", type=float, default=30.0, help="batch 상태 확인 주기 (초)")
     args = parser.parse_args()
+    if args.resume and args.fresh:
+        parser.error("--resume 과 --fresh 는 함께 쓸 수 없음")
 
     cfg = load_config()
 
     processed_root = os.path.join(ROOT_DIR, "datasets", "coex_1f_processed")
     nodes_raw_path = os.path.join(processed_root, "nodes_raw.json")
     nodes_out_path = os.path.join(processed_root, "nodes_with_captions.json")
+    journal_path = os.path.join(processed_root, "nodes_with_captions.journal.jsonl")
 
     # prompt 파일 경로
     caption_prompt_path = os.path.join(ROOT_DIR, "prompt", "caption_prompt.txt")
@@ -121,44 +252,201 @@ def main():
         print("[INFO] 노드 없음, 종료")
         return
 
-    client = OpenAI() if (not args.dry_run and OpenAI is not None) else None
+    client = None
+    if not args.dry_run and OpenAI is not None:
+        client_kwargs = {"base_url": args.base_url} if args.base_url else {}
+        if args.workers > 1:
+            # 재시도 / backoff 는 call_with_retries 가 담당
+            client_kwargs["max_retries"] = 0
+        client = OpenAI(**client_kwargs)
     max_n = args.max_nodes if args.max_nodes else len(nodes)
 
     # ===========================
-    # CAPTION LOOP
+    # JOURNAL (resume)
     # ===========================
-    for i, node in enumerate(nodes):
-        if i >= max_n:
-            break
+    journal = None
+    image_sha1 = {}
+    resumed = set()
+    if not args.dry_run:
+        # payload 설정이 다르면 model 이 본 이미지가 다르므로 caption 재사용 안 함
+        payload_settings = None
+        if args.max_side is not None or args.detail is not None:
+            payload_settings = {
+                "max_side": args.max_side,
+                "jpeg_quality": args.jpeg_quality,
+                "detail": args.detail,
+            }
+        journal = CaptionJournal(
+            journal_path, args.model, caption_prompt,
+            fresh=args.fresh, settings=payload_settings,
+        )
+
+        with_image = [
+            n for n in nodes[:max_n]
+            if n.get("image") and os.path.exists(n["image"]) and n.get("alias_of") is None
+        ]
+        with ThreadPoolExecutor(8) as pool:
+            hashes = pool.map(file_sha1, [n["image"] for n in with_image])
+            image_sha1 = {n["node_id"]: h for n, h in zip(with_image, hashes)}
+
+        for node in with_image:
+            caption = journal.lookup(node["node_id"], image_sha1[node["node_id"]])
+            if caption is not None:
+                node["caption"] = caption
+                resumed.add(node["node_id"])
+
+        print(f"[JOURNAL] {journal_path} ({len(resumed)} nodes 재사용)")
 
-        node_id = node["node_id"]
+    # ===========================
+    # IMAGE PAYLOADS
+    # ===========================
+    send_path = {}
+    image_tokens = IMAGE_TOKEN_ESTIMATE
+    if not args.dry_run and (args.max_side is not None or args.detail is not None):
+        todo = [n for n in with_image if n["node_id"] not in resumed]
+        payloads, report = prepare_payloads(
+            [n["image"] for n in todo],
+            os.path.join(processed_root, "cache", "image_payloads"),
+            max_side=args.max_side,
+            quality=args.jpeg_quality,
+            detail=args.detail or "auto",
+            workers=args.payload_workers,
+            source_hashes=[image_sha1[n["node_id"]] for n in todo],
+        )
+        send_path = {n["node_id"]: p["path"] for n, p in zip(todo, payloads)}
+        if payloads:
+            image_tokens = max(p["tokens"] for p in payloads)
+        print("[PAYLOAD]", format_report(report))
+
+    targets = []
+    for node in nodes[:max_n]:
         img_path = node.get("image")
-
         if not img_path or not os.path.exists(img_path):
-            print(f"[WARN] node {node_id}: 이미지 없음")
+            print(f"[WARN] node {node['node_id']}: 이미지 없음")
             node["caption"] = None
-            continue
-
-        if args.dry_run:
-            node["caption"] = f"[DUMMY CAPTION] {os.path.basename(img_path)}"
-            print(f"[DRY RUN] node {node_id} 더미 캡션 생성")
-            continue
+        elif node.get("alias_of") is not None:
+            continue  # near-duplicate (dedup_frames) → 대표 노드 caption 재사용
+        elif node["node_id"] not in resumed:
+            targets.append(node)
+
+    try:
+        # ===========================
+        # BATCH MODE
+        # ===========================
+        if args.batch and not args.dry_run:
+            path_of = {
+                f"node-{n['node_id']}": send_path.get(n["node_id"], n["image"]) for n in targets
+            }
+            runner = make_batch_runner(
+                args.batch,
+                os.path.join(processed_root, "batch"),
+                poll_interval=args.batch_poll,
+                log_usage=log_openai_usage,
+            )
+
+            def fallback(cid):
+                return call_with_retries(
+                    generate_caption_with_openai, client, args.model, path_of[cid],
+                    caption_prompt, detail=args.detail, retries=args.retries,
+                )
+
+            results = runner.run(
+                (
+                    chat_request(cid, caption_request_body(
+                        args.model, encode_image_b64(path), caption_prompt, args.detail
+                    ))
+                    for cid, path in path_of.items()
+                ),
+                "captions",
+                fallback=fallback if client is not None else None,
+                fallback_workers=args.workers,
+            )
+            for node in targets:
+                caption = results.get(f"node-{node['node_id']}")
+                node["caption"] = caption
+                if caption is not None:
+                    journal.append(node["node_id"], image_sha1[node["node_id"]], caption)
+
+        # ===========================
+        # CONCURRENT MODE
+        # ===========================
+        elif args.workers > 1 and client is not None:
+            def on_result(i, caption):
+                node_id = targets[i]["node_id"]
+                journal.append(node_id, image_sha1[node_id], caption)
+
+            print(f"[INFO] {len(targets)} nodes 캡션 생성 (workers={args.workers}, "
+                  f"rpm={args.rpm}, tpm={args.tpm})")
+            captions = caption_images_concurrent(
+                client,
+                args.model,
+                [send_path.get(node["node_id"], node["image"]) for node in targets],
+                caption_prompt,
+                workers=args.workers,
+                limiter=RateLimiter(rpm=args.rpm, tpm=args.tpm),
+                retries=args.retries,
+                on_result=on_result,
+                detail=args.detail,
+                image_tokens=image_tokens,
+            )
+            for node, caption in zip(targets, captions):
+                node["caption"] = caption
+        else:
+            # ===========================
+            # CAPTION LOOP
+            # ===========================
+            for node in targets:
+                node_id = node["node_id"]
+                img_path = node["image"]
+
+                if args.dry_run:
+                    node["caption"] = f"[DUMMY CAPTION] {os.path.basename(img_path)}"
+                    print(f"[DRY RUN] node {node_id} 더미 캡션 생성")
+                    continue
+
+                print(f"[INFO] node {node_id}: 캡션 생성 중...")
+
+                try:
+                    caption = generate_caption_with_openai(
+                        client, args.model, send_path.get(node_id, img_path),
+                        caption_prompt, detail=args.detail,
+                    )
+                    journal.append(node_id, image_sha1[node_id], caption)
+                except Exception as e:
+                    print(f"[ERROR] node {node_id}: caption 실패 → {e}")
+                    caption = None
+
+                node["caption"] = caption
+
+    except KeyboardInterrupt:
+        if journal is not None:
+            journal.close()
+            print(f"\n[INTERRUPTED] {len(journal)} captions 이 journal 에 저장됨 → "
+                  f"다시 실행하면 이어서 진행")
+        raise
 
-        print(f"[INFO] node {node_id}: 캡션 생성 중...")
-
-        try:
-            caption = generate_caption_with_openai(client, args.model, img_path, caption_prompt)
-        except Exception as e:
-            print(f"[ERROR] node {node_id}: caption 실패 → {e}")
-            caption = None
-
-        node["caption"] = caption
+    # ===========================
+    # Near-duplicate alias → 대표 노드 caption
+    # ===========================
+    caption_of = {n["node_id"]: n.get("caption") for n in nodes}
+    aliases = [n for n in nodes[:max_n] if n.get("alias_of") is not None]
+    for node in aliases:
+        node["caption"] = caption_of.get(node["alias_of"])
+    if aliases:
+        print(f"[DEDUP] {len(aliases)} alias nodes reuse their representative's caption "
+              f"→ {len(aliases)} API calls avoided")
 
     # ===========================
     # Save 결과
     # ===========================
-    with open(nodes_out_path, "w", encoding="utf-8") as f:
+    tmp_path = nodes_out_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
         json.dump(nodes, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, nodes_out_path)
+
+    if journal is not None:
+        journal.compact()
+        journal.close()
 
     print(f"[DONE] nodes_with_captions.json 저장 → {nodes_out_path}")
 
@@ -0,0 +1,63 @@
+# scripts/topology_map_construction/dedup_frames.py
+#
+# extract_viewpoints 다음, caption_nodes 전에 실행.
+# nodes_raw.json 의 각 노드에 "dhash" 와 "alias_of" (대표 node_id 또는 null) 를 기록
+# → caption_nodes 는 alias 노드를 캡션하지 않고 대표 노드의 caption 을 재사용.
+
+import os
+import json
+import yaml
+import argparse
+
+from src.utils.frame_dedup import compute_hashes, find_aliases
+
+
+def load_config():
+    cfg_path = os.path.join(os.path.dirname(__file__), "..", "..", "config", "dataset_config.yaml")
+    with open(cfg_path, "r") as f:
+        return yaml.safe_load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--window", type=int, default=10,
+                        help="비교할 이전 frame 수 (temporal window)")
+    parser.add_argument("--max_distance", type=int, default=6,
+                        help="near-duplicate 로 보는 dHash Hamming 거리 (64 bit 중)")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    cfg = load_config()
+    processed_root = cfg["dataset"]["processed_root"]
+    nodes_path = os.path.join(processed_root, "nodes_raw.json")
+
+    with open(nodes_path, "r") as f:
+        nodes = json.load(f)
+
+    # 시간순 (extract_viewpoints 는 이미 시간순으로 저장)
+    nodes.sort(key=lambda n: (n.get("timestamp", 0), n["node_id"]))
+
+    paths = [n.get("image") if n.get("image") and os.path.exists(n["image"]) else None
+             for n in nodes]
+    hashes = compute_hashes(paths, workers=args.workers)
+    alias_of = find_aliases(hashes, window=args.window, max_distance=args.max_distance)
+
+    for node, h, rep in zip(nodes, hashes, alias_of):
+        node["dhash"] = f"{h:016x}" if h is not None else None
+        node["alias_of"] = nodes[rep]["node_id"] if rep is not None else None
+
+    tmp = nodes_path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(nodes, f, indent=2)
+    os.replace(tmp, nodes_path)
+
+    n_alias = sum(rep is not None for rep in alias_of)
+    n_img = sum(p is not None for p in paths)
+    print(f"[DEDUP] {n_alias}/{n_img} frames are near-duplicates "
+          f"(window={args.window}, max_distance={args.max_distance}) "
+          f"→ {n_alias} caption API calls avoided")
+    print(f"[DONE] nodes_raw.json 갱신 → {nodes_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,15 @@
 import os
 import yaml
 import json
+import argparse
 import numpy as np
 import matplotlib.pyplot as plt
-import cv2
-import quaternion
-from kapture.io.csv import kapture_from_dir
+
+from src.utils.frame_io import process_frames
+from src.utils.pose_index import load_pose_index
+from src.utils.keyframes import KeyframeSelector, spacing_for_budget
+
+FRAME_SIZE = (1024, 810)  # (width, height)
 
 def load_config():
     cfg_path = os.path.join(os.path.dirname(__file__), "..", "..", "config", "dataset_config.yaml")
@@ -16,31 +20,25 @@ def ensure_dir(path):
     if not os.path.exists(path):
         os.makedirs(path)
 
-def rotation_to_matrix(r):
-    """Convert kapture rotation (matrix / array quaternion / quaternion object) to 3×3 matrix."""
-    if r is None:
-        return np.eye(3)
-
-    # 1) numpy-quaternion object
-    if isinstance(r, quaternion.quaternion):
-        return quaternion.as_rotation_matrix(r)
-
-    # 2) numpy array (matrix or quaternion array)
-    r = np.array(r)
-
-    if r.shape == (3, 3):
-        return r
-
-    if r.shape == (4,):
-        # array quaternion -> (qw, qx, qy, qz)
-        qw, qx, qy, qz = r
-        q = quaternion.quaternion(qw, qx, qy, qz)
-        return quaternion.as_rotation_matrix(q)
-
-    raise ValueError(f"Unsupported rotation format: shape={r.shape}, value={r}")
-
-
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=None,
+                        help="frame 처리 process 수 (기본: CPU 수, 1 → 순차)")
+    parser.add_argument("--no_reduced_decode", action="store_true",
+                        help="항상 원본 해상도로 디코딩 후 resize")
+    # keyframe 선택 (config 의 dataset.keyframes 보다 우선)
+    parser.add_argument("--min_translation", type=float, default=None,
+                        help="마지막 keyframe 이후 이동 거리 (m) 가 이 이상이면 keyframe")
+    parser.add_argument("--min_rotation_deg", type=float, default=None,
+                        help="마지막 keyframe 이후 회전 (deg) 이 이 이상이면 keyframe")
+    parser.add_argument("--spacing", type=float, default=None,
+                        help="경로 길이 (m) 기준 keyframe 간격")
+    parser.add_argument("--budget", type=int, default=None,
+                        help="전체 trajectory 에 고르게 배치할 keyframe 수 (spacing 자동 계산)")
+    parser.add_argument("--rebuild_pose_index", action="store_true",
+                        help="kapture pose index 를 강제로 다시 생성")
+    args = parser.parse_args()
+
     cfg = load_config()
     RAW_ROOT = cfg["dataset"]["raw_root"]
     PROCESSED = cfg["dataset"]["processed_root"]
@@ -53,64 +51,81 @@ def main():
     ensure_dir(VIZ_DIR)
 
     # --------------------------------------
-    # Load Kapture dataset
+    # Load poses (cached per-camera index, 없거나 오래되면 다시 생성)
     # --------------------------------------
-    print("[INFO] Loading kapture...")
-    kdata = kapture_from_dir(RAW_ROOT)
-    trajectories = kdata.trajectories
-    records_camera = kdata.records_camera
+    print("[INFO] Loading pose index...")
+    poses = load_pose_index(
+        RAW_ROOT,
+        TARGET_CAM,
+        cache_dir=os.path.join(PROCESSED, "pose_index"),
+        rebuild=args.rebuild_pose_index,
+    )
+    print(f"[INFO] {len(poses)} poses for camera {TARGET_CAM}")
 
     xs, ys, zs = [], [], []
     nodes = []
-    timestamps_sorted = sorted(trajectories.keys())
 
     # --------------------------------------
-    # Extract nodes
+    # Keyframe selector
+    # --------------------------------------
+    kf_cfg = dict(cfg["dataset"].get("keyframes") or {})
+    for key in ("min_translation", "min_rotation_deg", "spacing", "budget"):
+        if getattr(args, key) is not None:
+            kf_cfg[key] = getattr(args, key)
+
+    spacing = kf_cfg.get("spacing")
+    if kf_cfg.get("budget"):
+        # budget → 전체 경로 길이 / (budget - 1), node 수 상한도 max_nodes 대신 budget
+        # (max_nodes 로 자르면 trajectory 앞부분만 남으므로)
+        spacing = spacing_for_budget(poses.positions, kf_cfg["budget"])
+        if MAX_NODES != kf_cfg["budget"]:
+            print(f"[KEYFRAME] budget {kf_cfg['budget']} 이 max_nodes ({MAX_NODES}) 를 대신함")
+        MAX_NODES = kf_cfg["budget"]
+        print(f"[KEYFRAME] budget {kf_cfg['budget']} → spacing {spacing:.3f} m")
+
+    selector = KeyframeSelector(
+        min_translation=kf_cfg.get("min_translation"),
+        min_rotation_deg=kf_cfg.get("min_rotation_deg"),
+        spacing=spacing,
+    )
+
+    # --------------------------------------
+    # Extract nodes (pose 만, 이미지는 아래에서 일괄 처리)
     # --------------------------------------
     node_id = 0
+    frame_jobs = []
+
+    # numpy scalar → python float 변환을 한 번에
+    positions = poses.positions.tolist()
+    quaternions = poses.quaternions.tolist()
 
-    for timestamp in timestamps_sorted:
+    for k in range(len(poses)):
         if node_id >= MAX_NODES:
+            if selector.active:
+                print(f"[WARN] max_nodes ({MAX_NODES}) 도달 → 이후 trajectory 생략")
             break
 
-        if TARGET_CAM not in trajectories[timestamp]:
-            continue
-
-        pose = trajectories[timestamp][TARGET_CAM]
-
-        # pose: world → camera
-        # camera → world = pose.inverse()
-        world_pose = pose.inverse()
-        t = world_pose.t.flatten()
-        rx, ry, rz = float(t[0]), float(t[1]), float(t[2])
+        timestamp = poses.timestamps[k]
 
+        # camera → world (index 에서 kapture pose 를 미리 뒤집어 둠)
+        rx, ry, rz = positions[k]
+        qx, qy, qz, qw = quaternions[k]
 
-        # ---- Quaternion ----
-        R = rotation_to_matrix(world_pose.r) 
-        q = quaternion.from_rotation_matrix(R)
-        qx, qy, qz, qw = float(q.x), float(q.y), float(q.z), float(q.w)
+        if not selector.offer((rx, ry, rz), (qx, qy, qz, qw)):
+            continue
 
         xs.append(rx)
         ys.append(ry)
         zs.append(rz)
 
         # 이미지 경로
-        rel_path = None
-        if timestamp in records_camera and TARGET_CAM in records_camera[timestamp]:
-            rel_path = records_camera[timestamp][TARGET_CAM]
-            img_path = os.path.join(RAW_ROOT, "sensors", "records_data", rel_path)
-        else:
-            img_path = None
-
-        # 이미지 저장
+        img_path = poses.image_path(k)
+
+        # 이미지 저장 대상 등록
         saved_img = None
         if img_path and os.path.exists(img_path):
-            img = cv2.imread(img_path)
-            save_path = os.path.join(FRAME_DIR, f"{node_id:05d}.jpg")
-            # Resize to whatever resolution you need
-            img = cv2.resize(img, (1024, 810), interpolation=cv2.INTER_AREA)
-            cv2.imwrite(save_path, img)
-            saved_img = save_path
+            saved_img = os.path.join(FRAME_DIR, f"{node_id:05d}.jpg")
+            frame_jobs.append((img_path, saved_img))
 
         nodes.append({
             "node_id": node_id,
@@ -122,6 +137,33 @@ def main():
 
         node_id += 1
 
+    if selector.active:
+        st = selector.stats()
+        print(f"[KEYFRAME] {st['kept']}/{st['offered']} frames kept ({st['ratio']:.1%})")
+
+    # --------------------------------------
+    # Frames: decode / resize / write (process pool)
+    # --------------------------------------
+    cam = cfg["dataset"].get("camera", {})
+    src_size = (cam["width"], cam["height"]) if "width" in cam and "height" in cam else None
+
+    print(f"[INFO] Processing {len(frame_jobs)} frames...")
+    written, stats = process_frames(
+        frame_jobs,
+        FRAME_DIR,
+        dst_size=FRAME_SIZE,
+        src_size=src_size,
+        workers=args.workers,
+        reduced_decode=not args.no_reduced_decode,
+    )
+    print(f"[FRAMES] {stats['written']} written, {stats['skipped']} up to date, "
+          f"{stats['failed']} failed (decode 1/{stats['decode_factor']}) "
+          f"— {stats['seconds']:.1f}s, {stats['frames_per_sec']:.1f} frames/s")
+
+    for node in nodes:
+        if node["image"] is not None and node["image"] not in written:
+            node["image"] = None
+
     # --------------------------------------
     # Save raw nodes JSON
     # --------------------------------------
@@ -1,145 +1,143 @@
+# scripts/topology_map_construction/kapture_trajectory_vis.py
+#
+# config 의 dataset (raw_root / target_camera) trajectory + 카메라 방향 시각화.
+#   - pose 는 cached pose index 에서 (kapture 파일이 바뀌면 다시 생성)
+#   - 방향 화살표는 quiver 한 번, forward vector 는 pose_batch 로 한 번에 계산
+#   - pose 가 많으면 화살표 (--max_arrows) / label (--max_labels) 을 자동으로 솎아냄
+
 import os
+import time
+import yaml
+import argparse
+
+import matplotlib
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 import numpy as np
-import cv2
-import quaternion
-from kapture.io.csv import kapture_from_dir
-
-# -------------------------
-# 1. Load Kapture dataset
-# -------------------------
-root = "/disks/ssd1/kmw2622/dataset/coex_1F_release_mapping/1F/release/mapping"
-kdata = kapture_from_dir(root)
-
-trajectories = kdata.trajectories
-records_camera = kdata.records_camera
-
-TARGET_CAM = "40027089_00"
-
-xs, ys, zs = [], [], []
-node_ids = []
-image_paths = []
-valid_timestamps = []
-
-count = 0
-node_id = 0
-
-save_img_dir = "saved_frames"
-os.makedirs(save_img_dir, exist_ok=True)
-
-# -------------------------
-# 2. Iterate sorted timestamps
-# -------------------------
-sorted_timestamps = sorted(trajectories.keys())
 
-for timestamp in sorted_timestamps:
-    # pose 없는 경우 skip
-    if TARGET_CAM not in trajectories[timestamp]:
-        continue
-
-    # 이미지 없는 경우 skip
-    if timestamp not in records_camera:
-        continue
-    if TARGET_CAM not in records_camera[timestamp]:
-        continue
-
-    # 이미지 경로
-    rel_path = records_camera[timestamp][TARGET_CAM]
-    img_path = os.path.join(root, "sensors", "records_data", rel_path)
-
-    if not os.path.exists(img_path):
-        print(f"[WARN] Missing image: {img_path}")
-        continue
-
-    pose_wc = trajectories[timestamp][TARGET_CAM]  # world→cam pose
+from src.utils.pose_index import load_pose_index
+from src.utils.pose_batch import forward_vectors
+
+
+def load_config():
+    cfg_path = os.path.join(os.path.dirname(__file__), "..", "..", "config", "dataset_config.yaml")
+    with open(cfg_path, "r") as f:
+        return yaml.safe_load(f)
+
+
+def decimate(n, max_count):
+    """Evenly spaced indices (at most max_count, first and last always kept)."""
+    if max_count <= 0:
+        return np.empty(0, dtype=np.int64)
+    if n <= max_count:
+        return np.arange(n)
+    return np.unique(np.linspace(0, n - 1, max_count).round().astype(np.int64))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--camera", type=str, default=None,
+                        help="기본: config 의 target_camera")
+    parser.add_argument("--start", type=int, default=0, help="첫 pose index")
+    parser.add_argument("--max_poses", type=int, default=None,
+                        help="시각화할 최대 pose 수 (기본: 전체)")
+    parser.add_argument("--all_poses", action="store_true",
+                        help="이미지가 없는 pose 도 포함")
+    parser.add_argument("--check_images", action="store_true",
+                        help="이미지 파일 존재 여부까지 확인 (pose 마다 stat → 느림)")
+    parser.add_argument("--max_arrows", type=int, default=2000)
+    parser.add_argument("--max_labels", type=int, default=200)
+    parser.add_argument("--arrow_scale", type=float, default=None,
+                        help="화살표 길이 (미터), 기본: trajectory 크기에서 자동")
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--out", type=str, default=None,
+                        help="기본: <processed_root>/viz/trajectory_<camera>.png")
+    parser.add_argument("--rebuild_pose_index", action="store_true")
+    args = parser.parse_args()
+
+    cfg = load_config()["dataset"]
+    camera = args.camera or cfg["target_camera"]
+    processed_root = cfg["processed_root"]
+    out_path = args.out or os.path.join(processed_root, "viz", f"trajectory_{camera}.png")
 
     # -------------------------
-    # 2-1. 카메라 월드 위치 = pose.inverse()
+    # 1. Load poses
     # -------------------------
-    pose_cw = pose_wc.inverse()  # camera→world
-    cam_pos = pose_cw.t.flatten()  # (x, y, z)
-
-    xs.append(cam_pos[0])
-    ys.append(cam_pos[1])
-    zs.append(cam_pos[2])
-
-    node_ids.append(node_id)
-    image_paths.append(img_path)
-    valid_timestamps.append(timestamp)
-
-    node_id += 1
-    count += 1
-    if count >= 50:
-        break
-
-xs = np.array(xs, dtype=float)
-ys = np.array(ys, dtype=float)
-zs = np.array(zs, dtype=float)
-
-# -------------------------
-# 3. Plot camera trajectory + orientation
-# -------------------------
-plt.figure(figsize=(12, 10))
-colors = np.linspace(0, 1, len(xs))
-
-plt.scatter(xs, ys, c=colors, cmap='gist_rainbow', s=40)
-plt.plot(xs, ys, color='gray', linewidth=0.4, alpha=0.5)
-
-for i, timestamp in enumerate(valid_timestamps):
-
-    pose_wc = trajectories[timestamp][TARGET_CAM]
-    R_wc = quaternion.as_rotation_matrix(pose_wc.r)      # world→camera
-    R_cw = R_wc.T                                        # camera→world
-
-    # 카메라 forward direction in world coords (+Z in camera frame)
-    forward_world = R_cw @ np.array([0, 0, 1], float)
-
-    scale = 0.1
-    fx = forward_world[0] * scale
-    fy = forward_world[1] * scale
-
-    x = xs[i]
-    y = ys[i]
-
-    plt.arrow(
-        x, y, fx, fy,
-        head_width=0.2,
-        head_length=0.2,
-        fc='black',
-        ec='black'
+    t0 = time.perf_counter()
+    poses = load_pose_index(
+        cfg["raw_root"],
+        camera,
+        cache_dir=os.path.join(processed_root, "pose_index"),
+        rebuild=args.rebuild_pose_index,
     )
 
-    plt.text(
-        x, y, str(node_ids[i]),
-        fontsize=8,
-        ha='center',
-        va='bottom',
-        color='black'
-    )
-
-plt.xlabel("X (meters)")
-plt.ylabel("Y (meters)")
-plt.title(f"Trajectory + Orientation — {TARGET_CAM}")
-plt.axis("equal")
-plt.grid(True, alpha=0.3)
-
-plt.savefig("trajectory_target_cam_with_orientation.png", dpi=300)
-plt.close()
-
-print("Trajectory saved to: trajectory_target_cam_with_orientation.png")
+    rows = np.arange(len(poses))
+    if not args.all_poses:
+        rows = rows[np.asarray(poses.image_paths) != ""]
+    rows = rows[rows >= args.start]  # --start / label 모두 원래 pose index 기준
+    if args.max_poses is not None:
+        rows = rows[:args.max_poses]
+    if args.check_images:
+        exists = np.array([os.path.exists(poses.image_path(k)) for k in rows], dtype=bool)
+        if not exists.all():
+            print(f"[WARN] {int((~exists).sum())} images missing → skipped")
+        rows = rows[exists]
+
+    if len(rows) == 0:
+        print("[WARN] no poses to plot")
+        return
+
+    xy = np.asarray(poses.positions[rows, :2], dtype=float)
+    forwards = forward_vectors(poses.quaternions[rows], order="xyzw")[:, :2]
+    t_load = time.perf_counter() - t0
 
-
-# -------------------------
-# 4. Save extracted images
-# -------------------------
-# saved_count = 0
-# for idx, img_path in enumerate(image_paths):
-#     img = cv2.imread(img_path)
-#     if img is None:
-#         print(f"[WARN] Failed to load: {img_path}")
-#         continue
-#     save_path = os.path.join(save_img_dir, f"{idx:04d}.jpg")
-#     cv2.imwrite(save_path, img)
-#     saved_count += 1
-
-# print(f"Saved {saved_count} images to: {save_img_dir}/")
+    # -------------------------
+    # 2. Plot trajectory + orientation
+    # -------------------------
+    t0 = time.perf_counter()
+    n = len(rows)
+    large = n > args.max_arrows
+
+    fig, ax = plt.subplots(figsize=(12, 10))
+    ax.plot(xy[:, 0], xy[:, 1], color="gray", linewidth=0.4, alpha=0.5)
+    ax.scatter(xy[:, 0], xy[:, 1], c=np.linspace(0, 1, n), cmap="gist_rainbow",
+               s=40 if not large else 4, rasterized=large, zorder=2)
+
+    # 화살표: 한 번의 quiver (수평면 방향만 → 단위 벡터로 정규화)
+    arrow_idx = decimate(n, args.max_arrows)
+    if len(arrow_idx):
+        extent = float(np.ptp(xy, axis=0).max()) or 1.0
+        scale = args.arrow_scale or max(extent / 100.0, 0.1)
+        uv = forwards[arrow_idx]
+        norm = np.linalg.norm(uv, axis=1, keepdims=True)
+        uv = np.divide(uv, norm, out=np.zeros_like(uv), where=norm > 1e-9) * scale
+        ax.quiver(
+            xy[arrow_idx, 0], xy[arrow_idx, 1], uv[:, 0], uv[:, 1],
+            angles="xy", scale_units="xy", scale=1.0,
+            width=0.002, color="black", zorder=3,
+        )
+
+    # label: 원래 pose index (필터링 후에도 그대로, 솎아낸 일부만)
+    label_idx = decimate(n, args.max_labels)
+    for i in label_idx.tolist():
+        ax.text(xy[i, 0], xy[i, 1], str(int(rows[i])),
+                fontsize=8, ha="center", va="bottom", color="black")
+
+    ax.set_xlabel("X (meters)")
+    ax.set_ylabel("Y (meters)")
+    ax.set_title(f"Trajectory + Orientation — {camera}")
+    ax.axis("equal")
+    ax.grid(True, alpha=0.3)
+
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    fig.savefig(out_path, dpi=args.dpi)
+    plt.close(fig)
+    t_plot = time.perf_counter() - t0
+
+    print(f"[RENDER] {n} poses, {len(arrow_idx)} arrows, "
+          f"{len(label_idx)} labels — load {t_load:.2f}s, plot {t_plot:.2f}s")
+    print(f"[DONE] trajectory saved → {out_path}")
+
+
+if __name__ == "__main__":
+    main()
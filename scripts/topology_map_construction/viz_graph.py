@@ -1,14 +1,34 @@
 # scripts/05_viz_graph.py
+#
+# topological graph 시각화
+#   - edge type 별 LineCollection 하나 (edge 마다 plt.plot 하지 않음)
+#   - edge 수가 --rasterize_above 를 넘으면 edge / node layer 를 rasterize
+#     (pdf / svg 출력에서 edge 하나하나가 vector path 로 남지 않도록)
+#   - --tiles 0,1,2 : zoom level z 마다 2^z × 2^z tile 을 worker process 들이 병렬로 렌더링
+#                     → viz/tiles/<z>/<x>_<y>.png
 
 import os
-import json
+import time
 import yaml
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
 import numpy as np
 
+from src.graph.topology import load_topological_graph
+
+EDGE_STYLE = {
+    "sequence": dict(color="blue", linewidth=0.6, alpha=0.5),
+}
+DEFAULT_EDGE_STYLE = dict(color="red", linewidth=0.4, alpha=0.4)  # proximity 등 기타
+
 
 def load_config():
-    cfg_path = os.path.join(os.path.dirname(__file__), "..", "config", "dataset_config.yaml")
+    cfg_path = os.path.join(os.path.dirname(__file__), "..", "..", "config", "dataset_config.yaml")
     with open(cfg_path, "r") as f:
         return yaml.safe_load(f)
 
@@ -18,65 +38,191 @@ def ensure_dir(path):
         os.makedirs(path)
 
 
-def main():
-    cfg = load_config()
-    processed_root = cfg["dataset"]["processed_root"]
-    viz_dir = os.path.join(processed_root, "viz")
-    ensure_dir(viz_dir)
-
-    graph_path = os.path.join(processed_root, "topological_graph.json")
-    if not os.path.exists(graph_path):
-        raise FileNotFoundError(f"topological_graph.json 이 없습니다: {graph_path}")
-
-    with open(graph_path, "r") as f:
-        graph = json.load(f)
-
-    nodes = graph["nodes"]
-    edges = graph["edges"]
+def edge_segments(graph):
+    """edge type → (E, 2, 2) xy segments."""
+    xy = graph.positions[:, :2]
+    segments = {}
+    for etype in graph.edge_types:
+        i, j = graph.edge_pairs(etype)
+        segments[etype] = np.stack([xy[i], xy[j]], axis=1)
+    return segments
 
-    # node_id → index 매핑
-    id_to_index = {n["node_id"]: i for i, n in enumerate(nodes)}
 
-    xs = np.array([n["position"][0] for n in nodes], dtype=float)
-    ys = np.array([n["position"][1] for n in nodes], dtype=float)
+def clip_segments(segs, bounds):
+    """Segments whose bounding box overlaps bounds = (x0, y0, x1, y1)."""
+    x0, y0, x1, y1 = bounds
+    lo = segs.min(axis=1)
+    hi = segs.max(axis=1)
+    keep = (hi[:, 0] >= x0) & (lo[:, 0] <= x1) & (hi[:, 1] >= y0) & (lo[:, 1] <= y1)
+    return segs[keep]
 
-    plt.figure(figsize=(12, 10))
 
-    # 우선 노드 그리기
-    plt.scatter(xs, ys, s=10, c="black", alpha=0.7, label="nodes")
+def draw_graph(ax, xy, segments, rasterize_above, node_size=10):
+    """Nodes + one LineCollection per edge type. returns number of edges drawn."""
+    n_edges = sum(len(s) for s in segments.values())
+    rasterize = n_edges > rasterize_above
 
-    # 엣지 타입별로 따로 그림
-    for edge in edges:
-        src_id = edge["src"]
-        dst_id = edge["dst"]
-        etype = edge.get("type", "sequence")
+    ax.scatter(xy[:, 0], xy[:, 1], s=node_size, c="black", alpha=0.7,
+               label="nodes", rasterized=rasterize, zorder=3)
 
-        if src_id not in id_to_index or dst_id not in id_to_index:
+    for etype, segs in segments.items():
+        if len(segs) == 0:
             continue
+        style = EDGE_STYLE.get(etype, DEFAULT_EDGE_STYLE)
+        ax.add_collection(LineCollection(segs, rasterized=rasterize, label=etype, **style))
+    return n_edges
+
+
+# =========================================================
+# full graph
+# =========================================================
+def render_graph(graph, out_path, dpi=300, rasterize_above=20_000):
+    t0 = time.perf_counter()
+    xy = graph.positions[:, :2]
+    segments = edge_segments(graph)
+
+    fig, ax = plt.subplots(figsize=(12, 10))
+    n_edges = draw_graph(ax, xy, segments, rasterize_above)
+
+    ax.set_title(f"Topological Graph – {graph.meta.get('dataset_name', '')}")
+    ax.set_xlabel("X (meters)")
+    ax.set_ylabel("Y (meters)")
+    ax.autoscale_view()
+    ax.axis("equal")
+    ax.grid(True, alpha=0.3)
+    t_draw = time.perf_counter() - t0
+
+    fig.savefig(out_path, dpi=dpi)
+    plt.close(fig)
+    t_total = time.perf_counter() - t0
+
+    return {
+        "edges": n_edges,
+        "rasterized": n_edges > rasterize_above,
+        "draw_seconds": t_draw,
+        "save_seconds": t_total - t_draw,
+        "seconds": t_total,
+    }
+
+
+# =========================================================
+# tiles (worker processes)
+# =========================================================
+_TILE_CTX = {}
+
+
+def _init_tile_worker(processed_root, extent, tile_px, rasterize_above, out_dir):
+    graph = load_topological_graph(processed_root)
+    _TILE_CTX.update(
+        xy=graph.positions[:, :2],
+        segments=edge_segments(graph),
+        extent=extent,
+        tile_px=tile_px,
+        rasterize_above=rasterize_above,
+        out_dir=out_dir,
+    )
+
+
+def tile_bounds(extent, z, tx, ty):
+    x0, y0, size = extent
+    step = size / (2 ** z)
+    return (x0 + tx * step, y0 + ty * step, x0 + (tx + 1) * step, y0 + (ty + 1) * step)
+
+
+def _render_tile(task):
+    z, tx, ty = task
+    t0 = time.perf_counter()
+    ctx = _TILE_CTX
+    bounds = tile_bounds(ctx["extent"], z, tx, ty)
+    x0, y0, x1, y1 = bounds
+
+    xy = ctx["xy"]
+    inside = (xy[:, 0] >= x0) & (xy[:, 0] <= x1) & (xy[:, 1] >= y0) & (xy[:, 1] <= y1)
+    segments = {etype: clip_segments(segs, bounds) for etype, segs in ctx["segments"].items()}
+
+    inch = ctx["tile_px"] / 100
+    fig = plt.figure(figsize=(inch, inch), dpi=100)
+    ax = fig.add_axes([0, 0, 1, 1])
+    # 낮은 zoom 에서는 node 가 edge 를 덮지 않도록 작게
+    node_size = min(4.0, 0.25 * 4 ** z)
+    n_edges = draw_graph(ax, xy[inside], segments, ctx["rasterize_above"], node_size=node_size)
+    ax.set_xlim(x0, x1)
+    ax.set_ylim(y0, y1)
+    ax.set_axis_off()
+
+    out_path = os.path.join(ctx["out_dir"], str(z), f"{tx}_{ty}.png")
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    fig.savefig(out_path, dpi=100)
+    plt.close(fig)
+    return z, n_edges, time.perf_counter() - t0
+
+
+def render_tiles(processed_root, graph, out_dir, zooms, tile_px=512, workers=None,
+                 rasterize_above=20_000):
+    """Render 2^z × 2^z tiles of the (square) graph extent for every zoom level z."""
+    xy = graph.positions[:, :2]
+    lo, hi = xy.min(axis=0), xy.max(axis=0)
+    size = float(max(hi - lo)) or 1.0
+    pad = 0.02 * size
+    extent = (float(lo[0]) - pad, float(lo[1]) - pad, size + 2 * pad)
+
+    tasks = [(z, tx, ty) for z in zooms for tx in range(2 ** z) for ty in range(2 ** z)]
+
+    t0 = time.perf_counter()
+    per_zoom = {z: [] for z in zooms}
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_tile_worker,
+        initargs=(processed_root, extent, tile_px, rasterize_above, out_dir),
+    ) as pool:
+        for z, _, seconds in pool.map(_render_tile, tasks):
+            per_zoom[z].append(seconds)
+
+    return {
+        "tiles": len(tasks),
+        "seconds": time.perf_counter() - t0,
+        "per_zoom": per_zoom,
+    }
 
-        i = id_to_index[src_id]
-        j = id_to_index[dst_id]
-
-        x1, y1 = xs[i], ys[i]
-        x2, y2 = xs[j], ys[j]
 
-        if etype == "sequence":
-            plt.plot([x1, x2], [y1, y2], color="blue", linewidth=0.6, alpha=0.5)
-        else:
-            # proximity 등 기타
-            plt.plot([x1, x2], [y1, y2], color="red", linewidth=0.4, alpha=0.4)
-
-    plt.title(f"Topological Graph – {graph['meta'].get('dataset_name', '')}")
-    plt.xlabel("X (meters)")
-    plt.ylabel("Y (meters)")
-    plt.axis("equal")
-    plt.grid(True, alpha=0.3)
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--format", type=str, default="png", choices=["png", "pdf", "svg"])
+    parser.add_argument("--rasterize_above", type=int, default=20_000,
+                        help="edge 수가 이 값을 넘으면 edge / node layer 를 rasterize")
+    parser.add_argument("--tiles", type=str, default=None,
+                        help="zoom level 목록 (예: 0,1,2) → viz/tiles/<z>/<x>_<y>.png")
+    parser.add_argument("--tile_px", type=int, default=512)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--no_full", action="store_true",
+                        help="전체 그래프 이미지는 건너뛰고 tile 만 렌더링")
+    args = parser.parse_args()
 
-    out_path = os.path.join(viz_dir, "graph_topological.png")
-    plt.savefig(out_path, dpi=300)
-    plt.close()
+    cfg = load_config()
+    processed_root = cfg["dataset"]["processed_root"]
+    viz_dir = os.path.join(processed_root, "viz")
+    ensure_dir(viz_dir)
 
-    print(f"[INFO] 그래프 시각화 저장 완료 → {out_path}")
+    graph = load_topological_graph(processed_root)
+
+    if not args.no_full:
+        out_path = os.path.join(viz_dir, f"graph_topological.{args.format}")
+        st = render_graph(graph, out_path, dpi=args.dpi, rasterize_above=args.rasterize_above)
+        print(f"[RENDER] {len(graph)} nodes, {st['edges']} edges "
+              f"({'rasterized' if st['rasterized'] else 'vector'}) — "
+              f"draw {st['draw_seconds']:.2f}s + save {st['save_seconds']:.2f}s = {st['seconds']:.2f}s")
+        print(f"[INFO] 그래프 시각화 저장 완료 → {out_path}")
+
+    if args.tiles:
+        zooms = [int(z) for z in args.tiles.split(",")]
+        tile_dir = os.path.join(viz_dir, "tiles")
+        st = render_tiles(processed_root, graph, tile_dir, zooms,
+                          tile_px=args.tile_px, workers=args.workers,
+                          rasterize_above=args.rasterize_above)
+        for z, secs in st["per_zoom"].items():
+            print(f"[TILES] z={z}: {len(secs)} tiles, mean {np.mean(secs):.2f}s / tile")
+        print(f"[RENDER] {st['tiles']} tiles in {st['seconds']:.2f}s → {tile_dir}")
 
 
 if __name__ == "__main__":
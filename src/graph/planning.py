@@ -0,0 +1,243 @@
+# src/graph/planning.py
+
+import math
+import heapq
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra as cs_dijkstra
+
+# ---------------------------------------------------------
+# Shortest paths on the topological graph (edge weight = euclidean length)
+#
+#   dijkstra : plain label-setting search, stops at the target
+#   astar    : + euclidean heuristic ||p_v - p_t|| (admissible: 직선거리 ≤ 경로 길이)
+#   alt      : + landmark heuristic max_l |d(l, t) - d(l, v)| (triangle inequality),
+#              combined with the euclidean bound
+#   plan_many: many (source, target) pairs, one C-level Dijkstra per distinct source
+#
+# landmark table 은 build 시점에 select_landmarks() 로 계산해 graph npz 에 저장.
+# ---------------------------------------------------------
+METHODS = ("dijkstra", "astar", "alt")
+
+
+def _sparse(graph, etype=None):
+    offsets, indices, weights = graph.csr(etype)
+    n = len(graph)
+    return csr_matrix((weights, indices, offsets), shape=(n, n))
+
+
+def select_landmarks(graph, num_landmarks=16, etype=None, seed=0):
+    """
+    Farthest-point landmark selection.
+
+    Every landmark is the node farthest (in graph distance) from the ones
+    already chosen; unreachable nodes are picked first so that every
+    connected component gets a landmark.
+
+    returns: landmarks (L,) int64, landmark_dist (N, L) float64 (inf = unreachable)
+    """
+    n = len(graph)
+    num_landmarks = min(num_landmarks, n)
+    if num_landmarks == 0:
+        return np.empty(0, dtype=np.int64), np.empty((n, 0), dtype=np.float64)
+
+    adj = _sparse(graph, etype)
+    rng = np.random.default_rng(seed)
+
+    landmarks = [int(rng.integers(n))]
+    tables = []
+    nearest = np.full(n, np.inf)
+    for _ in range(num_landmarks):
+        d = cs_dijkstra(adj, directed=False, indices=landmarks[-1])
+        # float64 그대로: float32 로 반올림하면 lower bound 가 실제 거리보다 커질 수 있음
+        tables.append(d)
+        nearest = np.minimum(nearest, d)
+        if len(landmarks) == num_landmarks:
+            break
+        # 도달 불가 (inf) 노드가 있으면 그 component 부터
+        nxt = int(np.argmax(nearest))
+        if nearest[nxt] == 0:
+            break
+        landmarks.append(nxt)
+
+    return np.array(landmarks, dtype=np.int64), np.stack(tables, axis=1)
+
+
+class PathPlanner:
+    """
+    Shortest-path queries over a TopologicalGraph (rows, not node_ids;
+    use graph.rows_of() to convert).
+
+    Single queries run a python heap search over adjacency lists built once;
+    plan_many() uses scipy's C Dijkstra for large batches.
+    """
+
+    def __init__(self, graph, etype=None):
+        self.graph = graph
+        self.etype = etype
+
+        offsets, indices, weights = graph.csr(etype)
+        self._offsets = offsets.tolist()
+        self._indices = indices.tolist()
+        self._weights = weights.tolist()
+        self._pos = graph.positions.tolist()
+
+        # landmark 거리는 node 별 contiguous (N, L)
+        self._lm = None
+        if graph.landmark_dist is not None and graph.landmark_dist.shape[1] > 0:
+            self._lm = np.ascontiguousarray(graph.landmark_dist, dtype=np.float64)
+
+        self.last_expanded = 0
+
+    # ---------------------------------------------------------
+    # heuristics (neighbor 묶음 단위로 한 번에 계산)
+    # ---------------------------------------------------------
+    def _heuristic(self, method, target):
+        if method == "dijkstra":
+            return None
+
+        if method == "astar":
+            pos_list = self._pos
+            pt_list = pos_list[target]
+            return lambda rows: [math.dist(pos_list[u], pt_list) for u in rows]
+
+        pos = self.graph.positions
+        pt = pos[target]
+
+        if self._lm is None:
+            raise ValueError("graph has no landmark table (run select_landmarks at build time)")
+        lm = self._lm
+        lt = lm[target]
+
+        def h(rows):
+            with np.errstate(invalid="ignore"):
+                diff = np.abs(lm[rows] - lt)
+            # 두 쪽 모두 landmark 에서 도달 불가 (inf - inf) → 정보 없음
+            diff[np.isnan(diff)] = 0.0
+            # 한쪽만 도달 불가 → 서로 다른 component → inf
+            return np.maximum(diff.max(axis=1), np.linalg.norm(pos[rows] - pt, axis=1)).tolist()
+        return h
+
+    # ---------------------------------------------------------
+    # single query
+    # ---------------------------------------------------------
+    def shortest_path(self, source, target, method="alt"):
+        """
+        returns: (distance, path rows) — (inf, []) if unreachable.
+        self.last_expanded holds the number of settled nodes.
+        """
+        if method not in METHODS:
+            raise ValueError(f"method must be one of {METHODS}")
+        if method == "alt" and self._lm is None:
+            method = "astar"
+
+        source, target = int(source), int(target)
+        h = self._heuristic(method, target)
+
+        offsets, indices, weights = self._offsets, self._indices, self._weights
+        dist = {source: 0.0}
+        parent = {source: -1}
+        closed = set()
+        heap = [(h([source])[0] if h else 0.0, 0.0, source)]
+
+        while heap:
+            _, d, v = heapq.heappop(heap)
+            if v in closed:
+                continue
+            closed.add(v)
+            if v == target:
+                break
+
+            # 개선되는 neighbor 만 모은 뒤 heuristic 을 한 번에
+            improved = []
+            for e in range(offsets[v], offsets[v + 1]):
+                u = indices[e]
+                if u in closed:
+                    continue
+                nd = d + weights[e]
+                if nd < dist.get(u, math.inf):
+                    dist[u] = nd
+                    parent[u] = v
+                    improved.append((u, nd))
+
+            if not improved:
+                continue
+            if h is None:
+                for u, nd in improved:
+                    heapq.heappush(heap, (nd, nd, u))
+                continue
+
+            hs = h([u for u, _ in improved])
+            for (u, nd), hu in zip(improved, hs):
+                if hu < math.inf:
+                    heapq.heappush(heap, (nd + hu, nd, u))
+
+        self.last_expanded = len(closed)
+        if target not in closed:
+            return math.inf, []
+
+        path = [target]
+        while parent[path[-1]] != -1:
+            path.append(parent[path[-1]])
+        return dist[target], path[::-1]
+
+    # ---------------------------------------------------------
+    # batch
+    # ---------------------------------------------------------
+    def plan_many(self, sources, targets, return_paths=False, method=None, chunk=64):
+        """
+        Many (source, target) row pairs.
+
+        method=None : distinct sources are solved together with scipy's C
+                      Dijkstra (`chunk` sources per call → (chunk, N) block
+                      in memory); best when sources repeat or N is moderate
+        method=...  : one shortest_path() per pair ("dijkstra" / "astar" / "alt")
+
+        returns: distances (Q,) float64 [, list of path row arrays]
+        """
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        if sources.shape != targets.shape:
+            raise ValueError("sources and targets must have the same length")
+
+        if method is not None:
+            dists = np.empty(len(sources))
+            paths = []
+            for q, (s, t) in enumerate(zip(sources.tolist(), targets.tolist())):
+                dists[q], path = self.shortest_path(s, t, method)
+                paths.append(np.array(path, dtype=np.int64))
+            return (dists, paths) if return_paths else dists
+
+        adj = _sparse(self.graph, self.etype)
+        uniq, inv = np.unique(sources, return_inverse=True)
+
+        dists = np.full(len(sources), np.inf)
+        paths = [None] * len(sources) if return_paths else None
+
+        for lo in range(0, len(uniq), chunk):
+            block = uniq[lo:lo + chunk]
+            res = cs_dijkstra(adj, directed=False, indices=block,
+                              return_predecessors=return_paths)
+            d, pred = res if return_paths else (res, None)
+
+            q = np.flatnonzero((inv >= lo) & (inv < lo + len(block)))
+            b = inv[q] - lo
+            dists[q] = d[b, targets[q]]
+
+            if return_paths:
+                for qi, bi in zip(q.tolist(), b.tolist()):
+                    paths[qi] = _trace(pred[bi], int(sources[qi]), int(targets[qi]))
+
+        return (dists, paths) if return_paths else dists
+
+
+def _trace(pred, source, target):
+    if source == target:
+        return np.array([source], dtype=np.int64)
+    if pred[target] < 0:
+        return np.empty(0, dtype=np.int64)
+    path = [target]
+    while path[-1] != source:
+        path.append(int(pred[path[-1]]))
+    return np.array(path[::-1], dtype=np.int64)
@@ -0,0 +1,399 @@
+# src/graph/store.py
+
+import os
+import json
+import sqlite3
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from src.graph.topology import TopologicalGraph
+from src.utils.spatial_index import cap_neighbors, radius_pairs
+
+# ---------------------------------------------------------
+# Persistent, append-only topological graph (SQLite)
+#
+#   nodes : seq (insertion order), node_id, timestamp, x, y, z,
+#           grid cell (cx, cy, cz) = floor(position / alpha), node JSON
+#   edges : src, dst, type
+#   meta  : alpha, k_nearest
+#
+# (cx, cy, cz) index 가 spatial index 역할을 한다 → 새 node 의 proximity
+# 후보는 주변 27 개 cell 만 조회하므로 append 비용은 batch 크기에 비례.
+# k_nearest 가 있으면 새 node 근처 기존 node 의 k-NN 도 바뀔 수 있으므로
+# 그 node 들의 proximity edge 를 다시 계산한다 (5×5×5 cell 범위).
+# ---------------------------------------------------------
+
+
+def check_graph_meta(meta, alpha, k_nearest):
+    """Raise ValueError if a graph built with `meta` can't be continued with (alpha, k_nearest)."""
+    meta = meta or {}
+    if meta.get("alpha") is not None and float(meta["alpha"]) != float(alpha):
+        raise ValueError(f"graph was built with alpha={meta['alpha']}, store uses alpha={alpha}")
+    if "k_nearest" in meta and meta["k_nearest"] != k_nearest:
+        raise ValueError(f"graph was built with k_nearest={meta['k_nearest']}, store uses k_nearest={k_nearest}")
+    if meta.get("time_window") is not None:
+        raise ValueError(f"graph was built with time_window={meta['time_window']}; append does not support it")
+
+
+class GraphStore:
+    """
+    Append-only topological graph backed by SQLite with a uniform-grid
+    spatial index (cell size = alpha).
+
+    append(nodes) adds, in one transaction:
+        - sequence edges: last stored node → first new node → ... → last new node
+        - proximity edges: every pair (new, old) or (new, new) with d < alpha,
+          optionally capped with k_nearest exactly like build_edges (a pair
+          survives if it is among the k nearest of either endpoint); old
+          nodes within alpha of the batch get their proximity edges
+          re-capped, so edges may also be removed
+
+    The stored graph can be exported to the usual topological_graph.json /
+    .npz with to_graph() (full read, on demand only).
+    """
+
+    def __init__(self, path, alpha=None, k_nearest=None):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS nodes (
+                seq       INTEGER PRIMARY KEY AUTOINCREMENT,
+                node_id   INTEGER NOT NULL UNIQUE,
+                timestamp INTEGER,
+                x REAL NOT NULL, y REAL NOT NULL, z REAL NOT NULL,
+                cx INTEGER NOT NULL, cy INTEGER NOT NULL, cz INTEGER NOT NULL,
+                data      TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_nodes_cell ON nodes (cx, cy, cz);
+            CREATE TABLE IF NOT EXISTS edges (
+                src  INTEGER NOT NULL,
+                dst  INTEGER NOT NULL,
+                type TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_edges_src ON edges (src);
+            CREATE INDEX IF NOT EXISTS idx_edges_dst ON edges (dst);
+            CREATE TABLE IF NOT EXISTS meta (
+                key   TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            """
+        )
+
+        stored = self._get_meta()
+        if "alpha" in stored:
+            if alpha is not None and float(alpha) != stored["alpha"]:
+                raise ValueError(
+                    f"graph store was created with alpha={stored['alpha']} (got {alpha}); "
+                    f"the grid index depends on it"
+                )
+            if k_nearest is not None and k_nearest != stored.get("k_nearest"):
+                raise ValueError(
+                    f"graph store was created with k_nearest={stored.get('k_nearest')} "
+                    f"(got {k_nearest}); existing edges were capped with it"
+                )
+            self.alpha = stored["alpha"]
+            self.k_nearest = stored.get("k_nearest")
+        else:
+            if alpha is None:
+                raise ValueError("alpha is required when creating a new graph store")
+            self.alpha = float(alpha)
+            self.k_nearest = k_nearest
+            self._set_meta(alpha=self.alpha, k_nearest=self.k_nearest)
+            self._conn.commit()
+
+    # ---------------------------------------------------------
+    # meta
+    # ---------------------------------------------------------
+    def _get_meta(self):
+        rows = self._conn.execute("SELECT key, value FROM meta").fetchall()
+        return {k: json.loads(v) for k, v in rows}
+
+    def _set_meta(self, **values):
+        self._conn.executemany(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            [(k, json.dumps(v)) for k, v in values.items()],
+        )
+
+    # ---------------------------------------------------------
+    # sizes
+    # ---------------------------------------------------------
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM nodes").fetchone()[0]
+
+    def num_edges(self):
+        return self._conn.execute("SELECT COUNT(*) FROM edges").fetchone()[0]
+
+    def max_node_id(self):
+        row = self._conn.execute("SELECT MAX(node_id) FROM nodes").fetchone()
+        return row[0] if row[0] is not None else -1
+
+    def _last_node(self):
+        return self._conn.execute(
+            "SELECT node_id FROM nodes ORDER BY seq DESC LIMIT 1"
+        ).fetchone()
+
+    # ---------------------------------------------------------
+    # spatial query
+    # ---------------------------------------------------------
+    def _cells(self, positions):
+        return np.floor(positions / self.alpha).astype(np.int64)
+
+    def _nodes_near(self, cells):
+        """Stored nodes in the 3×3×3 neighborhood of the given cells → (node_ids, positions, seqs)."""
+        offsets = np.stack(np.meshgrid([-1, 0, 1], [-1, 0, 1], [-1, 0, 1], indexing="ij"), -1)
+        query = np.unique((cells[:, None, :] + offsets.reshape(1, 27, 3)).reshape(-1, 3), axis=0)
+
+        self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS query_cells (cx INTEGER, cy INTEGER, cz INTEGER)")
+        self._conn.execute("DELETE FROM query_cells")
+        self._conn.executemany("INSERT INTO query_cells VALUES (?, ?, ?)", query.tolist())
+        rows = self._conn.execute(
+            """
+            SELECT n.node_id, n.x, n.y, n.z, n.seq
+            FROM query_cells q
+            JOIN nodes n ON n.cx = q.cx AND n.cy = q.cy AND n.cz = q.cz
+            """
+        ).fetchall()
+
+        if not rows:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, np.empty((0, 3)), empty
+        ids = np.array([r[0] for r in rows], dtype=np.int64)
+        pos = np.array([r[1:4] for r in rows], dtype=np.float64)
+        seqs = np.array([r[4] for r in rows], dtype=np.int64)
+        return ids, pos, seqs
+
+    def _insert_nodes(self, nodes, positions, cells):
+        self._conn.executemany(
+            "INSERT INTO nodes (node_id, timestamp, x, y, z, cx, cy, cz, data) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    int(n["node_id"]), n.get("timestamp"),
+                    *p.tolist(), *c.tolist(),
+                    json.dumps(n, ensure_ascii=False),
+                )
+                for n, p, c in zip(nodes, positions, cells)
+            ],
+        )
+
+    # ---------------------------------------------------------
+    # append
+    # ---------------------------------------------------------
+    def append(self, nodes):
+        """
+        Insert new viewpoint nodes (nodes_raw.json schema: node_id, timestamp,
+        position, ...). Nodes whose node_id is already stored are skipped.
+
+        returns: {"nodes": added, "skipped": n, "sequence": n, "proximity": n,
+                  "proximity_removed": n}
+        """
+        if not nodes:
+            return {"nodes": 0, "skipped": 0, "sequence": 0, "proximity": 0, "proximity_removed": 0}
+
+        ids = [int(n["node_id"]) for n in nodes]
+        existing = set()
+        for lo in range(0, len(ids), 900):
+            chunk = ids[lo:lo + 900]
+            existing.update(r[0] for r in self._conn.execute(
+                f"SELECT node_id FROM nodes WHERE node_id IN ({','.join('?' * len(chunk))})", chunk
+            ))
+
+        seen = set()
+        new = []
+        for n in nodes:
+            nid = int(n["node_id"])
+            if nid in existing or nid in seen:
+                continue
+            seen.add(nid)
+            new.append(n)
+        skipped = len(nodes) - len(new)
+        if not new:
+            return {"nodes": 0, "skipped": skipped, "sequence": 0, "proximity": 0, "proximity_removed": 0}
+
+        new.sort(key=lambda n: (n.get("timestamp") or 0, n["node_id"]))
+        new_ids = np.array([int(n["node_id"]) for n in new], dtype=np.int64)
+        new_pos = np.array([n["position"][:3] for n in new], dtype=np.float64)
+        cells = self._cells(new_pos)
+
+        # sequence edges (이전 마지막 node 에서 이어짐)
+        last = self._last_node()
+        chain = ([last[0]] if last else []) + new_ids.tolist()
+        sequence = list(zip(chain[:-1], chain[1:]))
+
+        if self.k_nearest is not None:
+            with self._conn:
+                self._insert_nodes(new, new_pos, cells)
+                self._conn.executemany(
+                    "INSERT INTO edges (src, dst, type) VALUES (?, ?, 'sequence')", sequence
+                )
+                added, removed = self._recap_proximity(new_ids, cells)
+            return {
+                "nodes": len(new),
+                "skipped": skipped,
+                "sequence": len(sequence),
+                "proximity": added,
+                "proximity_removed": removed,
+            }
+
+        # proximity 후보: 주변 cell 의 기존 node + 이번 batch
+        old_ids, old_pos, _ = self._nodes_near(cells)
+        m = len(new_ids)
+        all_ids = np.concatenate([new_ids, old_ids])
+        all_pos = np.concatenate([new_pos, old_pos])
+
+        # (새 node) × (새 + 주변 node) 만 검사 → 기존 node 끼리는 다시 보지 않음
+        pairs = cKDTree(new_pos).sparse_distance_matrix(
+            cKDTree(all_pos), self.alpha, output_type="ndarray"
+        )
+        i, j, dist = pairs["i"].astype(np.int64), pairs["j"].astype(np.int64), pairs["v"]
+        keep = (dist < self.alpha) & ((j >= m) | (i < j))  # 새 node 끼리는 i < j 한 번만
+        order = np.lexsort((j[keep], i[keep]))
+        i, j = i[keep][order], j[keep][order]
+
+        # edge 방향은 build_edges 와 같게 (먼저 들어온 node → 나중 node)
+        src = np.where(j >= m, all_ids[j], all_ids[i])
+        dst = np.where(j >= m, all_ids[i], all_ids[j])
+        proximity = list(zip(src.tolist(), dst.tolist()))
+
+        with self._conn:
+            self._insert_nodes(new, new_pos, cells)
+            self._conn.executemany(
+                "INSERT INTO edges (src, dst, type) VALUES (?, ?, 'sequence')", sequence
+            )
+            self._conn.executemany(
+                "INSERT INTO edges (src, dst, type) VALUES (?, ?, 'proximity')", proximity
+            )
+
+        return {
+            "nodes": len(new),
+            "skipped": skipped,
+            "sequence": len(sequence),
+            "proximity": len(proximity),
+            "proximity_removed": 0,
+        }
+
+    def _recap_proximity(self, new_ids, new_cells):
+        """
+        k_nearest cap with build_edges semantics after inserting new nodes
+        (called inside the append transaction, new nodes already stored).
+
+        touched = new nodes + old nodes within alpha of them (their k-NN may
+        change). Every pair with an endpoint in `touched` is decided again
+        from the full neighborhoods of both endpoints; all other pairs keep
+        their status. returns: (edges inserted, edges deleted)
+        """
+        # 1. touched: 새 node 와 alpha 이내인 기존 node
+        ids, pos, _ = self._nodes_near(new_cells)
+        is_new = np.isin(ids, new_ids)
+        old_ids, old_pos = ids[~is_new], pos[~is_new]
+        pairs = cKDTree(old_pos).sparse_distance_matrix(
+            cKDTree(pos[is_new]), self.alpha, output_type="ndarray"
+        )
+        hit = np.unique(pairs["i"][pairs["v"] < self.alpha]).astype(np.int64)
+        touched = np.concatenate([new_ids, old_ids[hit]])
+        touched_cells = np.concatenate([new_cells, self._cells(old_pos[hit])])
+
+        # 2. touched 의 partner 들까지의 전체 이웃 (partner 의 k-NN 순위도 필요)
+        _, partner_pos, _ = self._nodes_near(touched_cells)
+        ids, pos, seqs = self._nodes_near(np.unique(self._cells(partner_pos), axis=0))
+
+        # 3. build_edges 와 같은 순서 (insertion seq) 로 pair 를 만들고 cap
+        order = np.argsort(seqs)
+        ids, pos = ids[order], pos[order]
+        i, j, dist = radius_pairs(pos, self.alpha)
+        keep = dist < self.alpha
+        i, j, dist = i[keep], j[keep], dist[keep]
+        keep = cap_neighbors(i, j, dist, self.k_nearest)
+        in_touched = np.isin(ids, touched)
+        keep &= in_touched[i] | in_touched[j]
+        proximity = list(zip(ids[i[keep]].tolist(), ids[j[keep]].tolist()))
+
+        # 4. touched 의 기존 proximity edge 와 비교 → 바뀐 것만 삭제 / 추가
+        self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS touched_nodes (node_id INTEGER PRIMARY KEY)")
+        self._conn.execute("DELETE FROM touched_nodes")
+        self._conn.executemany(
+            "INSERT INTO touched_nodes VALUES (?)", [(int(x),) for x in touched.tolist()]
+        )
+        current = set(self._conn.execute(
+            """
+            SELECT src, dst FROM edges WHERE type = 'proximity' AND (
+                src IN (SELECT node_id FROM touched_nodes)
+                OR dst IN (SELECT node_id FROM touched_nodes)
+            )
+            """
+        ).fetchall())
+        wanted = set(proximity)
+        removed = current - wanted
+        self._conn.executemany(
+            "DELETE FROM edges WHERE src = ? AND dst = ? AND type = 'proximity'", sorted(removed)
+        )
+        self._conn.executemany(
+            "INSERT INTO edges (src, dst, type) VALUES (?, ?, 'proximity')",
+            [pair for pair in proximity if pair not in current],
+        )
+        return len(wanted - current), len(removed)
+
+    def import_graph(self, graph):
+        """
+        Seed an empty store with an existing topological_graph.json dict
+        (nodes and edges are copied as-is, not recomputed).
+
+        The graph must have been built with the store's alpha / k_nearest
+        (and no time_window), otherwise appended edges would follow
+        different rules than the imported ones → ValueError.
+        """
+        if len(self):
+            raise ValueError(f"graph store is not empty: {self.path}")
+
+        check_graph_meta(graph.get("meta"), self.alpha, self.k_nearest)
+
+        nodes = graph["nodes"]
+        pos = np.array([n["position"][:3] for n in nodes], dtype=np.float64).reshape(-1, 3)
+        cells = self._cells(pos)
+        with self._conn:
+            self._insert_nodes(nodes, pos, cells)
+            self._conn.executemany(
+                "INSERT INTO edges (src, dst, type) VALUES (?, ?, ?)",
+                [(e["src"], e["dst"], e.get("type", "sequence")) for e in graph["edges"]],
+            )
+        return {"nodes": len(nodes), "edges": len(graph["edges"])}
+
+    # ---------------------------------------------------------
+    # export
+    # ---------------------------------------------------------
+    def nodes(self):
+        return [json.loads(r[0]) for r in self._conn.execute("SELECT data FROM nodes ORDER BY seq")]
+
+    def edges(self):
+        return [
+            {"src": s, "dst": d, "type": t}
+            for s, d, t in self._conn.execute("SELECT src, dst, type FROM edges ORDER BY rowid")
+        ]
+
+    def to_graph_dict(self, dataset_name=None):
+        """Same layout as build_graph's topological_graph.json."""
+        nodes = self.nodes()
+        edges = self.edges()
+        return {
+            "nodes": nodes,
+            "edges": edges,
+            "meta": {
+                "dataset_name": dataset_name,
+                "alpha": self.alpha,
+                "time_window": None,
+                "k_nearest": self.k_nearest,
+                "num_nodes": len(nodes),
+                "num_edges": len(edges),
+            },
+        }
+
+    def to_graph(self, dataset_name=None):
+        return TopologicalGraph.from_json(self.to_graph_dict(dataset_name))
+
+    def close(self):
+        self._conn.close()
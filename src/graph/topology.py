@@ -0,0 +1,299 @@
+# src/graph/topology.py
+
+import os
+import json
+from functools import cached_property
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+
+# ---------------------------------------------------------
+# Topological graph as CSR arrays (undirected, one CSR per edge type)
+#
+#   node_ids        (N,)   int64
+#   positions       (N, 3) float64
+#   <type>_offsets  (N+1,) int64    neighbors of row r:
+#   <type>_indices  (2E,)  int64      indices[offsets[r]:offsets[r+1]]
+#   <type>_weights  (2E,)  float64    euclidean distance of the edge
+#                                     (float64: A* / ALT heuristic 과 같은 정밀도)
+#   landmarks       (L,)   int64      (optional) ALT landmark rows
+#   landmark_dist   (N, L) float64    (optional) shortest-path distance node → landmark
+#
+# 모든 edge 는 양방향으로 저장한다 (src → dst, dst → src).
+# ---------------------------------------------------------
+GRAPH_FORMAT = "topological-graph"
+GRAPH_FORMAT_VERSION = 1
+
+
+def _build_csr(n, src, dst, weights):
+    """Undirected (src, dst) rows → (offsets, indices, weights) sorted by row, then neighbor."""
+    rows = np.concatenate([src, dst])
+    cols = np.concatenate([dst, src])
+    w = np.concatenate([weights, weights])
+
+    order = np.lexsort((cols, rows))
+    rows, cols, w = rows[order], cols[order], w[order]
+
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n), out=offsets[1:])
+    return offsets, cols.astype(np.int64), w.astype(np.float64)
+
+
+def _gather(offsets, indices, rows):
+    """Concatenated neighbor lists of `rows` (one vectorized gather, no python loop)."""
+    starts = offsets[rows]
+    lengths = offsets[rows + 1] - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=indices.dtype)
+    # 각 구간의 시작 위치로 점프하는 arange
+    shift = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return indices[np.arange(total) + shift]
+
+
+class TopologicalGraph:
+    """
+    Viewpoint graph with one CSR adjacency per edge type ("sequence", "proximity", ...).
+
+    Rows are positions in `node_ids`; use `rows_of(ids)` to map node_ids.
+    Queries take an `etype` (a single type, a list of types, or None for all).
+    """
+
+    def __init__(self, node_ids, positions, adjacency, meta=None,
+                 landmarks=None, landmark_dist=None):
+        self.node_ids = np.asarray(node_ids, dtype=np.int64)
+        self.positions = np.asarray(positions, dtype=np.float64)
+        self.adjacency = adjacency  # etype → (offsets, indices, weights)
+        self.meta = meta or {}
+
+        # path planning 용 landmark table (src/graph/planning.py 에서 계산)
+        self.landmarks = landmarks
+        self.landmark_dist = landmark_dist
+
+    # ---------------------------------------------------------
+    # construction / persistence
+    # ---------------------------------------------------------
+    @classmethod
+    def from_edges(cls, node_ids, positions, src, dst, types, meta=None):
+        """
+        node_ids / positions : per node
+        src, dst             : node_ids of the edge endpoints
+        types                : edge type string per edge
+        """
+        node_ids = np.asarray(node_ids, dtype=np.int64)
+        positions = np.asarray(positions, dtype=np.float64)[:, :3]
+        graph = cls(node_ids, positions, {}, meta)
+
+        src_rows = graph.rows_of(src)
+        dst_rows = graph.rows_of(dst)
+        types = np.asarray(types, dtype=str)
+
+        valid = (src_rows >= 0) & (dst_rows >= 0)
+        if not valid.all():
+            print(f"[WARN] {int((~valid).sum())} edges reference unknown node_ids → skipped")
+
+        n = len(node_ids)
+        for etype in np.unique(types[valid]):
+            m = valid & (types == etype)
+            s, d = src_rows[m], dst_rows[m]
+            w = np.linalg.norm(positions[s] - positions[d], axis=1)
+            graph.adjacency[str(etype)] = _build_csr(n, s, d, w)
+        return graph
+
+    @classmethod
+    def from_json(cls, graph):
+        """From the topological_graph.json dict ({"nodes", "edges", "meta"})."""
+        nodes = graph["nodes"]
+        edges = graph["edges"]
+        return cls.from_edges(
+            [n["node_id"] for n in nodes],
+            np.array([n["position"][:3] for n in nodes], dtype=np.float64).reshape(-1, 3),
+            np.array([e["src"] for e in edges], dtype=np.int64),
+            np.array([e["dst"] for e in edges], dtype=np.int64),
+            [e.get("type", "sequence") for e in edges],
+            meta=graph.get("meta"),
+        )
+
+    def save(self, path):
+        arrays = {"node_ids": self.node_ids, "positions": self.positions}
+        for etype, (offsets, indices, weights) in self.adjacency.items():
+            arrays[f"{etype}_offsets"] = offsets
+            arrays[f"{etype}_indices"] = indices
+            arrays[f"{etype}_weights"] = weights
+        if self.landmarks is not None:
+            arrays["landmarks"] = self.landmarks
+            arrays["landmark_dist"] = self.landmark_dist
+
+        header = {
+            "format": GRAPH_FORMAT,
+            "version": GRAPH_FORMAT_VERSION,
+            "edge_types": list(self.adjacency),
+            "meta": self.meta,
+        }
+        np.savez(path, header=np.array(json.dumps(header, ensure_ascii=False)), **arrays)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            header = json.loads(str(data["header"]))
+            if header.get("format") != GRAPH_FORMAT:
+                raise ValueError(f"not a topological graph file: {path}")
+            if header.get("version", 0) > GRAPH_FORMAT_VERSION:
+                raise ValueError(
+                    f"graph format version {header['version']} is newer "
+                    f"than supported version {GRAPH_FORMAT_VERSION}"
+                )
+            positions = data["positions"]
+            adjacency = {}
+            for etype in header["edge_types"]:
+                offsets = data[f"{etype}_offsets"]
+                indices = data[f"{etype}_indices"]
+                weights = data[f"{etype}_weights"]
+                if weights.dtype != np.float64:
+                    # 예전 float32 파일: position 에서 다시 계산 (반올림된 weight 는 heuristic 보다 작을 수 있음)
+                    rows = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+                    weights = np.linalg.norm(positions[rows] - positions[indices], axis=1)
+                adjacency[etype] = (offsets, indices, weights)
+            landmarks = data["landmarks"] if "landmarks" in data else None
+            landmark_dist = data["landmark_dist"] if "landmark_dist" in data else None
+            return cls(
+                data["node_ids"], positions, adjacency, header.get("meta"),
+                landmarks=landmarks, landmark_dist=landmark_dist,
+            )
+
+    # ---------------------------------------------------------
+    # ids / sizes
+    # ---------------------------------------------------------
+    def __len__(self):
+        return len(self.node_ids)
+
+    @property
+    def edge_types(self):
+        return list(self.adjacency)
+
+    def num_edges(self, etype=None):
+        """Undirected edge count."""
+        return sum(len(self.adjacency[t][1]) for t in self._types(etype)) // 2
+
+    @cached_property
+    def _id_order(self):
+        return np.argsort(self.node_ids, kind="stable")
+
+    def rows_of(self, ids):
+        """node_ids → rows (-1 where the id is unknown)."""
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(self.node_ids) == 0:
+            return np.full(ids.shape, -1, dtype=np.int64)
+        sorted_ids = self.node_ids[self._id_order]
+        pos = np.minimum(np.searchsorted(sorted_ids, ids), len(sorted_ids) - 1)
+        found = sorted_ids[pos] == ids
+        return np.where(found, self._id_order[pos], -1)
+
+    def _types(self, etype):
+        if etype is None:
+            return list(self.adjacency)
+        types = [etype] if isinstance(etype, str) else list(etype)
+        for t in types:
+            if t not in self.adjacency:
+                raise KeyError(f"unknown edge type {t!r} (have {list(self.adjacency)})")
+        return types
+
+    def csr(self, etype=None):
+        """(offsets, indices, weights) for one type, or a merged CSR for several (cached)."""
+        types = self._types(etype)
+        if len(types) == 1:
+            return self.adjacency[types[0]]
+
+        key = tuple(sorted(types))
+        cache = self.__dict__.setdefault("_merged", {})
+        if key not in cache:
+            n = len(self)
+            src, dst, w = [], [], []
+            for t in key:
+                offsets, indices, weights = self.adjacency[t]
+                rows = np.repeat(np.arange(n), np.diff(offsets))
+                half = rows < indices  # 한 방향만 → _build_csr 가 다시 양방향으로
+                src.append(rows[half])
+                dst.append(indices[half])
+                w.append(weights[half])
+            cache[key] = _build_csr(
+                n,
+                np.concatenate(src) if src else np.empty(0, dtype=np.int64),
+                np.concatenate(dst) if dst else np.empty(0, dtype=np.int64),
+                np.concatenate(w) if w else np.empty(0, dtype=np.float64),
+            )
+        return cache[key]
+
+    # ---------------------------------------------------------
+    # queries
+    # ---------------------------------------------------------
+    def neighbors(self, row, etype=None, return_weights=False):
+        """
+        Neighbor rows of one row (a view into the CSR arrays).
+        With several types, a neighbor connected by two types appears twice.
+        """
+        offsets, indices, weights = self.csr(etype)
+        lo, hi = offsets[row], offsets[row + 1]
+        if return_weights:
+            return indices[lo:hi], weights[lo:hi]
+        return indices[lo:hi]
+
+    def degree(self, etype=None):
+        """(N,) degree of every row."""
+        deg = np.zeros(len(self), dtype=np.int64)
+        for t in self._types(etype):
+            deg += np.diff(self.adjacency[t][0])
+        return deg
+
+    def k_hop(self, rows, k, etype=None):
+        """
+        Rows reachable from `rows` in at most k hops (sorted, includes the seeds).
+        Breadth-first over whole frontiers, one gather per hop.
+        """
+        offsets, indices, _ = self.csr(etype)
+        seen = np.zeros(len(self), dtype=bool)
+        frontier = np.unique(np.atleast_1d(np.asarray(rows, dtype=np.int64)))
+        seen[frontier] = True
+
+        for _ in range(k):
+            if len(frontier) == 0:
+                break
+            nxt = _gather(offsets, indices, frontier)
+            nxt = np.unique(nxt[~seen[nxt]])
+            seen[nxt] = True
+            frontier = nxt
+
+        return np.flatnonzero(seen)
+
+    def components(self, etype=None):
+        """
+        Connected components.
+        returns: (n_components, labels (N,) int32)
+        """
+        offsets, indices, _ = self.csr(etype)
+        n = len(self)
+        adj = csr_matrix((np.ones(len(indices), dtype=np.int8), indices, offsets), shape=(n, n))
+        return connected_components(adj, directed=False)
+
+    def edge_pairs(self, etype):
+        """Undirected edges of one type as (src_rows, dst_rows) with src < dst."""
+        offsets, indices, _ = self.adjacency[etype]
+        rows = np.repeat(np.arange(len(self)), np.diff(offsets))
+        half = rows < indices
+        return rows[half], indices[half]
+
+
+def load_topological_graph(processed_root):
+    """topological_graph.npz if present, otherwise built from topological_graph.json."""
+    npz_path = os.path.join(processed_root, "topological_graph.npz")
+    if os.path.exists(npz_path):
+        return TopologicalGraph.load(npz_path)
+
+    json_path = os.path.join(processed_root, "topological_graph.json")
+    if not os.path.exists(json_path):
+        raise FileNotFoundError(f"topological_graph.npz / .json 이 없습니다: {processed_root}")
+    print(f"[WARN] {npz_path} 없음 → topological_graph.json 에서 CSR 생성")
+    with open(json_path, "r") as f:
+        return TopologicalGraph.from_json(json.load(f))
@@ -1,14 +1,17 @@
 # src/memory/builder.py
 
 import numpy as np
-from src.memory.node import Node
-from src.memory.summarizer import summarize_cluster
+from scipy import sparse
+from src.memory.node import NodeStore
+from src.memory.summarizer import summarize_clusters
 from src.memory.similarity import (
     compute_spatial_similarity,
     compute_semantic_similarity,
     compute_hybrid_similarity,
+    compute_hybrid_similarity_fused,
+    spatial_cutoff_for_threshold,
 )
-from src.memory.clustering import complete_linkage_clustering
+from src.memory.clustering import AgglomerationEngine, complete_linkage_clustering
 
 
 def build_semantic_forest(
@@ -20,9 +23,16 @@ def build_semantic_forest(
     theta_spatial=10.0,
     alpha=0.3,
     cluster_threshold=0.4,
+    spatial_cutoff=None,
+    return_store=False,
+    summary_workers=8,
+    summary_retries=3,
+    summary_client=None,
+    summary_cache=None,
+    summary_batch=None,
 ):
     """
-    Build a hierarchical semantic forest structure using Node class.
+    Build a hierarchical semantic forest structure using NodeStore.
 
     Inputs:
         positions   : (N, 3) or (N, 2) numpy array
@@ -30,6 +40,17 @@ def build_semantic_forest(
         captions    : list[str], length N
         images      : list[str], length N (각 노드 이미지 경로)
         quaternions : (N, 4) numpy array, [x,y,z,w] (카메라 pose)
+        spatial_cutoff : None → dense N×N similarities (기존 동작)
+                         float → radius (m) 안의 쌍만 sparse CSR 로 계산
+                         "auto" → cluster_threshold 와 동일한 클러스터를
+                                  보장하는 최소 radius 사용
+        return_store : True 이면 (NodeStore, root_id) 반환 (binary 저장용)
+        summary_workers : 동시에 보내는 summary 요청 수 상한
+        summary_retries : 요청 실패 시 재시도 횟수 (지수 backoff)
+        summary_client  : chat.completions 호환 client (None → OpenAI(),
+                          테스트에는 src.utils.fake_openai.FakeOpenAI)
+        summary_cache   : SummaryCache (선택) — 바뀌지 않은 cluster 는 LLM 호출 생략
+        summary_batch   : BatchRunner (선택) — wave 마다 하나의 batch job 으로 제출
 
     Returns:
         forest_dict: { "root": node_id, "nodes": {node_id: {...}, ...} }
@@ -39,24 +60,25 @@ def build_semantic_forest(
     assert len(images) == N
     assert len(quaternions) == N
 
-    nodes = {}
+    # leaf N 개 + area 최대 N + (N - 1) 개
+    nodes = NodeStore(
+        emb_dim=embeddings.shape[1],
+        pos_dim=positions.shape[1],
+        capacity=2 * N,
+    )
 
     # ---------------------------------------------------------
     # 1) Leaf Nodes 생성 (L0)  — pose + image 포함
     # ---------------------------------------------------------
     for i in range(N):
-        node_id = f"L0_{i}"
-
-        nodes[node_id] = Node(
-            node_id=node_id,
+        nodes.add(
+            node_id=f"L0_{i}",
             level=0,
             node_type="leaf",
-            children=[],
-            parent=None,
             summary=captions[i],              # 나중에 summary 대신 raw caption만 쓰고 싶으면 바꿔도 됨
-            embedding=embeddings[i].tolist(),
-            position=positions[i].tolist(),
-            quaternion=quaternions[i].tolist(),
+            embedding=embeddings[i],
+            position=positions[i],
+            quaternion=quaternions[i],
             image=images[i],
             raw_caption=captions[i],
         )
@@ -64,13 +86,43 @@ def build_semantic_forest(
     # ---------------------------------------------------------
     # 2) Spatial + Semantic + Hybrid similarity 계산
     # ---------------------------------------------------------
-    S_sp = compute_spatial_similarity(positions, theta=theta_spatial)
-    S_sem = compute_semantic_similarity(embeddings)
-    S_hybrid = compute_hybrid_similarity(S_sp, S_sem, alpha=alpha)
+    if spatial_cutoff == "auto":
+        spatial_cutoff = spatial_cutoff_for_threshold(
+            theta_spatial, alpha, cluster_threshold
+        )
+        if spatial_cutoff is None:
+            print("[WARN] cluster_threshold <= alpha → sparse cutoff 불가, dense 로 계산")
+        else:
+            print(f"[SIM] sparse spatial cutoff = {spatial_cutoff:.3f}")
+    elif spatial_cutoff is not None:
+        safe = spatial_cutoff_for_threshold(theta_spatial, alpha, cluster_threshold)
+        if safe is None or spatial_cutoff < safe:
+            print("[WARN] spatial_cutoff 가 작아 dense 결과와 클러스터가 달라질 수 있음")
 
-    print("S_spatial stats:", np.min(S_sp), np.max(S_sp), np.mean(S_sp))
-    print("S_semantic stats:", np.min(S_sem), np.max(S_sem), np.mean(S_sem))
-    print("S_hybrid stats:", np.min(S_hybrid), np.max(S_hybrid), np.mean(S_hybrid))
+    if spatial_cutoff is not None:
+        S_sp = compute_spatial_similarity(
+            positions, theta=theta_spatial, cutoff=spatial_cutoff
+        )
+        S_sem = compute_semantic_similarity(embeddings, pattern=S_sp)
+        S_hybrid = compute_hybrid_similarity(S_sp, S_sem, alpha=alpha)
+
+        _print_stats("S_spatial", S_sp)
+        _print_stats("S_semantic", S_sem)
+        _print_stats("S_hybrid", S_hybrid)
+        del S_sp, S_sem
+    else:
+        # fused: spatial/semantic 행렬을 만들지 않고 hybrid 만 타일 단위로 계산,
+        # threshold 미만 항목은 병합될 수 없으므로 버림
+        S_hybrid, stats = compute_hybrid_similarity_fused(
+            positions,
+            embeddings,
+            theta=theta_spatial,
+            alpha=alpha,
+            floor=cluster_threshold if cluster_threshold > 0 else None,
+        )
+        print("S_spatial stats:", *stats["spatial"])
+        print("S_semantic stats:", *stats["semantic"])
+        print("S_hybrid stats:", *stats["hybrid"])
 
     # ---------------------------------------------------------
     # 3) 1단계 CLINK clustering → L1 노드 생성
@@ -78,98 +130,136 @@ def build_semantic_forest(
     clusters = complete_linkage_clustering(S_hybrid, threshold=cluster_threshold)
 
     level = 1
+    l1_rows = []
     for idx, cluster in enumerate(clusters):
-        node_id = f"L1_{idx}"
-        child_ids = [f"L0_{i}" for i in cluster]
-
-        # summary 생성 (LLM)
-        area_captions = [nodes[c].raw_caption for c in child_ids]
-        summary = summarize_cluster(area_captions)
-
-        # centroid 계산
-        centroid_pos = positions[cluster].mean(axis=0).tolist()
-        centroid_emb = embeddings[cluster].mean(axis=0).tolist()
-
-        nodes[node_id] = Node(
-            node_id=node_id,
+        # leaf row == 원본 index (leaf 를 먼저 추가했으므로)
+        # summary 는 topology 를 모두 만든 뒤 5) 에서 생성
+        row = nodes.add(
+            node_id=f"L1_{idx}",
             level=level,
             node_type="area",
-            children=child_ids,
-            parent=None,
-            summary=summary,
-            embedding=centroid_emb,
-            position=centroid_pos,   # area는 centroid position
+            children=cluster,
+            embedding=embeddings[cluster].mean(axis=0),
+            position=positions[cluster].mean(axis=0),   # area는 centroid position
         )
 
         # parent 연결
-        for cid in child_ids:
-            nodes[cid].parent = node_id
+        nodes.parents[cluster] = row
+        l1_rows.append(row)
 
     # ---------------------------------------------------------
     # 4) Recursive merge until single root  (area 노드들만 합침)
+    #    병합마다 새 노드의 similarity 한 행/열만 갱신하고,
+    #    후보 쌍은 AgglomerationEngine 의 max-heap 으로 관리
     # ---------------------------------------------------------
-    current_level_nodes = [nid for nid in nodes if nodes[nid].level == 1]
-    level = 2
-
-    while len(current_level_nodes) > 1:
-        embs = np.array([nodes[nid].embedding for nid in current_level_nodes])
-        S = np.dot(embs, embs.T) / (
-            np.linalg.norm(embs, axis=1, keepdims=True)
-            * np.linalg.norm(embs, axis=1).T
-            + 1e-8
-        )
-        np.fill_diagonal(S, -1)
+    K = len(l1_rows)
+    capacity = 2 * K - 1
 
-        i, j = np.unravel_index(np.argmax(S), S.shape)
-        nid1 = current_level_nodes[i]
-        nid2 = current_level_nodes[j]
+    embs = np.zeros((capacity, embeddings.shape[1]))
+    embs[:K] = nodes.embeddings[l1_rows]
+    norms = np.linalg.norm(embs, axis=1)
 
-        # 자식 합치기
-        merged_children = nodes[nid1].children + nodes[nid2].children
+    S = np.dot(embs[:K], embs[:K].T) / (norms[:K, None] * norms[None, :K] + 1e-8)
+    engine = AgglomerationEngine(S, capacity=capacity)
 
-        # summary 합치기 (상위 area 요약)
-        merged_summary = summarize_cluster(
-            [nodes[nid1].summary, nodes[nid2].summary]
-        )
+    slot_rows = l1_rows + [None] * (K - 1)
+    level_counts = {}
+    merge_rows = []
+    level = 2
 
-        # embedding merge
-        merged_emb = (
-            np.array(nodes[nid1].embedding) + np.array(nodes[nid2].embedding)
-        ) / 2
-        merged_emb = merged_emb.tolist()
+    for _ in range(K - 1):
+        _, i, j = engine.pop_best()
+        r1 = slot_rows[i]
+        r2 = slot_rows[j]
 
-        # position merge (centroid)
-        merged_pos = (
-            np.array(nodes[nid1].position) + np.array(nodes[nid2].position)
-        ) / 2
-        merged_pos = merged_pos.tolist()
+        # embedding / position merge (centroid)
+        merged_emb = (embs[i] + embs[j]) / 2
+        merged_pos = (nodes.positions[r1] + nodes.positions[r2]) / 2
 
-        new_id = f"L{level}_{len([n for n in nodes if nodes[n].level == level])}"
+        new_id = f"L{level}_{level_counts.get(level, 0)}"
+        level_counts[level] = level_counts.get(level, 0) + 1
 
-        nodes[new_id] = Node(
+        new_row = nodes.add(
             node_id=new_id,
             level=level,
             node_type="area",
-            children=[nid1, nid2],
-            parent=None,
-            summary=merged_summary,
+            children=[r1, r2],
             embedding=merged_emb,
             position=merged_pos,
         )
 
-        nodes[nid1].parent = new_id
-        nodes[nid2].parent = new_id
+        nodes.parents[[r1, r2]] = new_row
+        merge_rows.append(new_row)
 
-        remain = [n for k, n in enumerate(current_level_nodes) if k not in (i, j)]
-        remain.append(new_id)
-        current_level_nodes = remain
+        # 새 노드와 나머지 노드 간 cosine 한 행만 계산
+        new_norm = np.linalg.norm(merged_emb)
+        row = np.dot(embs, merged_emb) / (norms * new_norm + 1e-8)
+        slot = engine.merge(i, j, row)
+
+        embs[slot] = merged_emb
+        norms[slot] = new_norm
+        slot_rows[slot] = new_row
         level += 1
 
-    root = current_level_nodes[0]
+    root = nodes.ids[slot_rows[capacity - 1]]
+
+    # ---------------------------------------------------------
+    # 5) Summary 생성 (LLM)
+    #    area 노드는 자식 summary 가 모두 있어야 요약할 수 있으므로
+    #    dependency 깊이(wave) 별로 묶고, 같은 wave 는 동시에 요청
+    #    (L1 = wave 1, 병합 노드 = 1 + max(자식 wave))
+    # ---------------------------------------------------------
+    wave_of = {r: 1 for r in l1_rows}
+    for r in merge_rows:
+        wave_of[r] = 1 + max(wave_of[c] for c in nodes.children_of(r))
+
+    waves = {}
+    for r in l1_rows + merge_rows:
+        waves.setdefault(wave_of[r], []).append(r)
+
+    for w in sorted(waves):
+        rows = waves[w]
+        caption_groups = []
+        for r in rows:
+            children = nodes.children_of(r)
+            if w == 1:
+                caption_groups.append([nodes.raw_captions[c] for c in children])
+            else:
+                caption_groups.append([nodes.summaries[c] for c in children])
 
-    forest_dict = {
-        "root": root,
-        "nodes": {nid: nodes[nid].to_dict() for nid in nodes},
-    }
+        print(f"[SUMMARY] wave {w}: {len(rows)} nodes")
+        summaries = summarize_clusters(
+            caption_groups,
+            max_workers=summary_workers,
+            retries=summary_retries,
+            client=summary_client,
+            cache=summary_cache,
+            batch=summary_batch,
+            ids=[nodes.ids[r] for r in rows],
+            batch_name=f"summaries_wave{w:02d}",
+        )
+        for r, summary in zip(rows, summaries):
+            nodes.summaries[r] = summary
+
+    if summary_cache is not None:
+        print("[SUMMARY CACHE]", summary_cache.stats())
+
+    if return_store:
+        return nodes, root
+
+    forest_dict = nodes.to_forest_dict(root)
 
     return forest_dict
+
+
+def _print_stats(name, S):
+    # sparse 행렬은 저장되지 않은 항목을 0 으로 간주
+    if sparse.issparse(S):
+        total = S.shape[0] * S.shape[1]
+        data = S.data
+        has_zero = S.nnz < total
+        s_min = min(data.min(), 0.0) if has_zero else data.min()
+        s_max = max(data.max(), 0.0) if has_zero else data.max()
+        print(f"{name} stats:", s_min, s_max, data.sum() / total, f"(nnz={S.nnz})")
+        return
+    print(f"{name} stats:", np.min(S), np.max(S), np.mean(S))
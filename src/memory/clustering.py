@@ -1,6 +1,348 @@
+import heapq
+from collections.abc import Iterator
+
 import numpy as np
+from scipy import sparse
+
+
+class AgglomerationEngine:
+    """
+    Greedy max-similarity agglomeration over a dense similarity matrix.
+
+    Every active slot x keeps its best partner among active slots y > x
+    (nearest-neighbour cache), and a max-heap holds those per-slot candidates
+    with lazy invalidation. A merge only touches one row/column of the matrix
+    plus the slots whose cached partner disappeared, so a full agglomeration
+    costs ~O(N^2) numpy work instead of rescanning every cluster pair.
+
+    Ties are broken exactly like a row-major scan over the active slots:
+    highest similarity first, then the smallest (x, y) slot pair.
+
+    sim_matrix : (N, N) symmetric similarity matrix (copied, never mutated)
+    capacity   : total number of slots (>= N). Slots N..capacity-1 are free
+                 and can be filled by merge(..., into=None).
+    """
+
+    def __init__(self, sim_matrix, capacity=None):
+        S = np.asarray(sim_matrix)
+        n = len(S)
+        capacity = n if capacity is None else capacity
+        if capacity < n:
+            raise ValueError("capacity must be >= number of rows")
+
+        dtype = np.result_type(S.dtype, np.float32)
+        if capacity == n:
+            M = np.array(S, dtype=dtype, copy=True)
+        else:
+            M = np.full((capacity, capacity), -np.inf, dtype=dtype)
+            M[:n, :n] = S
+
+        self.M = M
+        self.size = n
+        self.active = np.zeros(capacity, dtype=bool)
+        self.active[:n] = True
+        self.nn = np.full(capacity, -1, dtype=np.int64)
+        self.nn_sim = np.full(capacity, -np.inf, dtype=np.float64)
+        self._heap = []
+
+        self._init_neighbors(n)
+
+    # ---------------------------------------------------------
+    # nearest-neighbour cache
+    # ---------------------------------------------------------
+    def _init_neighbors(self, n, block=1024):
+        # upper-triangle row maxima, computed block by block
+        for start in range(0, n, block):
+            stop = min(start + block, n)
+            rows = np.array(self.M[start:stop, :n], dtype=np.float64)
+            cols = np.arange(n)
+            rows[cols[None, :] <= np.arange(start, stop)[:, None]] = -np.inf
+
+            best = np.argmax(rows, axis=1)
+            best_sim = rows[np.arange(stop - start), best]
+            self.nn[start:stop] = best
+            self.nn_sim[start:stop] = best_sim
+
+        for x in range(n):
+            self._push(x)
+
+    def _refresh(self, x):
+        row = self.M[x, x + 1:self.size]
+        if row.size == 0:
+            self.nn[x] = -1
+            self.nn_sim[x] = -np.inf
+            return
+        j = int(np.argmax(row))
+        self.nn[x] = x + 1 + j
+        self.nn_sim[x] = float(row[j])
+        self._push(x)
+
+    def _push(self, x):
+        s = self.nn_sim[x]
+        if s > -np.inf:
+            heapq.heappush(self._heap, (-s, x, int(self.nn[x])))
+
+    # ---------------------------------------------------------
+    # public API
+    # ---------------------------------------------------------
+    def pop_best(self):
+        """Return (similarity, x, y) of the best active pair (x < y), or None."""
+        heap = self._heap
+        while heap:
+            neg_s, x, y = heap[0]
+            if self.active[x] and self.nn[x] == y and self.nn_sim[x] == -neg_s:
+                return self.M.dtype.type(-neg_s), x, y
+            heapq.heappop(heap)
+        return None
+
+    def merge(self, a, b, row, into=None):
+        """
+        Merge slots a and b.
+
+        row  : similarities of the merged cluster to every slot (length capacity);
+               entries of inactive slots are ignored.
+        into : slot that receives the merged cluster. Either one of a/b
+               (in-place, e.g. complete linkage) or None to use the next free slot.
+
+        Returns the slot index of the merged cluster.
+        """
+        a, b = min(a, b), max(a, b)
+        if into is None:
+            into = self.size
+            if into >= len(self.M):
+                raise ValueError("no free slot left, increase capacity")
+            self.size += 1
+        elif into not in (a, b):
+            raise ValueError("into must be one of the merged slots or None")
+
+        for s in (a, b):
+            if s != into:
+                self.active[s] = False
+                self.M[s, :] = -np.inf
+                self.M[:, s] = -np.inf
+                self.nn_sim[s] = -np.inf
+
+        row = np.asarray(row, dtype=self.M.dtype)
+        new_row = np.where(self.active, row, -np.inf).astype(self.M.dtype)
+        new_row[into] = -np.inf
+        self.M[into, :] = new_row
+        self.M[:, into] = new_row
+        self.active[into] = True
+
+        # slots below `into` own their pair with it
+        lower = np.flatnonzero(self.active[:into])
+        stale = lower[(self.nn[lower] == a) | (self.nn[lower] == b)]
+        rest = lower[(self.nn[lower] != a) & (self.nn[lower] != b)]
+
+        vals = new_row[rest].astype(np.float64)
+        better = (vals > self.nn_sim[rest]) | (
+            (vals == self.nn_sim[rest]) & (into < self.nn[rest])
+        )
+        self.nn[rest[better]] = into
+        self.nn_sim[rest[better]] = vals[better]
+        for x in rest[better]:
+            self._push(int(x))
+
+        for x in stale:
+            self._refresh(int(x))
+
+        # slots between the merged pair may have pointed at the removed one
+        if into != b:
+            mid = np.flatnonzero(self.active[into + 1:b]) + into + 1
+            for x in mid[self.nn[mid] == b]:
+                self._refresh(int(x))
+
+        self._refresh(into)
+        return into
+
+
+def complete_linkage_clustering(sim_matrix, threshold=0.3, blocks=None):
+    """
+    Complete-linkage (CLINK) agglomerative clustering.
+
+    Repeatedly merges the most similar cluster pair, where cluster similarity
+    is the minimum pairwise similarity, until the best pair drops below
+    `threshold`. Cluster-to-cluster similarities are updated in place with the
+    Lance–Williams rule for complete linkage:
+
+        sim(k, i ∪ j) = min(sim(k, i), sim(k, j))
+
+    sim_matrix : (N, N) symmetric similarity matrix, one of
+                 - dense numpy array (or nested lists)
+                 - scipy.sparse matrix (entries not stored count as 0)
+                 - np.memmap (streamed row block by row block)
+                 - iterator of (row_start, block) row blocks, e.g.
+                   iter_semantic_similarity_blocks(...)
+    threshold  : stop merging once the best similarity is below this value
+    blocks     : True → sim_matrix is a sequence of (row_start, block) row
+                 blocks even if it is not an iterator (e.g. a list of
+                 blocks); None → only iterators are treated as blocks
+
+    Streamed inputs only keep pairs >= threshold; with threshold <= 0 every
+    pair is a candidate, so they are assembled into a dense matrix instead.
+
+    returns:
+        list of clusters (list of original indices), ordered by their
+        smallest member
+    """
+    if blocks is None:
+        blocks = isinstance(sim_matrix, Iterator)
+
+    if sparse.issparse(sim_matrix):
+        if threshold > 0:
+            return _sparse_complete_linkage(sim_matrix, threshold)
+        # 저장되지 않은 0 도 병합 후보가 되므로 dense 로 처리
+        sim_matrix = sim_matrix.toarray()
+
+    elif isinstance(sim_matrix, np.memmap):
+        if threshold > 0:
+            # row-block stream: 전체 행렬을 만들지 않고 후보 쌍만 모음
+            return _sparse_complete_linkage(
+                _candidates_from_blocks(_iter_row_blocks(sim_matrix), threshold), threshold
+            )
+        sim_matrix = np.asarray(sim_matrix)
+
+    elif blocks:
+        if threshold > 0:
+            return _sparse_complete_linkage(
+                _candidates_from_blocks(sim_matrix, threshold), threshold
+            )
+        sim_matrix = _dense_from_blocks(sim_matrix)
+
+    N = len(sim_matrix)
+    if N == 0:
+        return []
+
+    engine = AgglomerationEngine(sim_matrix)
+    members = {i: [i] for i in range(N)}
+
+    while len(members) > 1:
+        best = engine.pop_best()
+        if best is None:
+            break
+
+        max_sim, i, j = best
+        if max_sim < threshold:
+            break
+
+        row = np.minimum(engine.M[i], engine.M[j])
+        engine.merge(i, j, row, into=i)
+        members[i] += members.pop(j)
+
+    return [members[k] for k in sorted(members)]
+
+
+def _iter_row_blocks(S, block_size=1024):
+    for start in range(0, len(S), block_size):
+        yield start, np.asarray(S[start:start + block_size])
+
+
+def _dense_from_blocks(blocks):
+    """(row_start, block) stream → dense (N, N) matrix (threshold <= 0 fallback)."""
+    blocks = [(start, np.asarray(block)) for start, block in blocks]
+    if not blocks:
+        return np.empty((0, 0))
+    n = blocks[0][1].shape[1]
+    dtype = np.result_type(*(block.dtype for _, block in blocks))
+    S = np.empty((n, n), dtype=dtype)
+    for start, block in blocks:
+        S[start:start + len(block)] = block
+    return S
+
+
+def _candidates_from_blocks(blocks, threshold):
+    """
+    Collect the upper-triangle entries >= threshold from a row-block stream
+    into a COO matrix. Only candidate pairs are ever kept in memory.
+    """
+    if threshold <= 0:
+        raise ValueError("streamed similarity blocks require threshold > 0")
+
+    rows, cols, vals = [], [], []
+    N = 0
+    for start, block in blocks:
+        block = np.asarray(block)
+        N = block.shape[1]
+
+        r, c = np.nonzero(block >= threshold)
+        keep = r + start < c
+        r, c = r[keep], c[keep]
+
+        rows.append(r + start)
+        cols.append(c)
+        vals.append(block[r, c])
+
+    if not rows:
+        return sparse.coo_matrix((0, 0))
+
+    return sparse.coo_matrix(
+        (np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+        shape=(N, N),
+    )
+
+
+def _sparse_complete_linkage(S, threshold):
+    """
+    Complete linkage on a sparse similarity matrix (threshold > 0).
+
+    Complete-link similarities only decrease, so pairs below `threshold`
+    (including implicit zeros) can never be merged and are dropped up front.
+    A merged cluster keeps a neighbour only if both halves had it
+    (min over the intersection), and a lazy max-heap over the remaining
+    candidate pairs replays the dense engine's merge order exactly.
+    """
+    S = sparse.coo_matrix(S)
+    N = S.shape[0]
+
+    keep = (S.row < S.col) & (S.data >= threshold)
+    rows = S.row[keep].tolist()
+    cols = S.col[keep].tolist()
+    vals = S.data[keep]
+
+    nbr = [dict() for _ in range(N)]
+    heap = []
+    for i, j, s in zip(rows, cols, vals):
+        nbr[i][j] = s
+        nbr[j][i] = s
+        heap.append((-s, i, j))
+    heapq.heapify(heap)
+
+    members = {i: [i] for i in range(N)}
+
+    while heap:
+        neg_s, i, j = heapq.heappop(heap)
+        if i not in members or j not in members:
+            continue
+        if nbr[i].get(j) != -neg_s:
+            continue
+
+        # Lance–Williams (complete link) on the shared neighbours only
+        ni, nj = nbr[i], nbr[j]
+        merged = {k: min(s, nj[k]) for k, s in ni.items() if k != j and k in nj}
+
+        for k in ni:
+            if k != j:
+                del nbr[k][i]
+        for k in nj:
+            if k != i:
+                del nbr[k][j]
+
+        for k, s in merged.items():
+            nbr[k][i] = s
+            heapq.heappush(heap, (-s, min(i, k), max(i, k)))
+
+        nbr[i] = merged
+        nbr[j] = {}
+        members[i] += members.pop(j)
+
+    return [members[k] for k in sorted(members)]
+
 
-def complete_linkage_clustering(sim_matrix, threshold=0.3):
+def naive_complete_linkage_clustering(sim_matrix, threshold=0.3):
+    """
+    Reference O(N^4) implementation (rescans all cluster pairs on every merge).
+    Kept for equivalence checks and benchmarks only.
+    """
     N = len(sim_matrix)
     clusters = [[i] for i in range(N)]
 
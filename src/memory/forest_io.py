@@ -0,0 +1,255 @@
+# src/memory/forest_io.py
+
+import os
+import json
+from functools import cached_property
+
+import numpy as np
+
+from src.memory.node import NodeStore
+
+# ---------------------------------------------------------
+# Binary semantic forest layout (directory)
+#
+#   manifest.json      format / version / root / sizes
+#   embeddings.npy     (N, D) float32   ┐
+#   positions.npy      (N, P) float64   ├ np.load(mmap_mode="r")
+#   quaternions.npy    (N, 4) float64   ┘ (area rows = NaN)
+#   topology.npz       levels, leaf_mask, parents, child_offsets, child_index
+#   ids.json / summaries.json / images.json / raw_captions.json
+#
+# 각 컬럼은 처음 접근할 때만 읽는다.
+# ---------------------------------------------------------
+FOREST_FORMAT = "semantic-forest"
+FOREST_FORMAT_VERSION = 1
+
+ARRAY_COLUMNS = ("embeddings", "positions", "quaternions")
+TEXT_COLUMNS = ("ids", "summaries", "images", "raw_captions")
+
+
+def write_forest(forest, out_dir, root=None):
+    """
+    Write a forest in the binary layout.
+
+    forest : forest dict ({"root", "nodes"}) or NodeStore (then `root` is required)
+    """
+    if isinstance(forest, NodeStore):
+        if root is None:
+            raise ValueError("root is required when writing a NodeStore")
+        store = forest
+    else:
+        store = NodeStore.from_forest_dict(forest)
+        root = forest["root"]
+
+    os.makedirs(out_dir, exist_ok=True)
+    n = len(store)
+
+    for name in ARRAY_COLUMNS:
+        np.save(os.path.join(out_dir, f"{name}.npy"), getattr(store, name)[:n])
+
+    np.savez(
+        os.path.join(out_dir, "topology.npz"),
+        levels=store.levels[:n],
+        leaf_mask=store.leaf_mask[:n],
+        parents=store.parents[:n],
+        child_offsets=store.child_offsets[:n + 1],
+        child_index=store.child_index[:store.child_offsets[n]],
+    )
+
+    for name in TEXT_COLUMNS:
+        with open(os.path.join(out_dir, f"{name}.json"), "w", encoding="utf-8") as f:
+            json.dump(getattr(store, name), f, ensure_ascii=False)
+
+    manifest = {
+        "format": FOREST_FORMAT,
+        "version": FOREST_FORMAT_VERSION,
+        "root": root,
+        "num_nodes": n,
+        "emb_dim": int(store.embeddings.shape[1]),
+        "pos_dim": int(store.positions.shape[1]),
+    }
+    # manifest 는 마지막에 기록 → 중간에 실패하면 읽히지 않음
+    with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    return out_dir
+
+
+class ForestReader:
+    """
+    Lazy reader for the binary forest layout.
+
+    Numeric columns are memory-mapped, topology and text columns are loaded
+    on first access only. Column names match NodeStore, so code written
+    against either works with both.
+    """
+
+    def __init__(self, path, mmap_mode="r"):
+        self.path = path
+        self.mmap_mode = mmap_mode
+
+        with open(os.path.join(path, "manifest.json"), "r") as f:
+            self.manifest = json.load(f)
+
+        if self.manifest.get("format") != FOREST_FORMAT:
+            raise ValueError(f"not a semantic forest directory: {path}")
+        if self.manifest.get("version", 0) > FOREST_FORMAT_VERSION:
+            raise ValueError(
+                f"forest format version {self.manifest['version']} is newer "
+                f"than supported version {FOREST_FORMAT_VERSION}"
+            )
+
+    @classmethod
+    def from_forest_dict(cls, forest):
+        """In-memory reader over a JSON forest dict (same interface, no files)."""
+        store = NodeStore.from_forest_dict(forest)
+        n = len(store)
+
+        reader = cls.__new__(cls)
+        reader.path = None
+        reader.mmap_mode = None
+        reader.manifest = {
+            "format": FOREST_FORMAT,
+            "version": FOREST_FORMAT_VERSION,
+            "root": forest["root"],
+            "num_nodes": n,
+            "emb_dim": int(store.embeddings.shape[1]),
+            "pos_dim": int(store.positions.shape[1]),
+        }
+
+        # cached_property 값을 미리 채워 둠
+        for name in ARRAY_COLUMNS + ("levels", "leaf_mask", "parents"):
+            reader.__dict__[name] = getattr(store, name)[:n]
+        reader.__dict__["child_offsets"] = store.child_offsets[:n + 1]
+        reader.__dict__["child_index"] = store.child_index[:store.child_offsets[n]]
+        for name in TEXT_COLUMNS:
+            reader.__dict__[name] = getattr(store, name)
+        return reader
+
+    # ---------------------------------------------------------
+    # metadata
+    # ---------------------------------------------------------
+    @property
+    def root(self):
+        return self.manifest["root"]
+
+    def __len__(self):
+        return self.manifest["num_nodes"]
+
+    # ---------------------------------------------------------
+    # lazy columns
+    # ---------------------------------------------------------
+    def _array(self, name):
+        return np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode=self.mmap_mode)
+
+    def _text(self, name):
+        with open(os.path.join(self.path, f"{name}.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    @cached_property
+    def _topology(self):
+        return np.load(os.path.join(self.path, "topology.npz"))
+
+    @cached_property
+    def embeddings(self):
+        return self._array("embeddings")
+
+    @cached_property
+    def positions(self):
+        return self._array("positions")
+
+    @cached_property
+    def quaternions(self):
+        return self._array("quaternions")
+
+    @cached_property
+    def levels(self):
+        return self._topology["levels"]
+
+    @cached_property
+    def leaf_mask(self):
+        return self._topology["leaf_mask"]
+
+    @cached_property
+    def parents(self):
+        return self._topology["parents"]
+
+    @cached_property
+    def child_offsets(self):
+        return self._topology["child_offsets"]
+
+    @cached_property
+    def child_index(self):
+        return self._topology["child_index"]
+
+    @cached_property
+    def ids(self):
+        return self._text("ids")
+
+    @cached_property
+    def summaries(self):
+        return self._text("summaries")
+
+    @cached_property
+    def images(self):
+        return self._text("images")
+
+    @cached_property
+    def raw_captions(self):
+        return self._text("raw_captions")
+
+    @cached_property
+    def index(self):
+        return {nid: i for i, nid in enumerate(self.ids)}
+
+    def children_of(self, row):
+        return self.child_index[self.child_offsets[row]:self.child_offsets[row + 1]]
+
+    # ---------------------------------------------------------
+    # conversion
+    # ---------------------------------------------------------
+    def to_store(self):
+        n = len(self)
+        store = NodeStore(
+            emb_dim=self.manifest["emb_dim"],
+            pos_dim=self.manifest["pos_dim"],
+            capacity=n,
+            emb_dtype=self.embeddings.dtype,
+        )
+        for name in ARRAY_COLUMNS + ("levels", "leaf_mask", "parents"):
+            getattr(store, name)[:n] = getattr(self, name)
+        store.child_offsets[:n + 1] = self.child_offsets
+        store.child_index = np.array(self.child_index, dtype=np.int64)
+        for name in TEXT_COLUMNS:
+            setattr(store, name, list(getattr(self, name)))
+        store.index = {nid: i for i, nid in enumerate(store.ids)}
+        store.size = n
+        return store
+
+    def to_forest_dict(self):
+        return self.to_store().to_forest_dict(self.root)
+
+
+def read_forest(path, mmap_mode="r"):
+    """
+    Open a forest from either layout.
+
+    path : binary forest directory, or a semantic_forest.json file
+    """
+    if os.path.isdir(path):
+        return ForestReader(path, mmap_mode=mmap_mode)
+
+    with open(path, "r") as f:
+        return ForestReader.from_forest_dict(json.load(f))
+
+
+def convert_forest(src, dst):
+    """JSON ↔ binary conversion, direction picked from the source path."""
+    if os.path.isdir(src):
+        forest = ForestReader(src).to_forest_dict()
+        with open(dst, "w") as f:
+            json.dump(forest, f, indent=2)
+    else:
+        with open(src, "r") as f:
+            write_forest(json.load(f), dst)
+    return dst
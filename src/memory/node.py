@@ -1,5 +1,8 @@
 # src/memory/node.py
 
+import numpy as np
+
+
 class Node:
     def __init__(
         self,
@@ -56,3 +59,290 @@ class Node:
             data["quaternion"] = self.quaternion
 
         return data
+
+
+class NodeStore:
+    """
+    Struct-of-arrays storage for semantic forest nodes.
+
+    Numeric fields live in contiguous arrays (one row per node), topology in
+    integer arrays (parent row, level, CSR-style child offsets) and text in
+    plain string tables. `store[node_id]` returns a lightweight NodeView that
+    behaves like Node (to_dict(), is_leaf(), attribute access).
+
+    Nodes are append-only and a node's children must be known when it is
+    added, which matches how build_semantic_forest creates the hierarchy.
+    """
+
+    def __init__(self, emb_dim, pos_dim=3, capacity=64, emb_dtype=np.float32):
+        capacity = max(int(capacity), 1)
+
+        # numeric columns
+        self.embeddings = np.zeros((capacity, emb_dim), dtype=emb_dtype)
+        self.positions = np.zeros((capacity, pos_dim), dtype=np.float64)
+        self.quaternions = np.full((capacity, 4), np.nan, dtype=np.float64)
+
+        # topology
+        self.levels = np.zeros(capacity, dtype=np.int32)
+        self.leaf_mask = np.zeros(capacity, dtype=bool)
+        self.parents = np.full(capacity, -1, dtype=np.int64)
+        self.child_offsets = np.zeros(capacity + 1, dtype=np.int64)
+        self.child_index = np.zeros(capacity, dtype=np.int64)
+
+        # string tables
+        self.ids = []
+        self.summaries = []
+        self.images = []
+        self.raw_captions = []
+
+        self.index = {}     # node_id → row
+        self.size = 0
+
+    # ---------------------------------------------------------
+    # growth
+    # ---------------------------------------------------------
+    def _grow_rows(self, needed):
+        cap = len(self.levels)
+        if needed <= cap:
+            return
+        new_cap = max(needed, cap * 2)
+
+        def grow(arr, fill):
+            out = np.full((new_cap,) + arr.shape[1:], fill, dtype=arr.dtype)
+            out[:cap] = arr
+            return out
+
+        self.embeddings = grow(self.embeddings, 0)
+        self.positions = grow(self.positions, 0)
+        self.quaternions = grow(self.quaternions, np.nan)
+        self.levels = grow(self.levels, 0)
+        self.leaf_mask = grow(self.leaf_mask, False)
+        self.parents = grow(self.parents, -1)
+
+        offsets = np.zeros(new_cap + 1, dtype=np.int64)
+        offsets[:cap + 1] = self.child_offsets
+        self.child_offsets = offsets
+
+    def _grow_children(self, needed):
+        cap = len(self.child_index)
+        if needed <= cap:
+            return
+        out = np.zeros(max(needed, cap * 2), dtype=np.int64)
+        out[:cap] = self.child_index
+        self.child_index = out
+
+    # ---------------------------------------------------------
+    # mutation
+    # ---------------------------------------------------------
+    def add(
+        self,
+        node_id,
+        level,
+        node_type,
+        children=None,
+        summary=None,
+        embedding=None,
+        position=None,
+        quaternion=None,
+        image=None,
+        raw_caption=None,
+    ):
+        """Append a node and return its row. `children` are node ids or rows."""
+        if node_id in self.index:
+            raise ValueError(f"duplicate node id: {node_id}")
+
+        row = self.size
+        self._grow_rows(row + 1)
+
+        child_rows = [self.row(c) for c in (children or [])]
+        start = self.child_offsets[row]
+        self._grow_children(start + len(child_rows))
+        self.child_index[start:start + len(child_rows)] = child_rows
+        self.child_offsets[row + 1] = start + len(child_rows)
+
+        if embedding is not None:
+            self.embeddings[row] = embedding
+        if position is not None:
+            self.positions[row] = position
+        if quaternion is not None:
+            self.quaternions[row] = quaternion
+
+        self.levels[row] = level
+        self.leaf_mask[row] = node_type == "leaf"
+        self.parents[row] = -1
+
+        self.ids.append(node_id)
+        self.summaries.append(summary)
+        self.images.append(image)
+        self.raw_captions.append(raw_caption)
+
+        self.index[node_id] = row
+        self.size += 1
+        return row
+
+    def set_parent(self, child, parent):
+        self.parents[self.row(child)] = self.row(parent)
+
+    # ---------------------------------------------------------
+    # access
+    # ---------------------------------------------------------
+    def row(self, key):
+        if isinstance(key, (int, np.integer)):
+            return int(key)
+        return self.index[key]
+
+    def children_of(self, key):
+        r = self.row(key)
+        return self.child_index[self.child_offsets[r]:self.child_offsets[r + 1]]
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, node_id):
+        return node_id in self.index
+
+    def __getitem__(self, key):
+        return NodeView(self, self.row(key))
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def views(self):
+        for r in range(self.size):
+            yield NodeView(self, r)
+
+    # ---------------------------------------------------------
+    # (de)serialization
+    # ---------------------------------------------------------
+    def to_forest_dict(self, root):
+        return {
+            "root": root,
+            "nodes": {view.id: view.to_dict() for view in self.views()},
+        }
+
+    @classmethod
+    def from_forest_dict(cls, forest, emb_dtype=np.float32):
+        nodes = forest["nodes"]
+        first = next(iter(nodes.values()), None)
+        emb_dim = len(first["embedding"]) if first else 0
+        pos_dim = len(first["position"]) if first else 3
+
+        store = cls(emb_dim, pos_dim=pos_dim, capacity=len(nodes), emb_dtype=emb_dtype)
+
+        # 자식이 부모보다 먼저 추가되도록 level 순으로 삽입
+        for nid in sorted(nodes, key=lambda n: nodes[n]["level"]):
+            nd = nodes[nid]
+            store.add(
+                node_id=nid,
+                level=nd["level"],
+                node_type=nd["type"],
+                children=nd["children"],
+                summary=nd.get("summary"),
+                embedding=nd.get("embedding"),
+                position=nd.get("position"),
+                quaternion=nd.get("quaternion"),
+                image=nd.get("image"),
+                raw_caption=nd.get("raw_caption"),
+            )
+        for nid, nd in nodes.items():
+            if nd.get("parent") is not None:
+                store.set_parent(nid, nd["parent"])
+
+        return store
+
+
+class NodeView:
+    """Read/write view of one NodeStore row with the Node interface."""
+
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, store, row):
+        self._store = store
+        self._row = row
+
+    @property
+    def row(self):
+        return self._row
+
+    @property
+    def id(self):
+        return self._store.ids[self._row]
+
+    @property
+    def level(self):
+        return int(self._store.levels[self._row])
+
+    @property
+    def type(self):
+        return "leaf" if self._store.leaf_mask[self._row] else "area"
+
+    @property
+    def children(self):
+        ids = self._store.ids
+        return [ids[c] for c in self._store.children_of(self._row)]
+
+    @property
+    def parent(self):
+        p = self._store.parents[self._row]
+        return None if p < 0 else self._store.ids[p]
+
+    @parent.setter
+    def parent(self, node_id):
+        self._store.parents[self._row] = -1 if node_id is None else self._store.row(node_id)
+
+    @property
+    def summary(self):
+        return self._store.summaries[self._row]
+
+    @summary.setter
+    def summary(self, value):
+        self._store.summaries[self._row] = value
+
+    @property
+    def embedding(self):
+        return self._store.embeddings[self._row]
+
+    @property
+    def position(self):
+        return self._store.positions[self._row]
+
+    @property
+    def quaternion(self):
+        q = self._store.quaternions[self._row]
+        if not self.is_leaf() or np.isnan(q).all():
+            return None
+        return q
+
+    @property
+    def image(self):
+        return self._store.images[self._row]
+
+    @property
+    def raw_caption(self):
+        return self._store.raw_captions[self._row]
+
+    def is_leaf(self):
+        return bool(self._store.leaf_mask[self._row])
+
+    def to_dict(self):
+        data = {
+            "id": self.id,
+            "level": self.level,
+            "type": self.type,
+            "children": self.children,
+            "parent": self.parent,
+            "summary": self.summary,
+            "embedding": self.embedding.tolist(),
+            "position": self.position.tolist(),
+        }
+
+        if self.raw_caption is not None:
+            data["raw_caption"] = self.raw_caption
+
+        # leaf 전용 필드
+        if self.is_leaf():
+            data["image"] = self.image
+            q = self.quaternion
+            data["quaternion"] = None if q is None else q.tolist()
+
+        return data
@@ -1,21 +1,34 @@
 import numpy as np
+from scipy import sparse
 
-def compute_spatial_similarity(positions, theta=1.0, mode="euclidean"):
+from src.utils.spatial_index import radius_pairs
+
+
+def compute_spatial_similarity(positions, theta=1.0, mode="euclidean", cutoff=None):
     """
     Compute spatial similarity using either Euclidean or Haversine distance.
-    
+
     positions:
         shape (N, 2) or (N, 3)
         - Euclidean: (x, y) in meters
         - Haversine: (lat, lon) in degrees
-    
+
     theta:
         similarity decay parameter
         S = exp(-distance / theta)
-    
+
     mode: "euclidean" or "haversine"
+
+    cutoff:
+        None → dense (N, N) matrix.
+        float → sparse CSR matrix holding only pairs within `cutoff`
+        (same unit as the distance: meters / km). Pairs are found with a
+        KD-tree, so memory is O(nnz) instead of O(N^2).
     """
 
+    if cutoff is not None:
+        return _sparse_spatial_similarity(positions, theta, mode, cutoff)
+
     if mode == "euclidean":
         # Take only x, y
         pos = positions[:, :2].astype(float)
@@ -50,10 +63,49 @@ def compute_spatial_similarity(positions, theta=1.0, mode="euclidean"):
         raise ValueError("mode must be 'euclidean' or 'haversine'")
 
 
+def _sparse_spatial_similarity(positions, theta, mode, cutoff):
+    N = len(positions)
+
+    # euclidean: (x, y) / haversine: (lat, lon)
+    pts = np.asarray(positions)[:, :2].astype(float)
+    i, j, dist = radius_pairs(pts, cutoff, mode=mode)
+    sim = np.exp(-dist / theta)
+
+    # 대칭 + 대각선(자기 자신 = 1)
+    diag = np.arange(N)
+    rows = np.concatenate([i, j, diag])
+    cols = np.concatenate([j, i, diag])
+    data = np.concatenate([sim, sim, np.ones(N)])
+
+    S = sparse.csr_matrix((data, (rows, cols)), shape=(N, N))
+    S.sort_indices()
+    return S
 
-def compute_semantic_similarity(embeddings):
+
+def spatial_cutoff_for_threshold(theta, alpha, threshold):
+    """
+    Smallest spatial cutoff for which a sparse hybrid matrix clusters exactly
+    like the dense one.
+
+    Outside the cutoff the hybrid similarity is at most
+    (1 - alpha) * exp(-cutoff / theta) + alpha, so once that bound is
+    <= threshold those pairs can never be merged by complete linkage.
+    Returns None when threshold <= alpha (no finite cutoff is safe).
+    """
+    if threshold <= alpha:
+        return None
+    ratio = (threshold - alpha) / (1 - alpha)
+    if ratio >= 1:
+        return 0.0
+    return float(-theta * np.log(ratio))
+
+
+
+def compute_semantic_similarity(embeddings, pattern=None):
     """
     embeddings: numpy array of shape (N, D)
+    pattern: optional sparse (N, N) matrix; if given, cosine similarity is
+             evaluated only on its stored entries and returned as CSR
     returns:
         cosine similarity matrix (N, N)
     """
@@ -62,25 +114,236 @@ def compute_semantic_similarity(embeddings):
     norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
     normalized = embeddings / (norms + 1e-8)
 
+    if pattern is not None:
+        return _sparse_semantic_similarity(normalized, pattern)
+
     # Cosine similarity matrix = dot product of normalized vectors
     sim_matrix = np.dot(normalized, normalized.T)
 
     return sim_matrix
 
+
+def iter_semantic_similarity_blocks(embeddings, block_size=1024, dtype=np.float32):
+    """
+    Row-block generator over the cosine similarity matrix.
+
+    embeddings : (N, D) numpy array (may itself be a memmap)
+    block_size : number of rows per block → peak memory ~ block_size × N
+    dtype      : np.float32 or np.float16 for the yielded blocks
+                 (products are always accumulated in float32)
+
+    yields:
+        (row_start, block) with block of shape (rows, N)
+    """
+    dtype = _check_block_dtype(dtype)
+    normalized = _normalize_rows(embeddings)
+
+    N = len(normalized)
+    for start in range(0, N, block_size):
+        stop = min(start + block_size, N)
+        block = normalized[start:stop] @ normalized.T
+        yield start, block.astype(dtype, copy=False)
+
+
+def compute_semantic_similarity_tiled(
+    embeddings, block_size=1024, dtype=np.float32, out=None
+):
+    """
+    Block-tiled cosine similarity written into `out` without holding a
+    float64 N×N temporary.
+
+    out:
+        None          → in-memory array of `dtype`
+        str (path)    → new np.memmap file of shape (N, N), `dtype`
+        array/memmap  → filled in place (must be (N, N))
+
+    returns:
+        the filled (N, N) array / memmap
+    """
+    dtype = _check_block_dtype(dtype)
+    N = len(embeddings)
+
+    if out is None:
+        out = np.empty((N, N), dtype=dtype)
+    elif isinstance(out, str):
+        out = np.memmap(out, dtype=dtype, mode="w+", shape=(N, N))
+    elif out.shape != (N, N):
+        raise ValueError("out must have shape (N, N)")
+
+    for start, block in iter_semantic_similarity_blocks(
+        embeddings, block_size=block_size, dtype=dtype
+    ):
+        out[start:start + len(block)] = block
+
+    if isinstance(out, np.memmap):
+        out.flush()
+    return out
+
+
+def _check_block_dtype(dtype):
+    dtype = np.dtype(dtype)
+    if dtype not in (np.float32, np.float16):
+        raise ValueError("dtype must be float32 or float16")
+    return dtype
+
+
+def _normalize_rows(embeddings, chunk=1 << 14):
+    # float32 정규화 (memmap 입력도 chunk 단위로 읽음)
+    out = np.empty(embeddings.shape, dtype=np.float32)
+    for start in range(0, len(embeddings), chunk):
+        e = np.asarray(embeddings[start:start + chunk], dtype=np.float32)
+        out[start:start + chunk] = e / (np.linalg.norm(e, axis=1, keepdims=True) + 1e-8)
+    return out
+
+
+def _sparse_semantic_similarity(normalized, pattern, chunk=1 << 16):
+    P = sparse.csr_matrix(pattern, copy=True)
+    P.sort_indices()
+    rows = np.repeat(np.arange(P.shape[0]), np.diff(P.indptr))
+    cols = P.indices
+
+    data = np.empty(len(cols), dtype=normalized.dtype)
+    for start in range(0, len(cols), chunk):
+        stop = start + chunk
+        data[start:stop] = np.einsum(
+            "ij,ij->i", normalized[rows[start:stop]], normalized[cols[start:stop]]
+        )
+
+    P.data = data
+    return P
+
 def compute_hybrid_similarity(spatial, semantic, alpha=0.5):
     """
-    spatial: (N, N) numpy array - spatial similarity matrix
-    semantic: (N, N) numpy array - semantic similarity matrix
+    spatial: (N, N) numpy array or sparse matrix - spatial similarity matrix
+    semantic: (N, N) numpy array or sparse matrix - semantic similarity matrix
     alpha: float (0~1), weight for semantic similarity
-    
+
     returns:
         hybrid similarity matrix (N, N)
+        - both sparse (same pattern): CSR with that pattern
+        - otherwise: dense numpy array
     """
     if not (0.0 <= alpha <= 1.0):
         raise ValueError("alpha must be in [0, 1]")
-    
+
     if spatial.shape != semantic.shape:
         raise ValueError("spatial and semantic matrices must have the same shape")
 
     hybrid = (1 - alpha) * spatial + alpha * semantic
-    return hybrid
+
+    if sparse.issparse(hybrid):
+        return hybrid.tocsr()
+
+    # sparse + dense → np.matrix 이므로 ndarray 로 되돌림
+    return np.asarray(hybrid)
+
+
+def compute_hybrid_similarity_fused(
+    positions,
+    embeddings,
+    theta=1.0,
+    alpha=0.5,
+    mode="euclidean",
+    block_size=256,
+    floor=None,
+    out=None,
+    dtype=None,
+):
+    """
+    One-pass hybrid similarity: spatial decay, cosine similarity and the
+    alpha blend (compute_hybrid_similarity) are computed row block by row
+    block, and min/max/mean of all three matrices are collected while
+    streaming. Only the hybrid result is kept.
+
+    positions  : (N, 2) or (N, 3), same convention as compute_spatial_similarity
+    embeddings : (N, D)
+    floor      : None → dense (N, N) result
+                 float → CSR holding only entries >= floor
+    out        : dense mode only; None, a path (new np.memmap) or an (N, N) array
+    dtype      : dtype of the dense result (default: float64, as the
+                 unfused pipeline)
+
+    returns:
+        (hybrid, stats) with stats = {"spatial": (min, max, mean),
+                                      "semantic": (...), "hybrid": (...)}
+    """
+    if not (0.0 <= alpha <= 1.0):
+        raise ValueError("alpha must be in [0, 1]")
+    if mode not in ("euclidean", "haversine"):
+        raise ValueError("mode must be 'euclidean' or 'haversine'")
+
+    N = len(positions)
+    pos = np.asarray(positions)[:, :2].astype(float)
+
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    normalized = embeddings / (norms + 1e-8)
+
+    if floor is None:
+        dtype = np.dtype(np.float64 if dtype is None else dtype)
+        if out is None:
+            out = np.empty((N, N), dtype=dtype)
+        elif isinstance(out, str):
+            out = np.memmap(out, dtype=dtype, mode="w+", shape=(N, N))
+        elif out.shape != (N, N):
+            raise ValueError("out must have shape (N, N)")
+    else:
+        rows, cols, vals = [], [], []
+
+    acc = {name: [np.inf, -np.inf, 0.0] for name in ("spatial", "semantic", "hybrid")}
+
+    for start in range(0, N, block_size):
+        stop = min(start + block_size, N)
+
+        sp = np.exp(-_block_distance(pos[start:stop], pos, mode) / theta)
+        sem = np.dot(normalized[start:stop], normalized.T)
+        hyb = compute_hybrid_similarity(sp, sem, alpha=alpha)
+
+        for name, tile in (("spatial", sp), ("semantic", sem), ("hybrid", hyb)):
+            a = acc[name]
+            a[0] = min(a[0], tile.min())
+            a[1] = max(a[1], tile.max())
+            a[2] += float(tile.sum(dtype=np.float64))
+
+        if floor is None:
+            out[start:stop] = hyb
+        else:
+            r, c = np.nonzero(hyb >= floor)
+            rows.append(r + start)
+            cols.append(c)
+            vals.append(hyb[r, c])
+
+    total = max(N * N, 1)
+    stats = {name: (a[0], a[1], a[2] / total) for name, a in acc.items()}
+
+    if floor is None:
+        if isinstance(out, np.memmap):
+            out.flush()
+        return out, stats
+
+    if not rows:
+        return sparse.csr_matrix((N, N)), stats
+
+    S = sparse.csr_matrix(
+        (np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+        shape=(N, N),
+    )
+    return S, stats
+
+
+def _block_distance(pos_block, pos, mode):
+    # compute_spatial_similarity 와 동일한 거리식을 (B, N) 타일에 적용
+    if mode == "euclidean":
+        diff = pos_block[:, None, :] - pos[None, :, :]
+        return np.linalg.norm(diff, axis=-1)
+
+    R = 6371.0  # Earth radius in km
+    lat_b = np.radians(pos_block[:, 0]).reshape(-1, 1)
+    lon_b = np.radians(pos_block[:, 1]).reshape(-1, 1)
+    lat = np.radians(pos[:, 0]).reshape(1, -1)
+    lon = np.radians(pos[:, 1]).reshape(1, -1)
+
+    a = (
+        np.sin((lat_b - lat) / 2)**2
+        + np.cos(lat_b) * np.cos(lat) * np.sin((lon_b - lon) / 2)**2
+    )
+    return R * 2 * np.arcsin(np.sqrt(a))
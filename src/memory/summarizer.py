@@ -2,19 +2,44 @@
 
 import os
 import json
+import threading
+from functools import lru_cache
 from openai import OpenAI
 from src.utils.log_openai_usage import log_openai_usage
+from src.utils.llm_pool import call_with_retries, run_concurrent
+from src.utils.batch_jobs import chat_request
+from src.memory.summary_cache import SummaryCache
 
-client = OpenAI()
+_client = None
+_client_lock = threading.Lock()
 
 PROMPT_PATH = "/disks/ssd1/kmw2622/workspace/embodied-rag/prompt/abstraction_prompt.txt"
 
 SUMMARY_SAVE_DIR = "/disks/ssd1/kmw2622/workspace/embodied-rag/datasets/coex_1f_processed/summaries"
 os.makedirs(SUMMARY_SAVE_DIR, exist_ok=True)
 
+SUMMARY_MODEL = "gpt-4o-mini"
+SYSTEM_PROMPT = "You abstract multiple environment descriptions into a single high-level summary."
+MAX_TOKENS = 160
+TEMPERATURE = 0.0
+
+
+def get_client():
+    # OpenAI() 는 API key 가 필요하므로 실제로 호출할 때 생성
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = OpenAI()
+        return _client
+
 
 def load_prompt():
-    with open(PROMPT_PATH, "r") as f:
+    return _read_prompt(PROMPT_PATH)
+
+
+@lru_cache(maxsize=8)
+def _read_prompt(path):
+    with open(path, "r") as f:
         return f.read().strip()
 
 
@@ -38,15 +63,22 @@ def extract_summary_only(llm_output: str) -> str:
         return llm_output
 
 
-def summarize_cluster(captions, cluster_name=None, save=False, max_len=600):
-    """
-    Summarize multiple captions into a high-level area summary.
-    Always returns a pure summary string (never JSON).
-    """
+def _summary_request_body(prompt):
+    return {
+        "model": SUMMARY_MODEL,
+        "messages": [
+            {
+                "role": "system",
+                "content": SYSTEM_PROMPT
+            },
+            {"role": "user", "content": prompt},
+        ],
+        "max_tokens": MAX_TOKENS,
+        "temperature": TEMPERATURE,
+    }
 
-    if not captions:
-        return ""
 
+def _build_prompt(captions, max_len):
     # ---------------------------------------------------------
     # 1) 입력 길이 제한
     # ---------------------------------------------------------
@@ -58,41 +90,76 @@ def summarize_cluster(captions, cluster_name=None, save=False, max_len=600):
     # 2) Prompt 준비
     # ---------------------------------------------------------
     template = load_prompt()
-    prompt = template.replace("{environment descriptions}", merged)
+    return template, template.replace("{environment descriptions}", merged)
 
-    # ---------------------------------------------------------
-    # 3) LLM 호출
-    # ---------------------------------------------------------
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You abstract multiple environment descriptions into a single high-level summary."
-                },
-                {"role": "user", "content": prompt},
-            ],
-            max_tokens=160,
-            temperature=0.0,
-        )
 
-        if log_openai_usage:
-            try:
-                log_openai_usage(response)
-            except Exception:
-                pass
+def _request_summary(client, prompt):
+    response = client.chat.completions.create(**_summary_request_body(prompt))
+
+    if log_openai_usage:
+        try:
+            log_openai_usage(response)
+        except Exception:
+            pass
+
+    return response.choices[0].message.content.strip()
+
+
+def summarize_cluster(
+    captions,
+    cluster_name=None,
+    save=False,
+    max_len=600,
+    client=None,
+    retries=0,
+    backoff=1.0,
+    cache=None,
+):
+    """
+    Summarize multiple captions into a high-level area summary.
+    Always returns a pure summary string (never JSON).
+
+    client  : chat.completions 호환 client (None → OpenAI())
+    retries : 실패 시 재시도 횟수 (지수 backoff), 모두 실패하면 caption 으로 대체
+    cache   : SummaryCache — 같은 model/prompt/params/captions 이면 LLM 호출 생략
+    """
 
-        llm_output = response.choices[0].message.content.strip()
+    if not captions:
+        return ""
 
-    except Exception as e:
-        print("[Summarizer ERROR]:", e)
-        llm_output = " ".join(captions[:3])
+    template, prompt = _build_prompt(captions, max_len)
 
     # ---------------------------------------------------------
-    # 4) JSON/문자열에 상관없이 Summary 문자열만 추출
+    # 3) LLM 호출 (cache hit 이면 생략)
     # ---------------------------------------------------------
-    summary = extract_summary_only(llm_output)
+    cache_key = None
+    summary = None
+    if cache is not None:
+        cache_key = summary_cache_key(template, captions, max_len)
+        summary = cache.get(cache_key)
+
+    if summary is None:
+        try:
+            llm_output = call_with_retries(
+                _request_summary,
+                client or get_client(),
+                prompt,
+                retries=retries,
+                backoff=backoff,
+            )
+
+            # ---------------------------------------------------------
+            # 4) JSON/문자열에 상관없이 Summary 문자열만 추출
+            # ---------------------------------------------------------
+            summary = extract_summary_only(llm_output)
+
+            # 실패 fallback 은 저장하지 않음
+            if cache is not None:
+                cache.put(cache_key, summary)
+
+        except Exception as e:
+            print("[Summarizer ERROR]:", e)
+            summary = extract_summary_only(" ".join(captions[:3]))
 
     # ---------------------------------------------------------
     # 5) 저장 옵션
@@ -113,3 +180,100 @@ def summarize_cluster(captions, cluster_name=None, save=False, max_len=600):
         print(f"[SUMMARY SAVED] {out_path}")
 
     return summary
+
+
+def summary_cache_key(template, captions, max_len):
+    params = {
+        "system": SYSTEM_PROMPT,
+        "max_tokens": MAX_TOKENS,
+        "temperature": TEMPERATURE,
+        "max_len": max_len,
+    }
+    return SummaryCache.make_key(SUMMARY_MODEL, template, params, captions)
+
+
+def summarize_clusters(
+    caption_groups,
+    max_workers=8,
+    retries=3,
+    backoff=1.0,
+    client=None,
+    cache=None,
+    batch=None,
+    ids=None,
+    batch_name="summaries",
+    **kwargs,
+):
+    """
+    Summarize independent caption groups concurrently (thread pool).
+
+    caption_groups : list[list[str]]
+    max_workers    : 동시 요청 수 상한
+    batch          : BatchRunner (선택) — cache miss 를 하나의 batch job 으로
+                     제출하고, 실패한 항목만 개별 요청으로 재시도
+    ids            : batch custom_id 로 쓸 cluster id (기본: index)
+    returns:
+        list[str], caption_groups 와 같은 순서
+    """
+    def _one(captions):
+        return summarize_cluster(
+            captions, client=client, retries=retries, backoff=backoff,
+            cache=cache, **kwargs
+        )
+
+    if batch is None:
+        return run_concurrent(_one, caption_groups, max_workers=max_workers)
+
+    def _request(prompt):
+        return call_with_retries(
+            _request_summary, client or get_client(), prompt,
+            retries=retries, backoff=backoff,
+        )
+
+    return _summarize_clusters_batch(
+        caption_groups, _request, batch, ids, batch_name, cache,
+        max_workers, kwargs.get("max_len", 600),
+    )
+
+
+def _summarize_clusters_batch(caption_groups, request, batch, ids, name, cache, max_workers, max_len):
+    if ids is None:
+        ids = [str(i) for i in range(len(caption_groups))]
+    ids = [str(cid) for cid in ids]
+
+    summaries = [None] * len(caption_groups)
+    todo = {}  # custom_id → (index, cache_key, prompt)
+    for i, (cid, captions) in enumerate(zip(ids, caption_groups)):
+        if not captions:
+            summaries[i] = ""
+            continue
+        template, prompt = _build_prompt(captions, max_len)
+        key = summary_cache_key(template, captions, max_len) if cache is not None else None
+        cached = cache.get(key) if cache is not None else None
+        if cached is not None:
+            summaries[i] = cached
+        else:
+            todo[cid] = (i, key, prompt)
+
+    if not todo:
+        return summaries
+
+    results = batch.run(
+        (chat_request(cid, _summary_request_body(prompt)) for cid, (_, _, prompt) in todo.items()),
+        name,
+        fallback=lambda cid: request(todo[cid][2]),
+        fallback_workers=max_workers,
+    )
+
+    for cid, (i, key, _) in todo.items():
+        content = results.get(cid)
+        if content is None:
+            # summarize_cluster 와 같은 fallback (cache 에는 저장하지 않음)
+            summaries[i] = extract_summary_only(" ".join(caption_groups[i][:3]))
+            continue
+        summary = extract_summary_only(content)
+        summaries[i] = summary
+        if cache is not None:
+            cache.put(key, summary)
+
+    return summaries
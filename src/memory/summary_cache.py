@@ -0,0 +1,232 @@
+# src/memory/summary_cache.py
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+
+class SummaryCache:
+    """
+    Content-addressed, persistent cache for cluster summaries (SQLite).
+
+    key      : sha256 of (model, prompt template, generation params, captions)
+               → make_key()
+    eviction : LRU by last access once max_entries / max_bytes is exceeded
+               (entry count / bytes kept as running totals, no scan per put)
+    read_only: lookups only — no inserts, no access-time updates
+
+    Access times from get() are buffered and written every `access_flush`
+    hits (and before eviction / on close) instead of one commit per hit.
+
+    Safe to share between threads (one connection + lock).
+    """
+
+    def __init__(self, path, max_entries=200_000, max_bytes=None, read_only=False,
+                 access_flush=256):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.read_only = read_only
+        self.access_flush = access_flush
+
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._pending_access = {}  # key → last access time (아직 DB 에 안 씀)
+
+        if read_only:
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"summary cache 없음: {path}")
+            self._conn = sqlite3.connect(
+                f"file:{path}?mode=ro", uri=True, check_same_thread=False
+            )
+            return
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS summaries (
+                key         TEXT PRIMARY KEY,
+                summary     TEXT NOT NULL,
+                size        INTEGER NOT NULL,
+                created     REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_last_access ON summaries (last_access)"
+        )
+        self._conn.commit()
+        self._count, self._bytes = self._totals()
+
+    def _totals(self):
+        # 시작 시 한 번만 scan, 이후에는 put / evict 에서 running total 로 유지
+        return self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM summaries"
+        ).fetchone()
+
+    # ---------------------------------------------------------
+    # key
+    # ---------------------------------------------------------
+    @staticmethod
+    def make_key(model, template, params, captions):
+        payload = json.dumps(
+            {
+                "model": model,
+                "template": template,
+                "params": params,
+                "captions": list(captions),
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    # ---------------------------------------------------------
+    # get / put
+    # ---------------------------------------------------------
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary FROM summaries WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            if not self.read_only:
+                self._pending_access[key] = time.time()
+                if len(self._pending_access) >= self.access_flush:
+                    self._flush_access()
+                    self._conn.commit()
+            return row[0]
+
+    def _flush_access(self):
+        if not self._pending_access:
+            return
+        self._conn.executemany(
+            "UPDATE summaries SET last_access = ? WHERE key = ?",
+            [(t, k) for k, t in self._pending_access.items()],
+        )
+        self._pending_access.clear()
+
+    def put(self, key, summary):
+        if self.read_only:
+            return
+
+        now = time.time()
+        size = len(summary.encode("utf-8"))
+        with self._lock:
+            old = self._conn.execute(
+                "SELECT size FROM summaries WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                """
+                INSERT INTO summaries (key, summary, size, created, last_access)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    summary = excluded.summary,
+                    size = excluded.size,
+                    last_access = excluded.last_access
+                """,
+                (key, summary, size, now, now),
+            )
+            self.writes += 1
+            self._pending_access.pop(key, None)
+            if old is None:
+                self._count += 1
+                self._bytes += size
+            else:
+                self._bytes += size - old[0]
+
+            if self._over_limit(self._count, self._bytes):
+                self._evict()
+            self._conn.commit()
+
+    def _over_limit(self, count, total):
+        return (
+            (self.max_entries is not None and count > self.max_entries)
+            or (self.max_bytes is not None and total > self.max_bytes)
+        )
+
+    def _evict(self):
+        # LRU 순서가 맞도록 밀린 access time 먼저 기록
+        self._flush_access()
+        count, total = self._count, self._bytes
+
+        excess = 0
+        if self.max_entries is not None and count > self.max_entries:
+            excess = count - self.max_entries
+
+        if self.max_bytes is not None and total > self.max_bytes:
+            # 가장 오래 안 쓴 항목부터 용량이 맞을 때까지
+            freed = 0
+            rows = self._conn.execute(
+                "SELECT size FROM summaries ORDER BY last_access ASC"
+            )
+            n = 0
+            for (size,) in rows:
+                if total - freed <= self.max_bytes:
+                    break
+                freed += size
+                n += 1
+            excess = max(excess, n)
+
+        freed = 0
+        if excess:
+            freed = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM ("
+                "SELECT size FROM summaries ORDER BY last_access ASC LIMIT ?)",
+                (excess,),
+            ).fetchone()[0]
+            self._conn.execute(
+                """
+                DELETE FROM summaries WHERE key IN (
+                    SELECT key FROM summaries ORDER BY last_access ASC LIMIT ?
+                )
+                """,
+                (excess,),
+            )
+            self.evictions += excess
+        self._count, self._bytes = count - excess, total - freed
+
+    # ---------------------------------------------------------
+    # stats
+    # ---------------------------------------------------------
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "entries": len(self),
+        }
+
+    def flush(self):
+        """Write buffered access times."""
+        if self.read_only:
+            return
+        with self._lock:
+            self._flush_access()
+            self._conn.commit()
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._conn.close()
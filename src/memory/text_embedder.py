@@ -1,13 +1,184 @@
 # src/memory/text_embedder.py
+import threading
+from collections import OrderedDict
+
 import numpy as np
-from sentence_transformers import SentenceTransformer
 
-model = SentenceTransformer("BAAI/bge-large-en-v1.5")
+DEFAULT_MODEL = "BAAI/bge-large-en-v1.5"
+
+
+def normalize_text(text: str):
+    # cache key: 공백 정리 (앞뒤 공백 / 연속 공백 / 줄바꿈)
+    return " ".join(text.split())
+
+
+class TextEmbedder:
+    """
+    Query embedder with lazy model loading, batching and an LRU cache.
+
+    model_name : sentence-transformers model, loaded on first use
+    batch_size : max texts per encode() call
+    cache_size : LRU capacity in texts (0 → no cache)
+    normalize  : default for embed_many(..., normalize=) — True returns
+                 L2-normalized float32 rows
+    model      : already loaded model (anything with .encode), skips loading
+    """
+
+    def __init__(
+        self,
+        model_name=DEFAULT_MODEL,
+        batch_size=64,
+        cache_size=4096,
+        normalize=False,
+        device=None,
+        model=None,
+    ):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self.normalize = normalize
+        self.device = device
+
+        self._model = model
+        self._model_lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self._dim = None
+
+    # ---------------------------------------------------------
+    # model
+    # ---------------------------------------------------------
+    @property
+    def model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+                    self._model = SentenceTransformer(self.model_name, device=self.device)
+        return self._model
+
+    def _encode(self, texts):
+        emb = self.model.encode(
+            texts,
+            batch_size=len(texts),
+            normalize_embeddings=False,
+        )
+        emb = np.asarray(emb, dtype=np.float32)
+        self._dim = emb.shape[1]
+        return emb
+
+    @property
+    def dim(self):
+        """Embedding dimension (asks the model if nothing was encoded yet)."""
+        if self._dim is None:
+            get_dim = getattr(self.model, "get_sentence_embedding_dimension", None)
+            self._dim = get_dim() if get_dim is not None else None
+            if self._dim is None:
+                self._encode([""])
+        return self._dim
+
+    # ---------------------------------------------------------
+    # cache
+    # ---------------------------------------------------------
+    def _cache_get(self, key):
+        with self._cache_lock:
+            emb = self._cache.get(key)
+            if emb is None:
+                self.misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return emb
+
+    def _cache_put(self, key, emb):
+        if self.cache_size <= 0:
+            return
+        with self._cache_lock:
+            self._cache[key] = emb
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def clear_cache(self):
+        with self._cache_lock:
+            self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._cache),
+        }
+
+    # ---------------------------------------------------------
+    # embedding
+    # ---------------------------------------------------------
+    def embed_many(self, texts, normalize=None):
+        """
+        texts : list of str
+        returns:
+            (N, D) float32 array in input order
+
+        The whitespace-normalized text is only the cache key; the model sees
+        the first original text of each key.
+        """
+        if normalize is None:
+            normalize = self.normalize
+
+        if not texts:
+            return np.empty((0, self.dim), dtype=np.float32)
+
+        keys = [normalize_text(t) for t in texts]
+        first = {}
+        for key, text in zip(keys, texts):
+            first.setdefault(key, text)  # 중복 제거 (순서 유지)
+
+        found = {}
+        pending = []
+        for key in first:
+            emb = self._cache_get(key)
+            if emb is None:
+                pending.append(key)
+            else:
+                found[key] = emb
+
+        # 길이순 정렬 → 비슷한 길이끼리 batch (padding 최소화)
+        pending.sort(key=lambda k: len(first[k]))
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start:start + self.batch_size]
+            for key, emb in zip(batch, self._encode([first[k] for k in batch])):
+                found[key] = emb
+                self._cache_put(key, emb)
+
+        out = np.stack([found[key] for key in keys])
+        if normalize:
+            out /= np.linalg.norm(out, axis=1, keepdims=True) + 1e-8
+        return out
+
+    def embed_text(self, text: str, normalize=None):
+        return self.embed_many([text], normalize=normalize)[0]
+
+
+_default_embedder = None
+_default_lock = threading.Lock()
+
+
+def get_embedder():
+    """Process-wide embedder (model is loaded on the first embed call)."""
+    global _default_embedder
+    if _default_embedder is None:
+        with _default_lock:
+            if _default_embedder is None:
+                _default_embedder = TextEmbedder()
+    return _default_embedder
+
 
 def embed_text(text: str):
-    emb = model.encode(
-        [text],
-        batch_size=1,
-        normalize_embeddings=False
-    )
-    return emb[0]
+    return get_embedder().embed_text(text)
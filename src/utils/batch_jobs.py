@@ -0,0 +1,296 @@
+# src/utils/batch_jobs.py
+#
+# Offline batch mode for chat completions.
+#
+#   requests ──▶ <job_dir>/<name>.part-000.jsonl ──transport.submit──▶ job
+#            ◀── custom_id → content ◀──transport.results── (poll until done)
+#
+# transport:
+#   OpenAIBatchTransport  OpenAI Batch API (/v1/batches)
+#   LocalBatchTransport   file-based stand-in (fake completions, no network)
+
+import os
+import json
+import time
+import uuid
+import random
+import shutil
+from types import SimpleNamespace
+
+from src.utils.llm_pool import run_concurrent
+
+CHAT_COMPLETIONS_URL = "/v1/chat/completions"
+TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+# OpenAI batch input 제한 (200 MB / 50k requests) 보다 약간 작게
+MAX_JOB_BYTES = 180 * 1024 * 1024
+MAX_JOB_REQUESTS = 50_000
+
+
+def chat_request(custom_id, body):
+    """One batch input line for /v1/chat/completions."""
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": CHAT_COMPLETIONS_URL,
+        "body": body,
+    }
+
+
+def _namespace(obj):
+    if isinstance(obj, dict):
+        return SimpleNamespace(**{k: _namespace(v) for k, v in obj.items()})
+    if isinstance(obj, list):
+        return [_namespace(v) for v in obj]
+    return obj
+
+
+# ---------------------------------------------------------
+# Transports
+# ---------------------------------------------------------
+class OpenAIBatchTransport:
+    def __init__(self, client=None, completion_window="24h"):
+        if client is None:
+            from openai import OpenAI
+            client = OpenAI()
+        self.client = client
+        self.completion_window = completion_window
+
+    def submit(self, path):
+        with open(path, "rb") as f:
+            input_file = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=CHAT_COMPLETIONS_URL,
+            completion_window=self.completion_window,
+        )
+        return batch.id
+
+    def status(self, job_id):
+        return self.client.batches.retrieve(job_id).status
+
+    def results(self, job_id):
+        batch = self.client.batches.retrieve(job_id)
+        lines = []
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                text = self.client.files.content(file_id).text
+                lines.extend(json.loads(l) for l in text.splitlines() if l.strip())
+        return lines
+
+    def cancel(self, job_id):
+        self.client.batches.cancel(job_id)
+
+
+class LocalBatchTransport:
+    """
+    File-based stand-in for the Batch API.
+
+    work_dir/<job_id>/input.jsonl  → output.jsonl, state.json
+    Jobs "complete" `delay` seconds after submit (checked on poll);
+    `failure_rate` of the items come back as 429 error lines.
+    """
+
+    def __init__(self, work_dir, delay=0.0, failure_rate=0.0, seed=None):
+        self.work_dir = work_dir
+        self.delay = delay
+        self.failure_rate = failure_rate
+        self._rng = random.Random(seed)
+        os.makedirs(work_dir, exist_ok=True)
+
+    def _job_dir(self, job_id):
+        return os.path.join(self.work_dir, job_id)
+
+    def _state(self, job_id):
+        with open(os.path.join(self._job_dir(job_id), "state.json"), "r") as f:
+            return json.load(f)
+
+    def _set_state(self, job_id, state):
+        with open(os.path.join(self._job_dir(job_id), "state.json"), "w") as f:
+            json.dump(state, f)
+
+    def submit(self, path):
+        job_id = f"batch_local_{uuid.uuid4().hex[:12]}"
+        os.makedirs(self._job_dir(job_id))
+        shutil.copyfile(path, os.path.join(self._job_dir(job_id), "input.jsonl"))
+        self._set_state(job_id, {"status": "in_progress", "submitted": time.time()})
+        return job_id
+
+    def status(self, job_id):
+        state = self._state(job_id)
+        if state["status"] == "in_progress" and time.time() - state["submitted"] >= self.delay:
+            self._process(job_id)
+            state["status"] = "completed"
+            self._set_state(job_id, state)
+        return state["status"]
+
+    def _process(self, job_id):
+        from src.utils.fake_openai import fake_completion_dict
+
+        job_dir = self._job_dir(job_id)
+        with open(os.path.join(job_dir, "input.jsonl"), "r") as fin, \
+                open(os.path.join(job_dir, "output.jsonl"), "w") as fout:
+            for line in fin:
+                req = json.loads(line)
+                if self._rng.random() < self.failure_rate:
+                    response = {
+                        "status_code": 429,
+                        "body": {"error": {"message": "rate limited (fake)"}},
+                    }
+                else:
+                    body = req["body"]
+                    response = {
+                        "status_code": 200,
+                        "body": fake_completion_dict(body.get("model", "fake"), body["messages"]),
+                    }
+                out = {"custom_id": req["custom_id"], "response": response, "error": None}
+                fout.write(json.dumps(out) + "\n")
+
+    def results(self, job_id):
+        path = os.path.join(self._job_dir(job_id), "output.jsonl")
+        if not os.path.exists(path):
+            return []
+        with open(path, "r") as f:
+            return [json.loads(l) for l in f if l.strip()]
+
+    def cancel(self, job_id):
+        state = self._state(job_id)
+        if state["status"] not in TERMINAL_STATUSES:
+            state["status"] = "cancelled"
+            self._set_state(job_id, state)
+
+
+# ---------------------------------------------------------
+# Runner
+# ---------------------------------------------------------
+class BatchRunner:
+    """
+    Write requests to JSONL job file(s), submit, poll, and map the results
+    back by custom_id.
+
+    job_dir       : where job files are written
+    poll_interval : seconds between status checks
+    timeout       : give up (cancel) after this many seconds, None → wait
+    log_usage     : optional callable(response) for each successful result
+                    (same object shape as chat.completions.create)
+    """
+
+    def __init__(self, transport, job_dir, poll_interval=30.0, timeout=None, log_usage=None):
+        self.transport = transport
+        self.job_dir = job_dir
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.log_usage = log_usage
+        os.makedirs(job_dir, exist_ok=True)
+
+    def _write_jobs(self, requests, name):
+        # 요청은 generator 여도 됨 → 이미지 payload 를 메모리에 모두 올리지 않음
+        paths, custom_ids = [], []
+        f, size, count = None, 0, 0
+        for req in requests:
+            line = json.dumps(req, ensure_ascii=False) + "\n"
+            nbytes = len(line.encode("utf-8"))
+            if f is None or size + nbytes > MAX_JOB_BYTES or count >= MAX_JOB_REQUESTS:
+                if f is not None:
+                    f.close()
+                paths.append(os.path.join(self.job_dir, f"{name}.part-{len(paths):03d}.jsonl"))
+                f = open(paths[-1], "w", encoding="utf-8")
+                size, count = 0, 0
+            f.write(line)
+            size += nbytes
+            count += 1
+            custom_ids.append(req["custom_id"])
+        if f is not None:
+            f.close()
+        return paths, custom_ids
+
+    def _wait(self, job_ids):
+        start = time.time()
+        statuses = {}
+        while True:
+            for job_id in job_ids:
+                if statuses.get(job_id) not in TERMINAL_STATUSES:
+                    statuses[job_id] = self.transport.status(job_id)
+
+            pending = [j for j in job_ids if statuses[j] not in TERMINAL_STATUSES]
+            if not pending:
+                return statuses
+
+            if self.timeout is not None and time.time() - start > self.timeout:
+                print(f"[BATCH] timeout → {len(pending)} job(s) 취소")
+                for job_id in pending:
+                    try:
+                        self.transport.cancel(job_id)
+                    except Exception as e:
+                        print(f"[BATCH] cancel 실패 ({job_id}): {e}")
+                    statuses[job_id] = "cancelled"
+                return statuses
+
+            time.sleep(self.poll_interval)
+
+    def run(self, requests, name, fallback=None, fallback_workers=8):
+        """
+        requests : iterable of chat_request(...) dicts
+        fallback : callable(custom_id) → content, used for every item the
+                   batch did not answer (errors, expired, cancelled)
+
+        returns:
+            dict custom_id → content string (None if fallback also failed)
+        """
+        paths, custom_ids = self._write_jobs(requests, name)
+        if not custom_ids:
+            return {}
+
+        job_ids = [self.transport.submit(p) for p in paths]
+        print(f"[BATCH] {name}: {len(custom_ids)} requests, {len(job_ids)} job(s) → {job_ids}")
+
+        statuses = self._wait(job_ids)
+
+        results = {}
+        for job_id in job_ids:
+            if statuses[job_id] != "completed":
+                print(f"[BATCH] job {job_id}: {statuses[job_id]}")
+            for line in self.transport.results(job_id):
+                response = line.get("response") or {}
+                if response.get("status_code") != 200:
+                    continue
+                body = response["body"]
+                results[line["custom_id"]] = body["choices"][0]["message"]["content"].strip()
+                if self.log_usage:
+                    try:
+                        self.log_usage(_namespace(body))
+                    except Exception as e:
+                        print("[WARN] usage logging 실패:", e)
+
+        failed = [cid for cid in custom_ids if cid not in results]
+        print(f"[BATCH] {name}: {len(results)}/{len(custom_ids)} 성공, {len(failed)} 실패")
+
+        if failed and fallback is not None:
+            print(f"[BATCH] 실패한 {len(failed)} 개는 개별 요청으로 재시도")
+
+            def _one(cid):
+                try:
+                    return fallback(cid)
+                except Exception as e:
+                    print(f"[BATCH] fallback 실패 ({cid}): {e}")
+                    return None
+
+            for cid, content in zip(failed, run_concurrent(_one, failed, fallback_workers)):
+                results[cid] = content
+
+        for cid in failed:
+            results.setdefault(cid, None)
+        return results
+
+
+def make_batch_runner(kind, job_dir, poll_interval=30.0, timeout=None, log_usage=None):
+    """kind: "openai" or "local" (LocalBatchTransport under <job_dir>/local)."""
+    if kind == "openai":
+        transport = OpenAIBatchTransport()
+    elif kind == "local":
+        transport = LocalBatchTransport(os.path.join(job_dir, "local"))
+    else:
+        raise ValueError("batch transport must be 'openai' or 'local'")
+    return BatchRunner(
+        transport, job_dir, poll_interval=poll_interval, timeout=timeout, log_usage=log_usage
+    )
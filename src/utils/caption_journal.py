@@ -0,0 +1,124 @@
+# src/utils/caption_journal.py
+
+import os
+import json
+import hashlib
+import threading
+
+
+def file_sha1(path, chunk=1 << 20):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def text_sha1(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class CaptionJournal:
+    """
+    Append-only JSONL journal of finished captions.
+
+    one line per caption:
+        {"node_id", "image_sha1", "model", "prompt_sha1", "settings", "caption"}
+
+    settings : request settings that change what the model sees (payload
+               max_side / jpeg quality / detail); a caption is only reused
+               under the same settings. None = original image, API default.
+
+    Each line is flushed as soon as it is written, so an interrupted run
+    loses at most the requests that were still in flight. A truncated last
+    line (crash mid-write) is ignored on load; later lines win over
+    earlier ones for the same node.
+
+    An existing journal is always loaded and appended to; fresh=True
+    discards it instead.
+    """
+
+    def __init__(self, path, model, prompt, fresh=False, settings=None):
+        self.path = path
+        self.model = model
+        self.prompt_sha1 = text_sha1(prompt)
+        self.settings = settings
+        self.entries = {}
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if fresh or not os.path.exists(path):
+            self._f = open(path, "w", encoding="utf-8")
+            return
+
+        self._load()
+        self._f = open(path, "a", encoding="utf-8")
+        # crash 로 마지막 줄이 잘렸으면 다음 entry 가 그 뒤에 붙지 않도록 줄바꿈
+        if not self._ends_with_newline():
+            self._f.write("\n")
+            self._f.flush()
+
+    def _ends_with_newline(self):
+        with open(self.path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() == 0:
+                return True
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def _load(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if not isinstance(entry, dict) or "node_id" not in entry or "image_sha1" not in entry:
+                    continue
+                self.entries[entry["node_id"]] = entry
+
+    def lookup(self, node_id, image_sha1):
+        """같은 이미지 / 모델 / prompt / settings 로 이미 만든 caption 이 있으면 반환."""
+        entry = self.entries.get(node_id)
+        if (
+            entry is None
+            or entry["image_sha1"] != image_sha1
+            or entry.get("model") != self.model
+            or entry.get("prompt_sha1") != self.prompt_sha1
+            or entry.get("settings") != self.settings
+        ):
+            return None
+        return entry["caption"]
+
+    def append(self, node_id, image_sha1, caption):
+        entry = {
+            "node_id": node_id,
+            "image_sha1": image_sha1,
+            "model": self.model,
+            "prompt_sha1": self.prompt_sha1,
+            "settings": self.settings,
+            "caption": caption,
+        }
+        line = json.dumps(entry, ensure_ascii=False)
+        with self._lock:
+            self._f.write(line + "\n")
+            self._f.flush()
+            self.entries[node_id] = entry
+
+    def compact(self):
+        """journal 을 node 당 최신 1줄로 다시 씀 (tmp → rename)."""
+        with self._lock:
+            self._f.close()
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                for entry in self.entries.values():
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            os.replace(tmp, self.path)
+            self._f = open(self.path, "a", encoding="utf-8")
+
+    def close(self):
+        with self._lock:
+            self._f.close()
+
+    def __len__(self):
+        return len(self.entries)
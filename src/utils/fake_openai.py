@@ -0,0 +1,192 @@
+# src/utils/fake_openai.py
+#
+# 네트워크 없이 LLM 파이프라인을 테스트하기 위한 OpenAI 대역.
+#
+#   1) in-process:  client = FakeOpenAI(latency=0.2, failure_rate=0.1)
+#   2) local HTTP:  uv run python -m src.utils.fake_openai --port 8765
+#                   OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=fake ...
+
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from types import SimpleNamespace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeAPIError(Exception):
+    def __init__(self, message, status_code=500):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _message_text(messages):
+    parts = []
+    for m in messages:
+        content = m.get("content")
+        if isinstance(content, str):
+            parts.append(content)
+        elif isinstance(content, list):
+            for c in content:
+                if c.get("type") == "text":
+                    parts.append(c["text"])
+                elif c.get("type") == "image_url":
+                    url = c["image_url"]["url"]
+                    parts.append(hashlib.sha1(url.encode()).hexdigest())
+    return "\n".join(parts)
+
+
+def _has_image(messages):
+    return any(
+        isinstance(m.get("content"), list)
+        and any(c.get("type") == "image_url" for c in m["content"])
+        for m in messages
+    )
+
+
+def fake_completion_text(messages):
+    """입력에 대해 결정적인 (deterministic) 응답 텍스트 생성."""
+    digest = hashlib.sha1(_message_text(messages).encode()).hexdigest()[:12]
+    if _has_image(messages):
+        return json.dumps({
+            "Description": f"Fake scene {digest}.",
+            "Objects": "wall, floor, door",
+        })
+    return json.dumps({"Summary": f"Fake area summary {digest}."})
+
+
+def fake_completion_dict(model, messages):
+    content = fake_completion_text(messages)
+    prompt_tokens = max(1, len(_message_text(messages)) // 4)
+    completion_tokens = max(1, len(content) // 4)
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+def _to_namespace(obj):
+    if isinstance(obj, dict):
+        return SimpleNamespace(**{k: _to_namespace(v) for k, v in obj.items()})
+    if isinstance(obj, list):
+        return [_to_namespace(v) for v in obj]
+    return obj
+
+
+class _Completions:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def create(self, model, messages, **kwargs):
+        return self._owner._complete(model, messages)
+
+
+class FakeOpenAI:
+    """
+    `client.chat.completions.create(...)` 만 흉내내는 in-process client.
+
+    latency      : 요청당 대기 시간 (초)
+    failure_rate : 이 확률로 FakeAPIError(status_code=429) 발생
+    """
+
+    def __init__(self, latency=0.0, failure_rate=0.0, seed=None):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+        self.chat = SimpleNamespace(completions=_Completions(self))
+
+    def _complete(self, model, messages):
+        with self._lock:
+            self.calls += 1
+            fail = self._rng.random() < self.failure_rate
+            if fail:
+                self.failures += 1
+
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise FakeAPIError("rate limited (fake)", status_code=429)
+
+        return _to_namespace(fake_completion_dict(model, messages))
+
+
+# ---------------------------------------------------------
+# Local HTTP endpoint (/v1/chat/completions)
+# ---------------------------------------------------------
+def make_handler(latency=0.0, failure_rate=0.0):
+    rng = random.Random()
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, code, payload, headers=None):
+            body = json.dumps(payload).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            req = json.loads(self.rfile.read(length) or b"{}")
+
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._send(404, {"error": {"message": f"unknown path {self.path}"}})
+                return
+
+            if latency:
+                time.sleep(latency)
+            if rng.random() < failure_rate:
+                self._send(429, {"error": {"message": "rate limited (fake)"}},
+                           headers={"Retry-After": "0.1"})
+                return
+
+            self._send(200, fake_completion_dict(req.get("model", "fake"), req.get("messages", [])))
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return Handler
+
+
+def serve(host="127.0.0.1", port=8765, latency=0.0, failure_rate=0.0):
+    server = ThreadingHTTPServer((host, port), make_handler(latency, failure_rate))
+    print(f"[FAKE OPENAI] http://{host}:{server.server_address[1]}/v1")
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--failure_rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = serve(args.host, args.port, args.latency, args.failure_rate)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# src/utils/frame_dedup.py
+#
+# Near-duplicate frame detection with a difference hash (dHash).
+#
+#   dhash      : 64-bit hash from a 9×8 grayscale thumbnail (horizontal gradients)
+#   find_aliases : each frame is compared against the representatives of the
+#                  previous `window` frames (XOR + popcount, vectorized)
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import cv2
+
+
+def dhash(path):
+    """64-bit dHash of an image file (None if the image cannot be read)."""
+    # 1/8 축소 디코딩 → 어차피 9×8 로 줄이므로 충분
+    img = cv2.imread(path, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if img is None:
+        return None
+    small = cv2.resize(img, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = small[:, 1:] > small[:, :-1]
+    return int(np.packbits(bits.flatten()).view(">u8")[0])
+
+
+def compute_hashes(paths, workers=None):
+    """dHash of every path (process pool), None where the image is missing."""
+    if workers is not None and workers <= 1:
+        return [dhash(p) if p else None for p in paths]
+
+    todo = [i for i, p in enumerate(paths) if p]
+    hashes = [None] * len(paths)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for i, h in zip(todo, pool.map(dhash, [paths[i] for i in todo], chunksize=32)):
+            hashes[i] = h
+    return hashes
+
+
+def hamming(a, b):
+    """Bitwise Hamming distance between uint64 arrays / scalars."""
+    return np.bitwise_count(np.bitwise_xor(a, b))
+
+
+def find_aliases(hashes, window=10, max_distance=6):
+    """
+    hashes       : list of int (or None), in temporal order
+    window       : compare only with the previous `window` frames
+    max_distance : Hamming distance (of 64 bits) counted as near-duplicate
+
+    returns:
+        alias_of : list of index or None
+                   (index of the representative frame, never another alias)
+    """
+    n = len(hashes)
+    valid = np.array([h is not None for h in hashes])
+    codes = np.array([h if h is not None else 0 for h in hashes], dtype=np.uint64)
+
+    alias_of = [None] * n
+    rep_of = np.arange(n)  # 각 frame 의 대표 frame index
+
+    for i in range(n):
+        if not valid[i]:
+            continue
+
+        lo = max(0, i - window)
+        cand = np.unique(rep_of[lo:i][valid[lo:i]])
+        if len(cand) == 0:
+            continue
+
+        dist = hamming(codes[cand], codes[i])
+        best = int(np.argmin(dist))
+        if dist[best] <= max_distance:
+            rep = int(cand[best])
+            alias_of[i] = rep
+            rep_of[i] = rep
+
+    return alias_of
@@ -0,0 +1,167 @@
+# src/utils/frame_io.py
+#
+# Raw camera frame → resized node frame (decode / resize / write) in a
+# process pool, skipping frames that are already up to date.
+#
+#   manifest.json (in the output dir):
+#       { "<frame file>": {"source", "mtime_ns", "size", "settings"}, ... }
+
+import os
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+MANIFEST_NAME = "manifest.json"
+
+# cv2.imread 축소 디코딩 flag (JPEG 은 DCT 단계에서 바로 1/2, 1/4, 1/8 로 디코딩)
+REDUCED_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+
+def reduced_decode_factor(src_size, dst_size):
+    """
+    Largest 1/2^k decode factor that still leaves the image at least as big
+    as the target, so the final INTER_AREA resize only ever shrinks.
+
+    src_size, dst_size : (width, height)
+    """
+    factor = 1
+    for f in (2, 4, 8):
+        if src_size[0] // f >= dst_size[0] and src_size[1] // f >= dst_size[1]:
+            factor = f
+    return factor
+
+
+def _settings_tag(dst_size, factor):
+    return f"{dst_size[0]}x{dst_size[1]}/r{factor}"
+
+
+def _source_stat(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def _process_frame(job):
+    # ProcessPool worker: (src, dst, dst_size, factor) → (dst, ok)
+    src, dst, dst_size, factor = job
+
+    img = cv2.imread(src, REDUCED_FLAGS[factor])
+    if img is not None and (img.shape[1] < dst_size[0] or img.shape[0] < dst_size[1]):
+        # 예상보다 작은 frame → 원본 해상도로 다시 디코딩
+        img = cv2.imread(src)
+    if img is None:
+        return dst, False
+
+    img = cv2.resize(img, dst_size, interpolation=cv2.INTER_AREA)
+
+    # 중간에 죽어도 깨진 jpg 가 남지 않도록 tmp → rename
+    tmp = dst + ".tmp.jpg"
+    if not cv2.imwrite(tmp, img):
+        return dst, False
+    os.replace(tmp, dst)
+    return dst, True
+
+
+def load_manifest(out_dir):
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_manifest(out_dir, manifest):
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def process_frames(jobs, out_dir, dst_size=(1024, 810), src_size=None, workers=None,
+                   reduced_decode=True):
+    """
+    Decode / resize / write frames in a process pool.
+
+    jobs           : list of (src_path, dst_path), dst inside out_dir
+    src_size       : (width, height) of the raw frames; None → read from the
+                     first frame (all frames of one camera share a size)
+    reduced_decode : use cv2.IMREAD_REDUCED_COLOR_{2,4,8} when the target allows
+
+    Frames whose output exists and whose source path / mtime / size / settings
+    match the manifest are skipped.
+
+    returns:
+        (set of dst paths that exist and are up to date, stats dict)
+    """
+    t0 = time.perf_counter()
+
+    factor = 1
+    if reduced_decode and jobs:
+        if src_size is None:
+            first = cv2.imread(jobs[0][0])
+            src_size = (first.shape[1], first.shape[0]) if first is not None else dst_size
+        factor = reduced_decode_factor(src_size, dst_size)
+    settings = _settings_tag(dst_size, factor)
+
+    manifest = load_manifest(out_dir)
+    done, todo, stats_of = set(), [], {}
+    for src, dst in jobs:
+        mtime_ns, size = _source_stat(src)
+        stats_of[dst] = {"source": src, "mtime_ns": mtime_ns, "size": size, "settings": settings}
+
+        entry = manifest.get(os.path.basename(dst))
+        if (
+            entry is not None
+            and os.path.exists(dst)
+            and entry.get("source") == src  # 같은 dst 가 다른 raw frame 을 가리킬 수 있음
+            and entry.get("mtime_ns") == mtime_ns
+            and entry.get("size") == size
+            and entry.get("settings") == settings
+        ):
+            done.add(dst)
+        else:
+            todo.append((src, dst, tuple(dst_size), factor))
+
+    failed = 0
+    if todo:
+        if workers is not None and workers <= 1:
+            results = map(_process_frame, todo)
+            pool = None
+        else:
+            pool = ProcessPoolExecutor(max_workers=workers)
+            results = pool.map(_process_frame, todo, chunksize=8)
+
+        try:
+            for i, (dst, ok) in enumerate(results, 1):
+                if ok:
+                    done.add(dst)
+                    manifest[os.path.basename(dst)] = stats_of[dst]
+                else:
+                    failed += 1
+                    print(f"[WARN] frame 처리 실패: {dst}")
+                if i % 500 == 0:
+                    rate = i / (time.perf_counter() - t0)
+                    print(f"[FRAMES] {i}/{len(todo)} ({rate:.1f} frames/s)")
+        finally:
+            if pool is not None:
+                pool.shutdown()
+            # 중단되더라도 끝난 frame 은 다음 실행에서 건너뜀
+            save_manifest(out_dir, manifest)
+
+    elapsed = time.perf_counter() - t0
+    stats = {
+        "frames": len(jobs),
+        "written": len(todo) - failed,
+        "skipped": len(jobs) - len(todo),
+        "failed": failed,
+        "decode_factor": factor,
+        "seconds": elapsed,
+        "frames_per_sec": (len(todo) - failed) / elapsed if todo and elapsed > 0 else 0.0,
+    }
+    return done, stats
@@ -0,0 +1,216 @@
+# src/utils/image_payload.py
+#
+# Captioning 요청에 넣을 이미지 payload 준비 단계.
+#
+#   source jpg ──(resize to max_side, re-encode at quality)──▶ cache_dir/<key>.jpg
+#
+# key = sha1(source bytes) + settings → 같은 이미지 / 같은 설정은 한 번만 인코딩.
+
+import os
+import json
+import math
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+from src.utils.caption_journal import file_sha1
+
+DETAIL_LEVELS = ("low", "high", "auto")
+
+
+def estimate_image_tokens(width, height, detail="auto"):
+    """
+    Vision token estimate (OpenAI tile rule for gpt-4o family).
+
+    low        : 85 flat
+    high/auto  : fit in 2048×2048, shortest side → 768, 170 per 512px tile + 85
+    """
+    if detail == "low" or not width or not height:
+        return 85
+
+    scale = min(1.0, 2048 / max(width, height))
+    w, h = width * scale, height * scale
+    scale = min(1.0, 768 / min(w, h))
+    w, h = w * scale, h * scale
+    return 170 * math.ceil(w / 512) * math.ceil(h / 512) + 85
+
+
+def payload_key(source_sha1, max_side, quality):
+    settings = f"max_side={max_side},quality={quality}"
+    return hashlib.sha1(f"{source_sha1}|{settings}".encode()).hexdigest()
+
+
+def _encode_payload(job):
+    # ProcessPool worker: (src_path, out_path, max_side, quality) → metadata
+    src_path, out_path, max_side, quality = job
+
+    img = cv2.imread(src_path)
+    if img is None:
+        raise ValueError(f"이미지를 읽을 수 없음: {src_path}")
+    src_h, src_w = img.shape[:2]
+
+    scale = 1.0
+    if max_side is not None and max(src_h, src_w) > max_side:
+        scale = max_side / max(src_h, src_w)
+        img = cv2.resize(
+            img,
+            (round(src_w * scale), round(src_h * scale)),
+            interpolation=cv2.INTER_AREA,
+        )
+    h, w = img.shape[:2]
+
+    ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError(f"JPEG 인코딩 실패: {src_path}")
+
+    tmp = out_path + f".{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(buf.tobytes())
+    os.replace(tmp, out_path)
+
+    meta = {
+        "width": w,
+        "height": h,
+        "source_width": src_w,
+        "source_height": src_h,
+        "source_bytes": os.path.getsize(src_path),
+        "bytes": len(buf),
+    }
+    with open(out_path[:-len(".jpg")] + ".json", "w") as f:
+        json.dump(meta, f)
+    return meta
+
+
+def _encode_payload_safe(job):
+    # 실패해도 batch 전체가 멈추지 않도록 (meta, error) 로 돌려줌
+    try:
+        return _encode_payload(job), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def _source_meta(src_path):
+    # 인코딩 실패 시 원본 그대로 보낼 때의 metadata (meta 파일은 캐시하지 않음)
+    img = cv2.imread(src_path)
+    h, w = img.shape[:2] if img is not None else (0, 0)
+    size = os.path.getsize(src_path) if os.path.exists(src_path) else 0
+    return {
+        "width": w,
+        "height": h,
+        "source_width": w,
+        "source_height": h,
+        "source_bytes": size,
+        "bytes": size,
+    }
+
+
+def prepare_payloads(
+    image_paths,
+    cache_dir,
+    max_side=768,
+    quality=85,
+    detail="auto",
+    workers=4,
+    source_hashes=None,
+):
+    """
+    Build (or reuse) scaled JPEG payloads for `image_paths`.
+
+    source_hashes : optional list of sha1 per image (already computed, e.g.
+                    by the caption journal) → cache hits skip reading the source
+
+    returns:
+        (payloads, report)
+        payloads : list (input order) of dicts with "path" (payload jpg),
+                   "detail", "tokens", sizes; an image that fails to encode
+                   falls back to its original path with "failed": True
+        report   : bytes / estimated vision tokens before and after
+    """
+    if detail not in DETAIL_LEVELS:
+        raise ValueError(f"detail must be one of {DETAIL_LEVELS}")
+
+    os.makedirs(cache_dir, exist_ok=True)
+
+    payloads = [None] * len(image_paths)
+    jobs, job_index = [], []
+    cached = failed = 0
+
+    def fallback(i, src, error):
+        print(f"[WARN] payload 준비 실패 → 원본 사용: {src} ({error})")
+        payloads[i] = dict(_source_meta(src), path=src, failed=True)
+
+    for i, src in enumerate(image_paths):
+        sha1 = source_hashes[i] if source_hashes is not None else None
+        if sha1 is None:
+            # hash 도 image 별로: 읽을 수 없는 source 하나 때문에 전체가 멈추지 않도록
+            try:
+                sha1 = file_sha1(src)
+            except OSError as e:
+                fallback(i, src, f"{type(e).__name__}: {e}")
+                failed += 1
+                continue
+
+        key = payload_key(sha1, max_side, quality)
+        out_path = os.path.join(cache_dir, key + ".jpg")
+        meta_path = os.path.join(cache_dir, key + ".json")
+
+        if os.path.exists(out_path) and os.path.exists(meta_path):
+            with open(meta_path, "r") as f:
+                payloads[i] = dict(json.load(f), path=out_path)
+            cached += 1
+        else:
+            jobs.append((src, out_path, max_side, quality))
+            job_index.append(i)
+
+    encoded = 0
+    if jobs:
+        if workers is None or workers <= 1:
+            results = [_encode_payload_safe(job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_encode_payload_safe, jobs, chunksize=16))
+        for i, job, (meta, error) in zip(job_index, jobs, results):
+            if error is None:
+                payloads[i] = dict(meta, path=job[1])
+                encoded += 1
+            else:
+                fallback(i, job[0], error)
+                failed += 1
+
+    report = {
+        "images": len(payloads),
+        "encoded": encoded,
+        "cached": cached,
+        "failed": failed,
+        "source_bytes": 0,
+        "payload_bytes": 0,
+        "source_tokens": 0,
+        "payload_tokens": 0,
+    }
+    for p in payloads:
+        p["detail"] = detail
+        p["tokens"] = estimate_image_tokens(p["width"], p["height"], detail)
+        report["source_bytes"] += p["source_bytes"]
+        report["payload_bytes"] += p["bytes"]
+        # 기존 요청: 원본 그대로, detail 미지정 (= auto)
+        report["source_tokens"] += estimate_image_tokens(
+            p["source_width"], p["source_height"], "auto"
+        )
+        report["payload_tokens"] += p["tokens"]
+
+    return payloads, report
+
+
+def format_report(report):
+    mb = 1024 * 1024
+    saved_bytes = report["source_bytes"] - report["payload_bytes"]
+    saved_tokens = report["source_tokens"] - report["payload_tokens"]
+    return (
+        f"{report['images']} images ({report['encoded']} encoded, "
+        f"{report['cached']} cached, {report.get('failed', 0)} failed) | "
+        f"bytes {report['source_bytes'] / mb:.1f} → {report['payload_bytes'] / mb:.1f} MB "
+        f"(saved {saved_bytes / mb:.1f} MB) | "
+        f"vision tokens {report['source_tokens']} → {report['payload_tokens']} "
+        f"(saved {saved_tokens})"
+    )
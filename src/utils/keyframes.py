@@ -0,0 +1,104 @@
+# src/utils/keyframes.py
+
+import numpy as np
+
+
+def rotation_angle_deg(q1, q2):
+    """Angle (deg) of the relative rotation between two unit quaternions."""
+    d = abs(float(np.dot(q1, q2)))
+    return float(np.degrees(2.0 * np.arccos(min(1.0, d))))
+
+
+def trajectory_length(positions):
+    positions = np.asarray(positions, dtype=float)
+    if len(positions) < 2:
+        return 0.0
+    return float(np.linalg.norm(np.diff(positions, axis=0), axis=1).sum())
+
+
+def spacing_for_budget(positions, budget):
+    """
+    Path spacing that spreads `budget` keyframes evenly over the trajectory
+    (first frame included, so budget - 1 intervals).
+    """
+    if budget is None or budget <= 0:
+        return None
+    return trajectory_length(positions) / max(budget - 1, 1)
+
+
+class KeyframeSelector:
+    """
+    Streaming keyframe selection over a time-sorted trajectory.
+
+    A frame is kept when, since the last keyframe,
+        - the camera moved >= min_translation (straight-line, m), or
+        - the camera turned >= min_rotation_deg, or
+        - the travelled path length reached `spacing` (m)
+          (use spacing_for_budget() to derive it from a node budget)
+
+    The first frame is always kept. With no criterion set, every frame is
+    kept (same as no selection).
+
+    usage:
+        selector = KeyframeSelector(min_translation=0.5, min_rotation_deg=20)
+        for pos, quat in trajectory:
+            if selector.offer(pos, quat):
+                ...
+    """
+
+    def __init__(self, min_translation=None, min_rotation_deg=None, spacing=None):
+        self.min_translation = min_translation
+        self.min_rotation_deg = min_rotation_deg
+        self.spacing = spacing
+
+        self._key_pos = None
+        self._key_quat = None
+        self._prev_pos = None
+        self._travelled = 0.0
+
+        self.offered = 0
+        self.kept = 0
+
+    @property
+    def active(self):
+        return any(v is not None for v in (self.min_translation, self.min_rotation_deg, self.spacing))
+
+    def offer(self, position, quaternion):
+        """
+        position   : (3,) camera position
+        quaternion : (4,) unit quaternion (any fixed component order)
+        returns True if this frame becomes a keyframe
+        """
+        position = np.asarray(position, dtype=float)
+        quaternion = np.asarray(quaternion, dtype=float)
+        self.offered += 1
+
+        if self._prev_pos is not None:
+            self._travelled += float(np.linalg.norm(position - self._prev_pos))
+        self._prev_pos = position
+
+        if self._key_pos is None or not self.active or self._passes(position, quaternion):
+            self._key_pos = position
+            self._key_quat = quaternion
+            self._travelled = 0.0
+            self.kept += 1
+            return True
+        return False
+
+    def _passes(self, position, quaternion):
+        if self.min_translation is not None:
+            if np.linalg.norm(position - self._key_pos) >= self.min_translation:
+                return True
+        if self.min_rotation_deg is not None:
+            if rotation_angle_deg(quaternion, self._key_quat) >= self.min_rotation_deg:
+                return True
+        if self.spacing is not None and self._travelled >= self.spacing:
+            return True
+        return False
+
+    def stats(self):
+        return {
+            "offered": self.offered,
+            "kept": self.kept,
+            "ratio": self.kept / self.offered if self.offered else 0.0,
+        }
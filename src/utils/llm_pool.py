@@ -0,0 +1,61 @@
+# src/utils/llm_pool.py
+
+import time
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+
+def retry_after_seconds(exc):
+    """Retry-After 헤더 (초) 가 있으면 반환, 없으면 None."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_rate_limit_error(exc):
+    return getattr(exc, "status_code", None) == 429 or type(exc).__name__ == "RateLimitError"
+
+
+def call_with_retries(
+    fn, *args, retries=3, backoff=1.0, max_backoff=30.0, on_retry=None, **kwargs
+):
+    """
+    fn(*args, **kwargs) 를 호출하고 실패하면 지수 backoff (+ jitter) 로 재시도.
+    Retry-After 가 있으면 그 값을 우선 사용. 마지막 실패는 그대로 raise.
+
+    on_retry(exc, delay) : 대기 직전에 호출 (예: 429 시 공유 rate limiter 정지)
+    """
+    for attempt in range(retries + 1):
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            if attempt == retries:
+                raise
+
+            delay = retry_after_seconds(e)
+            if delay is None:
+                delay = min(max_backoff, backoff * (2 ** attempt))
+                delay *= 0.5 + random.random() / 2
+
+            print(f"[RETRY] {type(e).__name__}: {e} → {delay:.1f}s 후 재시도 "
+                  f"({attempt + 1}/{retries})")
+            if on_retry is not None:
+                on_retry(e, delay)
+            time.sleep(delay)
+
+
+def run_concurrent(fn, items, max_workers=8):
+    """
+    items 의 각 원소에 fn 을 thread pool 로 동시에 적용.
+    결과는 입력 순서대로 반환 (max_workers <= 1 이면 순차 실행).
+    """
+    items = list(items)
+    if max_workers is None or max_workers <= 1 or len(items) <= 1:
+        return [fn(item) for item in items]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+        return list(pool.map(fn, items))
@@ -1,5 +1,6 @@
 import csv
 import os
+import threading
 from datetime import datetime
 
 LOG_FILE = "/disks/ssd1/kmw2622/workspace/embodied-rag/log/openai_api_usage_log.csv"
@@ -25,6 +26,10 @@ PRICES = {
     "gpt-3.5-turbo": {"prompt": 0.50 / 1_000_000, "completion": 1.50 / 1_000_000},
 }
 
+# 동시 요청(thread pool)에서 CSV 행이 섞이지 않도록
+_LOG_LOCK = threading.Lock()
+
+
 def log_openai_usage(response, prompt=None):
     try:
         model = getattr(response, "model", "unknown")
@@ -51,7 +56,7 @@ def log_openai_usage(response, prompt=None):
         total_cost = prompt_cost + completion_cost
 
         # CSV에 기록
-        with open(LOG_FILE, mode="a", newline="", encoding="utf-8") as f:
+        with _LOG_LOCK, open(LOG_FILE, mode="a", newline="", encoding="utf-8") as f:
             writer = csv.writer(f)
             writer.writerow([
                 datetime.now().isoformat(),
@@ -0,0 +1,144 @@
+# src/utils/pose_batch.py
+#
+# Vectorized pose math on whole trajectories.
+#
+#   quaternions : (N, 4), order "xyzw" (node JSON / scipy) or "wxyz" (kapture)
+#   translations: (N, 3)
+#   matrices    : (N, 3, 3)
+#
+# 모든 함수는 (4,) / (3,) 단일 입력도 받아 (1, ...) 배열로 처리한다.
+
+import numpy as np
+
+ORDERS = ("xyzw", "wxyz")
+
+
+def _as_quats(q):
+    return np.atleast_2d(np.asarray(q, dtype=np.float64))
+
+
+def _check_order(order):
+    if order not in ORDERS:
+        raise ValueError(f"order must be one of {ORDERS}")
+
+
+def xyzw_to_wxyz(q):
+    return _as_quats(q)[:, [3, 0, 1, 2]]
+
+
+def wxyz_to_xyzw(q):
+    return _as_quats(q)[:, [1, 2, 3, 0]]
+
+
+def _split(q, order):
+    # → (w (N,1), v (N,3)) 단위 quaternion
+    _check_order(order)
+    q = _as_quats(q)
+    q = q / np.linalg.norm(q, axis=1, keepdims=True)
+    if order == "xyzw":
+        return q[:, 3:], q[:, :3]
+    return q[:, :1], q[:, 1:]
+
+
+def _join(w, v, order):
+    if order == "xyzw":
+        return np.concatenate([v, w], axis=1)
+    return np.concatenate([w, v], axis=1)
+
+
+def canonicalize(q, order="xyzw"):
+    """Flip sign so that w >= 0 (q and -q are the same rotation)."""
+    w, v = _split(q, order)
+    sign = np.where(w < 0, -1.0, 1.0)
+    return _join(w * sign, v * sign, order)
+
+
+def conjugate(q, order="xyzw"):
+    """Inverse rotation of unit quaternions."""
+    w, v = _split(q, order)
+    return _join(w, -v, order)
+
+
+def rotate_vectors(q, vectors, order="xyzw"):
+    """Rotate (N, 3) (or one (3,) shared) vectors by (N, 4) quaternions."""
+    w, v = _split(q, order)
+    vectors = np.broadcast_to(np.asarray(vectors, dtype=np.float64), v.shape)
+    uv = np.cross(v, vectors)
+    return vectors + 2.0 * (w * uv + np.cross(v, uv))
+
+
+def quat_to_matrix(q, order="xyzw"):
+    """(N, 4) → (N, 3, 3) rotation matrices."""
+    w, v = _split(q, order)
+    w = w[:, 0]
+    x, y, z = v[:, 0], v[:, 1], v[:, 2]
+
+    R = np.empty((len(w), 3, 3))
+    R[:, 0, 0] = 1 - 2 * (y * y + z * z)
+    R[:, 0, 1] = 2 * (x * y - z * w)
+    R[:, 0, 2] = 2 * (x * z + y * w)
+    R[:, 1, 0] = 2 * (x * y + z * w)
+    R[:, 1, 1] = 1 - 2 * (x * x + z * z)
+    R[:, 1, 2] = 2 * (y * z - x * w)
+    R[:, 2, 0] = 2 * (x * z - y * w)
+    R[:, 2, 1] = 2 * (y * z + x * w)
+    R[:, 2, 2] = 1 - 2 * (x * x + y * y)
+    return R
+
+
+def matrix_to_quat(R, order="xyzw"):
+    """
+    (N, 3, 3) rotation matrices → (N, 4) unit quaternions with w >= 0.
+    Shepperd's method: per row, the numerically largest of w, x, y, z is
+    recovered first.
+    """
+    _check_order(order)
+    R = np.asarray(R, dtype=np.float64).reshape(-1, 3, 3)
+    m00, m11, m22 = R[:, 0, 0], R[:, 1, 1], R[:, 2, 2]
+    trace = m00 + m11 + m22
+
+    # 4 w^2, 4 x^2, 4 y^2, 4 z^2 후보
+    cand = np.stack([1 + trace, 1 + m00 - m11 - m22, 1 - m00 + m11 - m22, 1 - m00 - m11 + m22], axis=1)
+    k = np.argmax(cand, axis=1)
+    s = 2.0 * np.sqrt(np.maximum(cand[np.arange(len(R)), k], 1e-12))
+
+    d21 = R[:, 2, 1] - R[:, 1, 2]
+    d02 = R[:, 0, 2] - R[:, 2, 0]
+    d10 = R[:, 1, 0] - R[:, 0, 1]
+    s01 = R[:, 0, 1] + R[:, 1, 0]
+    s02 = R[:, 0, 2] + R[:, 2, 0]
+    s12 = R[:, 1, 2] + R[:, 2, 1]
+
+    wxyz = np.empty((len(R), 4))
+    for case, cols in enumerate((
+        (s / 4, d21 / s, d02 / s, d10 / s),
+        (d21 / s, s / 4, s01 / s, s02 / s),
+        (d02 / s, s01 / s, s / 4, s12 / s),
+        (d10 / s, s02 / s, s12 / s, s / 4),
+    )):
+        rows = k == case
+        for j, col in enumerate(cols):
+            wxyz[rows, j] = col[rows]
+
+    q = canonicalize(wxyz, "wxyz")
+    return q if order == "wxyz" else wxyz_to_xyzw(q)
+
+
+def invert_poses(q, t, order="xyzw"):
+    """
+    world → camera  ⇄  camera → world for whole trajectories.
+
+    (q, t) maps x to R(q) x + t; the inverse is (conj(q), -R(q)^T t).
+    returns (q_inv (N, 4) in the same order, t_inv (N, 3))
+    """
+    q_inv = conjugate(q, order)
+    t = np.atleast_2d(np.asarray(t, dtype=np.float64))
+    return q_inv, -rotate_vectors(q_inv, t, order)
+
+
+def forward_vectors(q, order="xyzw", axis=(0.0, 0.0, 1.0)):
+    """
+    World-frame viewing direction of camera → world quaternions
+    (camera +Z by default).
+    """
+    return rotate_vectors(q, np.asarray(axis, dtype=np.float64), order)
@@ -0,0 +1,169 @@
+# src/utils/pose_index.py
+#
+# Columnar per-camera pose cache for a kapture mapping dataset.
+#
+#   <cache_dir>/manifest.json            sources (mtime / size), cameras
+#   <cache_dir>/<camera_id>/timestamps.npy   (N,)   int64, sorted
+#                          positions.npy    (N, 3) float64, camera → world t
+#                          quaternions.npy  (N, 4) float64, camera → world [x, y, z, w]
+#                          image_paths.npy  (N,)   str, relative to sensors/records_data
+#                                                  ("" if the pose has no image)
+#
+# kapture_from_dir 대신 sensors/trajectories.txt, sensors/records_camera.txt
+# 두 파일만 읽는다. source 파일이 바뀌면 (mtime / size) 자동으로 다시 만든다.
+
+import os
+import json
+import hashlib
+
+import numpy as np
+
+from src.utils.pose_batch import canonicalize, invert_poses, wxyz_to_xyzw
+
+POSE_INDEX_VERSION = 1
+SOURCE_FILES = ("trajectories.txt", "records_camera.txt")
+COLUMNS = ("timestamps", "positions", "quaternions", "image_paths")
+
+
+class CameraPoses:
+    """Pose columns of one camera (arrays are loaded from the cache)."""
+
+    def __init__(self, camera_id, timestamps, positions, quaternions, image_paths, records_dir):
+        self.camera_id = camera_id
+        self.timestamps = timestamps
+        self.positions = positions
+        self.quaternions = quaternions
+        self.image_paths = image_paths
+        self.records_dir = records_dir
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def image_path(self, i):
+        """Absolute image path of pose i, or None."""
+        rel = str(self.image_paths[i])
+        return os.path.join(self.records_dir, rel) if rel else None
+
+
+def default_cache_dir(raw_root):
+    key = hashlib.sha1(os.path.abspath(raw_root).encode()).hexdigest()[:16]
+    return os.path.join(os.path.expanduser("~/.cache/embodied-rag/pose_index"), key)
+
+
+def _source_paths(raw_root):
+    return {name: os.path.join(raw_root, "sensors", name) for name in SOURCE_FILES}
+
+
+def _source_stats(raw_root):
+    stats = {}
+    for name, path in _source_paths(raw_root).items():
+        st = os.stat(path)
+        stats[name] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size}
+    return stats
+
+
+def _read_csv_rows(path):
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            yield [p.strip() for p in line.split(",")]
+
+
+def _invert_poses(q_wxyz, t):
+    """
+    kapture pose (world → camera, q = [w, x, y, z], t) → camera → world
+    position and quaternion [x, y, z, w] (w >= 0).
+    """
+    q_cw, positions = invert_poses(q_wxyz, t, order="wxyz")
+    return positions, canonicalize(wxyz_to_xyzw(q_cw), "xyzw")
+
+
+def build_pose_index(raw_root, cache_dir):
+    """Parse trajectories / records_camera once and write the per-camera arrays."""
+    sources = _source_paths(raw_root)
+
+    poses = {}  # camera → list of (ts, qw, qx, qy, qz, tx, ty, tz)
+    for row in _read_csv_rows(sources["trajectories.txt"]):
+        ts, cam = int(row[0]), row[1]
+        poses.setdefault(cam, []).append((ts, *map(float, row[2:9])))
+
+    images = {}  # (camera, ts) → relative image path
+    for row in _read_csv_rows(sources["records_camera.txt"]):
+        images[(row[1], int(row[0]))] = row[2]
+
+    os.makedirs(cache_dir, exist_ok=True)
+    cameras = {}
+    for cam, rows in poses.items():
+        arr = np.array(rows, dtype=np.float64)
+        ts = np.array([r[0] for r in rows], dtype=np.int64)
+        order = np.argsort(ts, kind="stable")
+        ts, arr = ts[order], arr[order]
+
+        positions, quats = _invert_poses(arr[:, 1:5], arr[:, 5:8])
+        paths = np.array([images.get((cam, int(t)), "") for t in ts], dtype=str)
+
+        cam_dir = os.path.join(cache_dir, cam)
+        os.makedirs(cam_dir, exist_ok=True)
+        np.save(os.path.join(cam_dir, "timestamps.npy"), ts)
+        np.save(os.path.join(cam_dir, "positions.npy"), positions)
+        np.save(os.path.join(cam_dir, "quaternions.npy"), quats)
+        np.save(os.path.join(cam_dir, "image_paths.npy"), paths)
+        cameras[cam] = {"count": int(len(ts)), "with_image": int((paths != "").sum())}
+
+    manifest = {
+        "version": POSE_INDEX_VERSION,
+        "raw_root": os.path.abspath(raw_root),
+        "sources": _source_stats(raw_root),
+        "cameras": cameras,
+    }
+    # manifest 는 마지막에 기록 → 중간에 실패하면 다음 실행에서 다시 만듦
+    with open(os.path.join(cache_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def _is_fresh(manifest, raw_root):
+    return (
+        manifest.get("version") == POSE_INDEX_VERSION
+        and manifest.get("sources") == _source_stats(raw_root)
+    )
+
+
+def load_pose_index(raw_root, camera_id, cache_dir=None, rebuild=False, mmap_mode=None):
+    """
+    Load (building or refreshing if needed) the pose index of one camera.
+
+    cache_dir : None → ~/.cache/embodied-rag/pose_index/<hash of raw_root>
+    rebuild   : force re-parsing the kapture files
+    """
+    if cache_dir is None:
+        cache_dir = default_cache_dir(raw_root)
+
+    manifest_path = os.path.join(cache_dir, "manifest.json")
+    manifest = None
+    if not rebuild and os.path.exists(manifest_path):
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+        if not _is_fresh(manifest, raw_root):
+            print("[POSE INDEX] kapture source changed → rebuilding")
+            manifest = None
+
+    if manifest is None:
+        print(f"[POSE INDEX] building → {cache_dir}")
+        manifest = build_pose_index(raw_root, cache_dir)
+
+    if camera_id not in manifest["cameras"]:
+        raise KeyError(f"camera {camera_id} not in trajectories ({list(manifest['cameras'])})")
+
+    cam_dir = os.path.join(cache_dir, camera_id)
+    cols = {
+        name: np.load(os.path.join(cam_dir, f"{name}.npy"), mmap_mode=mmap_mode)
+        for name in COLUMNS
+    }
+    return CameraPoses(
+        camera_id,
+        records_dir=os.path.join(raw_root, "sensors", "records_data"),
+        **cols,
+    )
@@ -0,0 +1,86 @@
+# src/utils/rate_limit.py
+
+import time
+import threading
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    rate     : tokens refilled per second
+    capacity : bucket size (max burst), default = rate (one second worth)
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self, amount=1.0):
+        """amount 만큼 토큰이 찰 때까지 대기 후 차감."""
+        # capacity 보다 큰 요청은 bucket 이 가득 찬 시점에 통과 (음수로 빌려 씀)
+        need = min(float(amount), self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= need:
+                    self._tokens -= amount
+                    return
+                wait = (need - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def adjust(self, delta):
+        """추정치와 실제 사용량의 차이를 반영 (delta > 0 → 추가 차감)."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self.capacity, self._tokens - delta)
+
+
+class RateLimiter:
+    """
+    Requests/min + tokens/min limiter shared by all workers.
+
+    rpm / tpm     : None → unlimited
+    burst_seconds : how many seconds worth of quota may be spent at once
+    pause(s)      : after a 429, hold back every worker for `s` seconds
+    """
+
+    def __init__(self, rpm=None, tpm=None, burst_seconds=1.0):
+        self.requests = self.tokens = None
+        if rpm:
+            self.requests = TokenBucket(rpm / 60.0, capacity=max(1.0, rpm / 60.0 * burst_seconds))
+        if tpm:
+            self.tokens = TokenBucket(tpm / 60.0, capacity=tpm / 60.0 * burst_seconds)
+        self._resume_at = 0.0
+        self._lock = threading.Lock()
+
+    def pause(self, seconds):
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+    def _wait_pause(self):
+        while True:
+            with self._lock:
+                wait = self._resume_at - time.monotonic()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def acquire(self, tokens=0):
+        self._wait_pause()
+        if self.requests is not None:
+            self.requests.acquire(1)
+        if self.tokens is not None and tokens:
+            self.tokens.acquire(tokens)
+
+    def record_usage(self, estimated, actual):
+        if self.tokens is not None and actual is not None:
+            self.tokens.adjust(actual - estimated)
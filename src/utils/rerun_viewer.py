@@ -1,7 +1,7 @@
 # src/utils/rerun_viewer.py
 
 import os
-import json
+import sys
 import time
 import yaml
 import urllib.parse
@@ -9,7 +9,14 @@ import urllib.parse
 import numpy as np
 import rerun as rr
 from PIL import Image
-from scipy.spatial.transform import Rotation as R
+
+# `uv run src/utils/rerun_viewer.py` 로 실행해도 src.* import 가 되도록
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.append(ROOT)
+
+from src.graph.topology import load_topological_graph
+from src.memory.forest_io import read_forest
+from src.utils.pose_batch import quat_to_matrix
 
 
 # =========================================================
@@ -33,18 +40,19 @@ def main():
     processed_root = cfg["processed_root"]
 
     # -----------------------------------------------------
-    # Load semantic forest
+    # Load semantic forest (binary 가 있으면 memmap 으로, 없으면 json)
     # -----------------------------------------------------
-    forest_path = os.path.join(processed_root, "semantic_forest.json")
-    print("[LOAD] semantic_forest.json →", forest_path)
-
-    with open(forest_path, "r") as f:
-        forest = json.load(f)
-
-    nodes = forest["nodes"]         # dict: id -> node dict
-    root_id = forest["root"]
-    print("[FOREST] root =", root_id)
-    print("[FOREST] #nodes =", len(nodes))
+    forest_path = os.path.join(processed_root, "semantic_forest")
+    if not os.path.isdir(forest_path):
+        forest_path = os.path.join(processed_root, "semantic_forest.json")
+    print("[LOAD] semantic forest →", forest_path)
+
+    forest = read_forest(forest_path)
+    ids = forest.ids
+    levels = np.asarray(forest.levels)
+    leaf_mask = np.asarray(forest.leaf_mask)
+    print("[FOREST] root =", forest.root)
+    print("[FOREST] #nodes =", len(forest))
 
     # -----------------------------------------------------
     # Load camera intrinsics
@@ -81,28 +89,20 @@ def main():
     # =====================================================
     # Compute 3D position for visualization (Z-level)
     # =====================================================
-    def viz_position(node_dict):
-        base_pos = np.array(node_dict["position"], dtype=np.float32)
-        level = int(node_dict["level"])
-        pos = base_pos.copy()
-        pos[2] += level * Z_STEP
-        return pos
-
-    node_viz_pos = {nid: viz_position(nd) for nid, nd in nodes.items()}
+    node_viz_pos = np.array(forest.positions, dtype=np.float32)
+    node_viz_pos[:, 2] += levels * Z_STEP
 
-    # Leaf / area 분리
-    leaf_ids = [nid for nid, nd in nodes.items() if nd["type"] == "leaf"]
-    area_ids = [nid for nid, nd in nodes.items() if nd["type"] != "leaf"]
+    # Leaf / area 분리 (row index)
+    leaf_rows = np.flatnonzero(leaf_mask)
+    area_rows = np.flatnonzero(~leaf_mask)
+    area_ids = [ids[r] for r in area_rows]
 
     # -----------------------------------------------------
     # Points for leaf nodes
     # -----------------------------------------------------
-    if leaf_ids:
-        leaf_pos = np.array([node_viz_pos[nid] for nid in leaf_ids], dtype=np.float32)
-        leaf_colors = np.array(
-            [np.array([80, 160, 255], dtype=np.uint8) for _ in leaf_ids],
-            dtype=np.uint8,
-        )
+    if len(leaf_rows):
+        leaf_pos = node_viz_pos[leaf_rows]
+        leaf_colors = np.tile(np.array([80, 160, 255], dtype=np.uint8), (len(leaf_rows), 1))
         rr.log(
             "world/forest/leaf_points",
             rr.Points3D(
@@ -115,12 +115,9 @@ def main():
     # -----------------------------------------------------
     # Points for area nodes
     # -----------------------------------------------------
-    if area_ids:
-        area_pos = np.array([node_viz_pos[nid] for nid in area_ids], dtype=np.float32)
-        area_colors = np.array(
-            [np.array([255, 180, 0], dtype=np.uint8) for _ in area_ids],
-            dtype=np.uint8,
-        )
+    if len(area_rows):
+        area_pos = node_viz_pos[area_rows]
+        area_colors = np.tile(np.array([255, 180, 0], dtype=np.uint8), (len(area_rows), 1))
         rr.log(
             "world/forest/area_points",
             rr.Points3D(
@@ -135,49 +132,42 @@ def main():
     # -----------------------------------------------------
     # Hierarchy edges (parent → child)
     # -----------------------------------------------------
-    edge_list = []
-    for nid, nd in nodes.items():
-        for child_id in nd["children"]:
-            if child_id not in node_viz_pos:
-                continue
-            p_parent = node_viz_pos[nid]
-            p_child = node_viz_pos[child_id]
-            edge_list.append([p_parent, p_child])
-
-    if edge_list:
+    parents = np.asarray(forest.parents)
+    child_rows = np.flatnonzero(parents >= 0)
+    edge_list = np.stack(
+        [node_viz_pos[parents[child_rows]], node_viz_pos[child_rows]], axis=1
+    )
+
+    if len(edge_list):
         rr.log("world/forest/edges", rr.LineStrips3D(edge_list))
 
     # =====================================================
     # 추가: viewpoint(topological_graph) edges
-    #   - L0_i 노드들끼리 원래 topological_graph.json의 edge를 다시 그림
+    #   - L0_i 노드들끼리 topological graph (CSR) 의 edge 를 다시 그림
     # =====================================================
-    topo_path = os.path.join(processed_root, "topological_graph.json")
-    print("[LOAD] topological_graph.json →", topo_path)
+    print("[LOAD] topological graph →", processed_root)
 
     try:
-        with open(topo_path, "r") as f:
-            topo = json.load(f)
+        topo = load_topological_graph(processed_root)
 
-        topo_edges = topo["edges"]
+        # graph row → forest row (L0_<node_id>), 노드당 한 번만 조회
+        forest_row = np.array(
+            [forest.index.get(f"L0_{nid}", -1) for nid in topo.node_ids.tolist()],
+            dtype=np.int64,
+        )
 
         vp_edge_list = []
+        for etype in topo.edge_types:
+            i, j = topo.edge_pairs(etype)
+            src_row, dst_row = forest_row[i], forest_row[j]
+            ok = (src_row >= 0) & (dst_row >= 0)
+            # level 0 이라 z-offset 없음
+            vp_edge_list.append(
+                np.stack([node_viz_pos[src_row[ok]], node_viz_pos[dst_row[ok]]], axis=1)
+            )
+        vp_edge_list = np.concatenate(vp_edge_list) if vp_edge_list else np.empty((0, 2, 3))
 
-        # topological_graph의 src/dst 인덱스를 L0_i로 매핑
-        for e in topo_edges:
-            src_idx = e["src"]
-            dst_idx = e["dst"]
-
-            src_id = f"L0_{src_idx}"
-            dst_id = f"L0_{dst_idx}"
-
-            if src_id not in node_viz_pos or dst_id not in node_viz_pos:
-                continue
-
-            p1 = node_viz_pos[src_id]   # level 0 이라 z-offset 없음
-            p2 = node_viz_pos[dst_id]
-            vp_edge_list.append([p1, p2])
-
-        if vp_edge_list:
+        if len(vp_edge_list):
             rr.log(
                 "world/forest/viewpoint_edges",
                 rr.LineStrips3D(
@@ -197,14 +187,25 @@ def main():
     # =====================================================
 
     # leaf: id 기준 정렬
-    leaf_ids_sorted = sorted(leaf_ids, key=lambda x: int(x.split("_")[1]))
-
-    for t, nid in enumerate(leaf_ids_sorted):
-        nd = nodes[nid]
+    leaf_rows_sorted = sorted(leaf_rows, key=lambda r: int(ids[r].split("_")[1]))
+    images = forest.images
+    raw_captions = forest.raw_captions
+    summaries = forest.summaries
+    positions = np.asarray(forest.positions, dtype=np.float32)
+    quaternions = np.asarray(forest.quaternions)
+
+    # leaf 카메라 회전 행렬 (N, 3, 3) 한 번에 계산, pose 없는 행은 NaN
+    pose_ok = ~np.isnan(quaternions).any(axis=1)
+    rot_mats = np.full((len(quaternions), 3, 3), np.nan, dtype=np.float32)
+    if pose_ok.any():
+        rot_mats[pose_ok] = quat_to_matrix(quaternions[pose_ok], order="xyzw")
+
+    for t, r in enumerate(leaf_rows_sorted):
+        nid = ids[r]
         rr.set_time("image", sequence=t)
 
         # 이미지
-        img_path = nd.get("image")
+        img_path = images[r]
         if img_path:
             try:
                 img = Image.open(img_path)
@@ -215,41 +216,40 @@ def main():
             print(f"[WARN] no image field for {nid}")
 
         # 캡션: raw_caption 있으면 그거, 없으면 summary
-        caption_text = nd.get("raw_caption") or nd.get("summary", "")
+        caption_text = raw_captions[r] or summaries[r] or ""
         rr.log("world/cameras/caption", rr.TextDocument(caption_text))
 
         # 카메라 pose: 실제 position (z-offset 없이) + quaternion
-        try:
-            pos = np.array(nd["position"], dtype=np.float32)
-            quat = np.array(nd["quaternion"], dtype=np.float32)  # [x,y,z,w]
-            rot_mat = R.from_quat(quat).as_matrix().astype(np.float32)
+        pos = positions[r]
+        if not pose_ok[r]:
+            print(f"[WARN] missing pose field for {nid}")
+            continue
+        rot_mat = rot_mats[r]
 
-            rr.log(
-                "world/cameras",
-                rr.Transform3D(
-                    translation=pos,
-                    mat3x3=rot_mat,
-                ),
-            )
-        except KeyError as e:
-            print(f"[WARN] missing pose field for {nid}:", e)
+        rr.log(
+            "world/cameras",
+            rr.Transform3D(
+                translation=pos,
+                mat3x3=rot_mat,
+            ),
+        )
 
     # -----------------------------------------------------
     # area 노드들: summary를 나중 타임스텝에 순서대로 기록
     #   level 오름차순 → id 오름차순
     # -----------------------------------------------------
-    base_t = len(leaf_ids_sorted)
+    base_t = len(leaf_rows_sorted)
     area_sorted = sorted(
-        area_ids,
-        key=lambda x: (int(nodes[x]["level"]), x),
+        area_rows,
+        key=lambda r: (int(levels[r]), ids[r]),
     )
 
-    for dt, nid in enumerate(area_sorted):
-        nd = nodes[nid]
+    for dt, r in enumerate(area_sorted):
+        nid = ids[r]
         rr.set_time("image", sequence=base_t + dt)
 
         # position (viz용 z-offset 포함 transform)
-        pos = node_viz_pos[nid]
+        pos = node_viz_pos[r]
         rr.log(
             f"world/areas/{nid}",
             rr.Transform3D(translation=pos),
@@ -257,7 +257,7 @@ def main():
 
         rr.log(
             f"world/areas/{nid}/summary",
-            rr.TextDocument(nd.get("summary", "")),
+            rr.TextDocument(summaries[r] or ""),
         )
 
     print("✨ Semantic forest visualization running!")
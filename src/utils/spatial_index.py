@@ -0,0 +1,100 @@
+# src/utils/spatial_index.py
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def latlon_to_xyz(latlon, radius=EARTH_RADIUS_KM):
+    """
+    (lat, lon) in degrees → 3D points on a sphere of the given radius.
+    Great-circle distance d maps to chord length 2R·sin(d / 2R), which is
+    monotonic, so radius queries can run on the chord coordinates.
+    """
+    lat = np.radians(np.asarray(latlon, dtype=float)[:, 0])
+    lon = np.radians(np.asarray(latlon, dtype=float)[:, 1])
+    return radius * np.stack(
+        [np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)],
+        axis=1,
+    )
+
+
+def haversine_distance(latlon_a, latlon_b, radius=EARTH_RADIUS_KM):
+    """Element-wise haversine distance between two (M, 2) lat/lon arrays (degrees)."""
+    a = np.radians(np.asarray(latlon_a, dtype=float))
+    b = np.radians(np.asarray(latlon_b, dtype=float))
+    dlat = b[:, 0] - a[:, 0]
+    dlon = b[:, 1] - a[:, 1]
+    h = np.sin(dlat / 2) ** 2 + np.cos(a[:, 0]) * np.cos(b[:, 0]) * np.sin(dlon / 2) ** 2
+    return 2 * radius * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+
+def radius_pairs(points, radius, mode="euclidean"):
+    """
+    All index pairs (i < j) whose distance is <= radius, via a KD-tree.
+
+    points : (N, D) array
+             - euclidean: coordinates (all columns are used)
+             - haversine: (lat, lon) in degrees, radius in km
+    returns:
+        i, j, dist  — int64 arrays sorted by (i, j), and the float distances
+    """
+    points = np.asarray(points, dtype=float)
+
+    if mode == "euclidean":
+        coords = points
+        query_r = radius
+    elif mode == "haversine":
+        coords = latlon_to_xyz(points)
+        half = min(radius / (2 * EARTH_RADIUS_KM), np.pi / 2)
+        # chord 반경을 약간 넉넉히 잡고 실제 haversine 거리로 다시 거른다
+        query_r = 2 * EARTH_RADIUS_KM * np.sin(half) * (1 + 1e-9)
+    else:
+        raise ValueError("mode must be 'euclidean' or 'haversine'")
+
+    if len(coords) < 2:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, np.empty(0, dtype=float)
+
+    tree = cKDTree(coords)
+    pairs = tree.query_pairs(query_r, output_type="ndarray").astype(np.int64)
+
+    if len(pairs):
+        order = np.lexsort((pairs[:, 1], pairs[:, 0]))
+        pairs = pairs[order]
+    i, j = pairs[:, 0], pairs[:, 1]
+
+    if mode == "euclidean":
+        dist = np.linalg.norm(coords[i] - coords[j], axis=1)
+    else:
+        dist = haversine_distance(points[i], points[j])
+
+    keep = dist <= radius
+    return i[keep], j[keep], dist[keep]
+
+
+def cap_neighbors(i, j, dist, k):
+    """
+    Mask over (i, j, dist) pairs keeping, for every node, only its k nearest
+    partners. A pair survives if it is among the k nearest of either endpoint,
+    so the result stays symmetric.
+    """
+    n_pairs = len(i)
+    if k is None or n_pairs == 0:
+        return np.ones(n_pairs, dtype=bool)
+
+    # 양방향 (node, partner) 로 펼친 뒤 node 별 거리 순위를 매긴다
+    node = np.concatenate([i, j])
+    dist2 = np.concatenate([dist, dist])
+    pair_id = np.concatenate([np.arange(n_pairs), np.arange(n_pairs)])
+
+    order = np.lexsort((dist2, node))
+    node_sorted = node[order]
+    group_start = np.r_[0, np.flatnonzero(np.diff(node_sorted)) + 1]
+    group_len = np.diff(np.r_[group_start, len(node_sorted)])
+    rank = np.arange(len(node_sorted)) - np.repeat(group_start, group_len)
+
+    keep = np.zeros(n_pairs, dtype=bool)
+    keep[pair_id[order[rank < k]]] = True
+    return keep
@@ -0,0 +1,80 @@
+# tests/test_caption_journal.py
+
+import json
+
+from src.utils.caption_journal import CaptionJournal
+
+
+def test_resume_after_truncated_line(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = CaptionJournal(path, "model", "prompt")
+    journal.append(1, "sha-1", "first")
+    journal.append(2, "sha-2", "second")
+    journal.close()
+
+    # crash mid-write: 마지막 줄이 잘림 (줄바꿈 없음)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"node_id": 3, "image_sha1": "sha-3", "capt')
+
+    journal = CaptionJournal(path, "model", "prompt")
+    assert len(journal) == 2
+    assert journal.lookup(1, "sha-1") == "first"
+    assert journal.lookup(3, "sha-3") is None
+    journal.append(3, "sha-3", "third")
+    journal.close()
+
+    journal = CaptionJournal(path, "model", "prompt")
+    assert journal.lookup(3, "sha-3") == "third"
+    assert len(journal) == 3
+    journal.close()
+
+
+def test_lookup_checks_image_model_and_prompt(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = CaptionJournal(path, "model", "prompt")
+    journal.append(1, "sha-1", "caption")
+    journal.close()
+
+    assert CaptionJournal(path, "model", "prompt").lookup(1, "other") is None
+    assert CaptionJournal(path, "other-model", "prompt").lookup(1, "sha-1") is None
+    assert CaptionJournal(path, "model", "other prompt").lookup(1, "sha-1") is None
+
+
+def test_invalid_entries_are_skipped(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    path.write_text(
+        "\n".join([
+            json.dumps([1, 2]),
+            json.dumps({"node_id": 5}),
+            json.dumps({"image_sha1": "x"}),
+            "not json",
+            "",
+        ])
+    )
+    assert len(CaptionJournal(str(path), "model", "prompt")) == 0
+
+
+def test_fresh_discards_journal(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = CaptionJournal(path, "model", "prompt")
+    journal.append(1, "sha-1", "caption")
+    journal.close()
+
+    journal = CaptionJournal(path, "model", "prompt", fresh=True)
+    assert len(journal) == 0
+    journal.close()
+    assert len(CaptionJournal(path, "model", "prompt")) == 0
+
+
+def test_payload_settings_are_part_of_the_key(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    low = {"max_side": 256, "jpeg_quality": 85, "detail": "low"}
+    high = {"max_side": 768, "jpeg_quality": 85, "detail": "high"}
+
+    journal = CaptionJournal(path, "model", "prompt", settings=low)
+    journal.append(1, "sha-1", "low caption")
+    journal.close()
+
+    assert CaptionJournal(path, "model", "prompt", settings=low).lookup(1, "sha-1") == "low caption"
+    assert CaptionJournal(path, "model", "prompt", settings=high).lookup(1, "sha-1") is None
+    assert CaptionJournal(path, "model", "prompt").lookup(1, "sha-1") is None
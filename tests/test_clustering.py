@@ -0,0 +1,91 @@
+# tests/test_clustering.py
+
+import numpy as np
+import pytest
+from scipy import sparse
+
+from src.memory.clustering import (
+    AgglomerationEngine,
+    complete_linkage_clustering,
+    naive_complete_linkage_clustering,
+)
+
+
+def random_similarity(n, seed, decimals=None):
+    rng = np.random.default_rng(seed)
+    S = rng.random((n, n))
+    if decimals is not None:
+        S = S.round(decimals)  # 동점이 많이 생기도록
+    S = np.triu(S, 1)
+    S = S + S.T
+    np.fill_diagonal(S, 1.0)
+    return S
+
+
+@pytest.mark.parametrize("seed", range(8))
+@pytest.mark.parametrize("threshold", [0.2, 0.5, 0.8])
+def test_dense_matches_naive(seed, threshold):
+    S = random_similarity(24, seed)
+    assert complete_linkage_clustering(S, threshold) == naive_complete_linkage_clustering(S, threshold)
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_ties_match_naive(seed):
+    S = random_similarity(24, seed, decimals=1)
+    assert complete_linkage_clustering(S, 0.3) == naive_complete_linkage_clustering(S, 0.3)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_sparse_and_blocks_match_naive(seed):
+    S = random_similarity(30, seed)
+    S[S < 0.4] = 0.0
+    expected = naive_complete_linkage_clustering(S, 0.5)
+
+    assert complete_linkage_clustering(sparse.csr_matrix(S), 0.5) == expected
+    blocks = ((start, S[start:start + 7]) for start in range(0, len(S), 7))
+    assert complete_linkage_clustering(blocks, 0.5) == expected
+
+
+def test_engine_pop_best_matches_full_scan():
+    S = random_similarity(20, 0)
+    engine = AgglomerationEngine(S)
+    active = list(range(20))
+
+    while len(active) > 1:
+        sim, x, y = engine.pop_best()
+        # row-major scan over active slots: 최대값, 동점이면 가장 작은 (x, y)
+        best = max(
+            ((engine.M[a, b], -a, -b) for i, a in enumerate(active) for b in active[i + 1:])
+        )
+        assert (sim, x, y) == (best[0], -best[1], -best[2])
+
+        row = np.minimum(engine.M[x], engine.M[y])
+        engine.merge(x, y, row, into=x)
+        active.remove(y)
+
+    assert engine.pop_best() is None
+
+
+def test_empty_input():
+    assert complete_linkage_clustering(np.empty((0, 0))) == []
+
+
+@pytest.mark.parametrize("threshold", [0.5, 0.0, -1.0])
+def test_streamed_inputs_any_threshold(tmp_path, threshold):
+    S = random_similarity(25, 3)
+    expected = naive_complete_linkage_clustering(S, threshold)
+
+    mm = np.lib.format.open_memmap(tmp_path / "S.npy", mode="w+", dtype=S.dtype, shape=S.shape)
+    mm[:] = S
+    assert complete_linkage_clustering(mm, threshold) == expected
+
+    blocks = ((start, S[start:start + 6]) for start in range(0, len(S), 6))
+    assert complete_linkage_clustering(blocks, threshold) == expected
+
+    block_list = [(start, S[start:start + 6]) for start in range(0, len(S), 6)]
+    assert complete_linkage_clustering(block_list, threshold, blocks=True) == expected
+
+
+def test_lists_are_dense_by_default():
+    S = random_similarity(12, 5)
+    assert complete_linkage_clustering(S.tolist(), 0.4) == naive_complete_linkage_clustering(S, 0.4)
@@ -0,0 +1,106 @@
+# tests/test_forest_io.py
+
+import json
+
+import numpy as np
+import pytest
+
+from src.memory.forest_io import convert_forest, read_forest, write_forest
+
+
+def make_forest():
+    rng = np.random.default_rng(0)
+    nodes = {}
+    for k in range(4):
+        nodes[f"leaf_{k}"] = {
+            "id": f"leaf_{k}",
+            "level": 0,
+            "type": "leaf",
+            "children": [],
+            "parent": f"area_{k // 2}",
+            "summary": f"캡션 {k}",
+            "embedding": rng.random(8).astype(np.float32).tolist(),
+            "position": rng.random(3).tolist(),
+            "raw_caption": f"raw {k}",
+            "image": f"images/{k}.jpg",
+            "quaternion": rng.random(4).tolist(),
+        }
+    for k in range(2):
+        nodes[f"area_{k}"] = {
+            "id": f"area_{k}",
+            "level": 1,
+            "type": "area",
+            "children": [f"leaf_{2 * k}", f"leaf_{2 * k + 1}"],
+            "parent": "root",
+            "summary": f"area {k}",
+            "embedding": rng.random(8).astype(np.float32).tolist(),
+            "position": rng.random(3).tolist(),
+        }
+    nodes["root"] = {
+        "id": "root",
+        "level": 2,
+        "type": "area",
+        "children": ["area_0", "area_1"],
+        "parent": None,
+        "summary": "root",
+        "embedding": rng.random(8).astype(np.float32).tolist(),
+        "position": rng.random(3).tolist(),
+    }
+    return {"root": "root", "nodes": nodes}
+
+
+def assert_same_forest(a, b):
+    assert a["root"] == b["root"]
+    assert a["nodes"].keys() == b["nodes"].keys()
+    for nid, node in a["nodes"].items():
+        other = b["nodes"][nid]
+        assert node.keys() == other.keys(), nid
+        for key, value in node.items():
+            if key in ("embedding", "position", "quaternion"):
+                np.testing.assert_allclose(other[key], value, rtol=1e-6)
+            else:
+                assert other[key] == value, (nid, key)
+
+
+def test_binary_round_trip(tmp_path):
+    forest = make_forest()
+    write_forest(forest, tmp_path / "forest")
+
+    reader = read_forest(str(tmp_path / "forest"))
+    assert len(reader) == len(forest["nodes"])
+    assert reader.root == "root"
+    assert_same_forest(forest, reader.to_forest_dict())
+
+
+def test_json_and_binary_readers_agree(tmp_path):
+    forest = make_forest()
+    json_path = tmp_path / "semantic_forest.json"
+    json_path.write_text(json.dumps(forest))
+
+    convert_forest(str(json_path), str(tmp_path / "forest"))
+    from_json = read_forest(str(json_path)).to_forest_dict()
+    from_binary = read_forest(str(tmp_path / "forest")).to_forest_dict()
+    assert_same_forest(from_json, from_binary)
+
+
+def test_columns_are_memory_mapped(tmp_path):
+    write_forest(make_forest(), tmp_path / "forest")
+    reader = read_forest(str(tmp_path / "forest"))
+    assert isinstance(reader.embeddings, np.memmap)
+    assert reader.embeddings.dtype == np.float32
+
+
+def test_manifest_is_checked(tmp_path):
+    out = tmp_path / "forest"
+    write_forest(make_forest(), out)
+
+    manifest = json.loads((out / "manifest.json").read_text())
+    manifest["version"] += 1
+    (out / "manifest.json").write_text(json.dumps(manifest))
+    with pytest.raises(ValueError):
+        read_forest(str(out))
+
+    # manifest 는 마지막에 기록 → 없으면 쓰다 만 directory
+    (out / "manifest.json").unlink()
+    with pytest.raises(FileNotFoundError):
+        read_forest(str(out))
@@ -0,0 +1,48 @@
+# tests/test_frame_io.py
+
+import os
+
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+
+from src.utils.frame_io import process_frames
+
+
+def write_frame(path, value, mtime_ns):
+    cv2.imwrite(str(path), np.full((64, 80, 3), value, dtype=np.uint8))
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_unchanged_frames_are_skipped(tmp_path):
+    src = tmp_path / "raw_0.jpg"
+    write_frame(src, 50, 10**18)
+    out = tmp_path / "out"
+    out.mkdir()
+    dst = str(out / "00000.jpg")
+
+    _, stats = process_frames([(str(src), dst)], str(out), dst_size=(40, 32), workers=1)
+    assert stats["written"] == 1
+    _, stats = process_frames([(str(src), dst)], str(out), dst_size=(40, 32), workers=1)
+    assert stats["skipped"] == 1 and stats["written"] == 0
+
+
+def test_remapped_destination_is_rewritten(tmp_path):
+    # keyframe 선택이 바뀌어 같은 00005.jpg 가 다른 raw frame 에서 와야 하는 경우
+    # (크기 / mtime 이 같아도 다시 써야 함)
+    a, b = tmp_path / "raw_a.jpg", tmp_path / "raw_b.jpg"
+    write_frame(a, 0, 10**18)
+    write_frame(b, 255, 10**18)
+    assert os.path.getsize(a) == os.path.getsize(b)
+
+    out = tmp_path / "out"
+    out.mkdir()
+    dst = str(out / "00005.jpg")
+
+    process_frames([(str(a), dst)], str(out), dst_size=(40, 32), workers=1)
+    assert cv2.imread(dst).mean() < 10
+
+    _, stats = process_frames([(str(b), dst)], str(out), dst_size=(40, 32), workers=1)
+    assert stats["written"] == 1 and stats["skipped"] == 0
+    assert cv2.imread(dst).mean() > 245
@@ -0,0 +1,95 @@
+# tests/test_graph_store.py
+
+import numpy as np
+import pytest
+
+from scripts.topology_map_construction.build_edges import proximity_pairs
+from src.graph.store import GraphStore
+
+
+def make_nodes(n, seed=0):
+    rng = np.random.default_rng(seed)
+    pos = np.cumsum(rng.normal(scale=0.4, size=(n, 3)) * [1.0, 1.0, 0.05], axis=0)
+    pos[n // 2:] = pos[:n - n // 2] + rng.normal(scale=0.3, size=(n - n // 2, 3))  # 재방문
+    return [
+        {"node_id": k, "timestamp": 1000 * k, "position": pos[k].tolist()}
+        for k in range(n)
+    ]
+
+
+def rebuilt_edges(nodes, alpha, k_nearest=None):
+    """build_edges 와 같은 edge 집합 (sequence + proximity)."""
+    ids = [n["node_id"] for n in nodes]
+    pos = np.array([n["position"] for n in nodes])
+    edges = {(ids[k], ids[k + 1], "sequence") for k in range(len(ids) - 1)}
+    pi, pj = proximity_pairs(pos, alpha, k_nearest=k_nearest)
+    edges |= {(ids[i], ids[j], "proximity") for i, j in zip(pi.tolist(), pj.tolist())}
+    return edges
+
+
+@pytest.mark.parametrize("k_nearest", [None, 1, 4])
+@pytest.mark.parametrize("batch", [1, 17, 100, 400])
+def test_batched_append_matches_rebuild(tmp_path, batch, k_nearest):
+    nodes = make_nodes(400)
+    store = GraphStore(str(tmp_path / "graph.db"), alpha=1.0, k_nearest=k_nearest)
+    for lo in range(0, len(nodes), batch):
+        store.append(nodes[lo:lo + batch])
+
+    edges = {(e["src"], e["dst"], e["type"]) for e in store.edges()}
+    assert len(edges) == store.num_edges()
+    assert edges == rebuilt_edges(nodes, 1.0, k_nearest)
+    store.close()
+
+
+def test_k_nearest_removes_superseded_edges(tmp_path):
+    # 나중에 더 가까운 node 가 오면 기존 node 의 먼 partner edge 는 빠져야 함
+    store = GraphStore(str(tmp_path / "graph.db"), alpha=1.0, k_nearest=1)
+    store.append([
+        {"node_id": 0, "timestamp": 0, "position": [0.0, 0.0, 0.0]},
+        {"node_id": 1, "timestamp": 1, "position": [0.9, 0.0, 0.0]},
+    ])
+    res = store.append([{"node_id": 2, "timestamp": 2, "position": [0.5, 0.0, 0.0]}])
+    assert res["proximity"] == 2 and res["proximity_removed"] == 1
+    assert {(e["src"], e["dst"]) for e in store.edges() if e["type"] == "proximity"} == {(0, 2), (1, 2)}
+    store.close()
+
+
+def test_append_skips_stored_nodes(tmp_path):
+    nodes = make_nodes(50)
+    store = GraphStore(str(tmp_path / "graph.db"), alpha=1.0)
+    store.append(nodes[:30])
+    res = store.append(nodes[20:])
+    assert res["nodes"] == 20 and res["skipped"] == 10
+    assert len(store) == 50
+    store.close()
+
+
+def test_missing_timestamps(tmp_path):
+    store = GraphStore(str(tmp_path / "graph.db"), alpha=1.0)
+    res = store.append([
+        {"node_id": 1, "timestamp": None, "position": [0.0, 0.0, 0.0]},
+        {"node_id": 0, "position": [0.5, 0.0, 0.0]},
+    ])
+    assert res == {"nodes": 2, "skipped": 0, "sequence": 1, "proximity": 1, "proximity_removed": 0}
+    store.close()
+
+
+def test_alpha_and_k_nearest_are_fixed_per_store(tmp_path):
+    path = str(tmp_path / "graph.db")
+    GraphStore(path, alpha=1.0, k_nearest=4).close()
+    with pytest.raises(ValueError):
+        GraphStore(path, alpha=2.0)
+    with pytest.raises(ValueError):
+        GraphStore(path, k_nearest=8)
+    store = GraphStore(path)
+    assert (store.alpha, store.k_nearest) == (1.0, 4)
+    store.close()
+
+
+def test_import_rejects_mismatched_meta(tmp_path):
+    graph = {"nodes": make_nodes(5), "edges": [], "meta": {"alpha": 3.0, "k_nearest": None}}
+    store = GraphStore(str(tmp_path / "graph.db"), alpha=1.0)
+    with pytest.raises(ValueError):
+        store.import_graph(graph)
+    assert len(store) == 0
+    store.close()
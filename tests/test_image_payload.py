@@ -0,0 +1,33 @@
+# tests/test_image_payload.py
+
+import os
+
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+
+from src.utils.image_payload import prepare_payloads
+
+
+def test_failed_sources_fall_back_to_original(tmp_path):
+    good = str(tmp_path / "good.jpg")
+    cv2.imwrite(good, np.zeros((600, 900, 3), dtype=np.uint8))
+    broken = tmp_path / "broken.jpg"
+    broken.write_bytes(b"not a jpeg")
+    missing = str(tmp_path / "missing.jpg")
+    cache_dir = str(tmp_path / "cache")
+
+    payloads, report = prepare_payloads(
+        [good, str(broken), missing], cache_dir, max_side=300, workers=1
+    )
+
+    assert payloads[0]["path"].startswith(cache_dir) and (payloads[0]["width"], payloads[0]["height"]) == (300, 200)
+    assert payloads[1]["path"] == str(broken) and payloads[1]["failed"]
+    assert payloads[2]["path"] == missing and payloads[2]["failed"]
+    assert (report["encoded"], report["cached"], report["failed"]) == (1, 0, 2)
+    # 실패한 이미지의 meta 는 캐시하지 않음
+    assert len([f for f in os.listdir(cache_dir) if f.endswith(".json")]) == 1
+
+    _, report = prepare_payloads([good, str(broken), missing], cache_dir, max_side=300, workers=1)
+    assert (report["encoded"], report["cached"], report["failed"]) == (0, 1, 2)
@@ -0,0 +1,112 @@
+# tests/test_planning.py
+
+import numpy as np
+import pytest
+
+from src.graph.planning import METHODS, PathPlanner, select_landmarks
+from src.graph.topology import TopologicalGraph
+from src.utils.spatial_index import radius_pairs
+
+
+def make_graph(n=300, seed=0):
+    """Random geometric graph + a chain; the last 20 nodes form a separate component."""
+    rng = np.random.default_rng(seed)
+    pos = rng.random((n, 3)) * [20.0, 20.0, 1.0]
+    pos[-20:] += 100.0
+
+    i, j, dist = radius_pairs(pos[:-20], 1.8)
+    keep = dist < 1.8
+    ids = np.arange(n)
+    src = np.concatenate([i[keep], ids[-20:-1]])
+    dst = np.concatenate([j[keep], ids[-19:]])
+    types = ["proximity"] * int(keep.sum()) + ["sequence"] * 19
+    graph = TopologicalGraph.from_edges(ids, pos, src, dst, types)
+    graph.landmarks, graph.landmark_dist = select_landmarks(graph, 8, seed=seed)
+    return graph
+
+
+def path_length(graph, path):
+    pos = graph.positions
+    return float(sum(np.linalg.norm(pos[a] - pos[b]) for a, b in zip(path[:-1], path[1:])))
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_methods_match_plan_many(method):
+    graph = make_graph()
+    planner = PathPlanner(graph)
+    rng = np.random.default_rng(1)
+    sources = rng.integers(len(graph), size=60)
+    targets = rng.integers(len(graph), size=60)
+    sources[:3] = targets[:3]  # source == target
+
+    ref = planner.plan_many(sources, targets)
+    assert np.isinf(ref).any() and np.isfinite(ref).any()
+
+    for s, t, r in zip(sources, targets, ref):
+        d, path = planner.shortest_path(s, t, method)
+        if np.isinf(r):
+            assert np.isinf(d) and path == []
+            continue
+        assert d == pytest.approx(r, rel=1e-12, abs=1e-12)
+        assert path[0] == s and path[-1] == t
+        assert path_length(graph, path) == pytest.approx(r, rel=1e-12, abs=1e-12)
+
+
+def test_plan_many_paths_and_method():
+    graph = make_graph(seed=2)
+    planner = PathPlanner(graph)
+    rng = np.random.default_rng(3)
+    sources = rng.integers(len(graph) - 20, size=30)
+    targets = rng.integers(len(graph) - 20, size=30)
+
+    dists, paths = planner.plan_many(sources, targets, return_paths=True, chunk=4)
+    alt = planner.plan_many(sources, targets, method="alt")
+    np.testing.assert_allclose(alt, dists, rtol=1e-12)
+
+    for d, path in zip(dists, paths):
+        if np.isfinite(d):
+            assert path_length(graph, path.tolist()) == pytest.approx(d, rel=1e-12, abs=1e-12)
+
+
+def test_landmarks_cover_every_component():
+    graph = make_graph()
+    _, labels = graph.components()
+    assert set(labels[graph.landmarks].tolist()) == set(labels.tolist())
+    assert graph.landmark_dist.dtype == np.float64
+
+
+def test_landmark_round_trip(tmp_path):
+    graph = make_graph()
+    graph.save(str(tmp_path / "graph.npz"))
+    loaded = TopologicalGraph.load(str(tmp_path / "graph.npz"))
+    np.testing.assert_array_equal(loaded.landmarks, graph.landmarks)
+    np.testing.assert_array_equal(loaded.landmark_dist, graph.landmark_dist)
+
+
+def test_weights_are_float64_and_heuristics_admissible():
+    graph = make_graph(seed=4)
+    assert all(w.dtype == np.float64 for _, _, w in graph.adjacency.values())
+
+    planner = PathPlanner(graph)
+    target = 7
+    exact = planner.plan_many(np.arange(len(graph)), np.full(len(graph), target))
+    reachable = np.flatnonzero(np.isfinite(exact))
+    for method in ("astar", "alt"):
+        h = np.asarray(planner._heuristic(method, target)(reachable.tolist()))
+        # float64 끼리의 합 / 차 반올림 (ulp 수준) 만 허용
+        assert (h <= exact[reachable] * (1 + 1e-12) + 1e-12).all(), method
+
+
+def test_legacy_float32_weights_are_recomputed(tmp_path):
+    graph = make_graph()
+    graph.adjacency = {
+        etype: (offsets, indices, weights.astype(np.float32))
+        for etype, (offsets, indices, weights) in graph.adjacency.items()
+    }
+    graph.save(str(tmp_path / "graph.npz"))
+
+    loaded = TopologicalGraph.load(str(tmp_path / "graph.npz"))
+    fresh = make_graph()
+    for etype, (_, _, weights) in loaded.adjacency.items():
+        assert weights.dtype == np.float64
+        np.testing.assert_array_equal(weights, fresh.adjacency[etype][2])